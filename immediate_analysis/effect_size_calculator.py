@@ -10,6 +10,11 @@ import numpy as np
 from scipy import stats
 import matplotlib.pyplot as plt
 import seaborn as sns
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts'))
+from common.bootstrap import TwoSampleBootstrap, ClusterBootstrap
 
 def cohens_d(group1, group2):
     """
@@ -36,10 +41,14 @@ def cohens_d(group1, group2):
 
     return d
 
-def cohens_d_ci(group1, group2, confidence=0.95, n_bootstrap=10000):
+def cohens_d_ci(group1, group2, confidence=0.95, n_bootstrap=10000, method='percentile', seed=None,
+                cluster1=None, cluster2=None):
     """
     Bootstrap을 이용한 Cohen's d의 신뢰구간 계산
 
+    재표집 인덱스 행렬을 블록 단위로 만들어 평균 / 분산을 한 번에 계산 (common.bootstrap)
+    cluster1, cluster2 (참가자 ID)가 주어지면 trial 대신 참가자를 재표집 (반복측정 자료)
+
     Parameters:
     -----------
     group1, group2 : array-like
@@ -47,25 +56,25 @@ def cohens_d_ci(group1, group2, confidence=0.95, n_bootstrap=10000):
         신뢰수준 (기본값 0.95)
     n_bootstrap : int
         Bootstrap 반복 횟수
+    method : str
+        'percentile' (기본값), 'bca', 'studentized'
+    seed : int, optional
+        난수 seed (np.random.Generator)
+    cluster1, cluster2 : array-like, optional
+        group1, group2 각 관찰치의 참가자 ID
 
     Returns:
     --------
     tuple : (lower_ci, upper_ci)
     """
-    d_bootstrap = []
-
-    for _ in range(n_bootstrap):
-        # Resample with replacement
-        sample1 = np.random.choice(group1, size=len(group1), replace=True)
-        sample2 = np.random.choice(group2, size=len(group2), replace=True)
-
-        d_bootstrap.append(cohens_d(sample1, sample2))
-
-    alpha = 1 - confidence
-    lower = np.percentile(d_bootstrap, alpha/2 * 100)
-    upper = np.percentile(d_bootstrap, (1 - alpha/2) * 100)
-
-    return lower, upper
+    if cluster1 is not None and cluster2 is not None:
+        values = np.concatenate([np.asarray(group1, dtype=float), np.asarray(group2, dtype=float)])
+        condition = np.repeat([1, 2], [len(group1), len(group2)])
+        boot = ClusterBootstrap(values, condition, np.concatenate([np.asarray(cluster1), np.asarray(cluster2)]),
+                                conditions=(1, 2), statistic='cohens_d', n_boot=n_bootstrap, seed=seed)
+        return boot.ci(method, confidence)
+    boot = TwoSampleBootstrap(group1, group2, statistic='cohens_d', n_boot=n_bootstrap, seed=seed)
+    return boot.ci(method, confidence)
 
 def analyze_region_effects(data_path):
     """
@@ -119,7 +128,7 @@ def analyze_region_effects(data_path):
 
         # 효과 크기
         d = cohens_d(hate_rt, neutral_rt)
-        ci_lower, ci_upper = cohens_d_ci(hate_rt, neutral_rt)
+        ci_lower, ci_upper = cohens_d_ci(hate_rt, neutral_rt, seed=42)
 
         # t-test
         t_stat, p_val = stats.ttest_ind(hate_rt, neutral_rt)
@@ -12,6 +12,18 @@ from scipy import stats
 from statsmodels.formula.api import mixedlm
 import warnings
 import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.data_cache import open_workbook, SPR_ANALYSIS_COLUMNS
+from common.spr_regions import explode_sentence_structure
+from common.factors import cell_summary
+from common.exclusion_mask import init_mask, flag, keep_mask, report_exclusions
+from common.residual_rt import add_residual_rt
+from common.crossed_lmm import fit_crossed_lmm
+from common.permutation import WithinPermutationTest
+from common.participant_effects import h3_effects
+
 warnings.filterwarnings('ignore')
 
 # 폰트 설정
@@ -29,26 +41,26 @@ def ensure_output_dir():
     print(f"출력 디렉토리: {OUTPUT_DIR}")
 
 def load_data():
-    """데이터 로드"""
+    """데이터 로드 (시트는 처음 접근할 때 읽음, 시트별 Parquet 캐시 사용)"""
     excel_path = f'{OUTPUT_DIR}/ExpLing_Project.xlsx'
-    xl = pd.ExcelFile(excel_path)
-    data = {}
-    for sheet in xl.sheet_names:
-        data[sheet] = pd.read_excel(excel_path, sheet_name=sheet)
+    data = open_workbook(excel_path,
+                         sheets=['SPR_Data', 'Rating_Data', 'Manipulation_Check', 'Recall_Data'],
+                         columns={'SPR_Data': SPR_ANALYSIS_COLUMNS})
     print(f"\n데이터 로드 완료: {list(data.keys())}")
     return data
 
 def remove_practice_trials(df):
-    """연습 문장 제거"""
-    before = len(df)
-    df_clean = df[~df['Sentence_Text'].str.contains('연습', na=False)].copy()
-    after = len(df_clean)
+    """연습 문장 제외 (행은 유지하고 'practice' 비트만 기록)"""
+    before = int(keep_mask(df).sum())
+    flag(df, 'practice', df['Sentence_Text'].str.contains('연습', na=False))
+    after = int(keep_mask(df).sum())
     print(f"연습 문장 제거: {before}개 → {after}개 ({before-after}개 제거)")
-    return df_clean
+    return df
 
 def identify_outlier_trials(df, method='iqr', k=2.5):
-    """Trial-level outlier 식별 (IQR method)"""
-    total_rts = df['Total_Reading_Time_ms'].values
+    """Trial-level outlier 식별 (IQR method, 앞 단계에서 남은 trial 기준, 'trial_iqr' 비트 기록)"""
+    remaining = df[keep_mask(df)]
+    total_rts = remaining['Total_Reading_Time_ms'].values
 
     Q1 = np.percentile(total_rts, 25)
     Q3 = np.percentile(total_rts, 75)
@@ -56,63 +68,29 @@ def identify_outlier_trials(df, method='iqr', k=2.5):
     lower_bound = Q1 - k * IQR
     upper_bound = Q3 + k * IQR
 
-    outliers = (total_rts < lower_bound) | (total_rts > upper_bound)
+    outliers = (remaining['Total_Reading_Time_ms'] < lower_bound) | (remaining['Total_Reading_Time_ms'] > upper_bound)
+    flag(df, 'trial_iqr', outliers)
 
     print(f"\n=== Trial-level Outlier 제거 (IQR, k={k}) ===")
     print(f"하한: {lower_bound:.0f} ms, 상한: {upper_bound:.0f} ms")
-    print(f"제거: {outliers.sum()}개 / {len(df)}개 ({outliers.sum()/len(df)*100:.1f}%)")
+    print(f"제거: {outliers.sum()}개 / {len(remaining)}개 ({outliers.sum()/len(remaining)*100:.1f}%)")
 
-    return df[~outliers].copy()
+    return df
 
 def parse_sentence_structure(df):
-    """문장 구조 파싱: Subject - Modifier - Spillover - Fact(avg)"""
-    parsed_rows = []
-
-    for idx, row in df.iterrows():
-        if row['Is_Filler'] == 1:
-            continue
+    """문장 구조 파싱: Subject - Modifier - Spillover - Fact(avg) (common.spr_regions 벡터화 엔진)"""
+    return explode_sentence_structure(df)
 
-        regions = eval(row['Regions'])
-        rts = eval(row['Region_RTs'])
-
-        base_info = {
-            'Participant_ID': row['Participant_ID'],
-            'List_ID': row['List_ID'],
-            'Trial_Index': row['Trial_Index'],
-            'Item_ID': row['Item_ID'],
-            'Base': row['Base'],
-            'Emotion': row['Emotion'],
-            'Plausibility': row['Plausibility'],
-            'Version': row['Version']
-        }
-
-        if len(regions) >= 4:
-            # Subject
-            parsed_rows.append({**base_info, 'Region_Type': 'Subject',
-                               'Region_Text': regions[0], 'RT': rts[0]})
-            # Modifier
-            parsed_rows.append({**base_info, 'Region_Type': 'Modifier',
-                               'Region_Text': regions[1], 'RT': rts[1]})
-            # Spillover
-            parsed_rows.append({**base_info, 'Region_Type': 'Spillover',
-                               'Region_Text': regions[2], 'RT': rts[2]})
-            # Fact (평균)
-            fact_rts = [rt for rt in rts[3:] if 200 <= rt <= 3000]
-            if len(fact_rts) > 0:
-                parsed_rows.append({**base_info, 'Region_Type': 'Fact',
-                                   'Region_Text': ' '.join(regions[3:]),
-                                   'RT': np.mean(fact_rts)})
-
-    return pd.DataFrame(parsed_rows)
 
 def remove_word_outliers(df, lower=200, upper=3000):
-    """Word-level outlier 제거"""
-    before = len(df)
-    df_clean = df[(df['RT'] >= lower) & (df['RT'] <= upper)].copy()
-    after = len(df_clean)
-    removed = before - after
+    """Word-level outlier 제외 ('word_range' 비트 기록)"""
+    remaining = keep_mask(df)
+    out_of_range = ~((df['RT'] >= lower) & (df['RT'] <= upper))
+    before = int(remaining.sum())
+    removed = int((out_of_range & remaining).sum())
+    flag(df, 'word_range', out_of_range)
     print(f"Word-level outlier 제거 ({lower}-{upper}ms): {removed}개 / {before}개 ({removed/before*100:.1f}%)")
-    return df_clean
+    return df
 
 def analyze_h1(parsed_df):
     """H1: 주의 포착 - 수식어 영역 RT 분석"""
@@ -140,6 +118,14 @@ def analyze_h1(parsed_df):
     print(f"평균 차이: {diff:.1f} ms (Hate > Neutral)")
     print(f"Cohen's d: {cohens_d:.3f}")
 
+    # 길이 보정 RT (수식어 음절 수 차이 통제)
+    if 'Residual_RT' in modifier_df.columns:
+        h_res = modifier_df[modifier_df['Emotion'] == 'H'].groupby('Participant_ID')['Residual_RT'].mean()
+        n_res = modifier_df[modifier_df['Emotion'] == 'N'].groupby('Participant_ID')['Residual_RT'].mean()
+        t_res, p_res = stats.ttest_rel(h_res, n_res)
+        print(f"\n길이 보정 RT (Residual_RT): H {h_res.mean():.1f} ms, N {n_res.mean():.1f} ms, "
+              f"t({len(h_res)-1}) = {t_res:.3f}, p = {p_res:.3f}")
+
     # Mixed model
     try:
         model = mixedlm("RT ~ Emotion", modifier_df, groups=modifier_df["Participant_ID"])
@@ -149,6 +135,15 @@ def analyze_h1(parsed_df):
     except:
         print("\nMixed model fitting failed")
 
+    # 참가자 × 아이템 교차 무선효과 (random intercept 2개)
+    try:
+        crossed = fit_crossed_lmm("RT ~ Emotion", modifier_df, groups=('Participant_ID', 'Item_ID'), reml=False)
+        print("\n=== Crossed Random Effects (Participant × Item) ===")
+        print(crossed.summary_table())
+        print(crossed.variance_components.round(1).to_string(index=False))
+    except Exception:
+        print("\nCrossed model fitting failed")
+
     # 시각화
     fig, axes = plt.subplots(1, 2, figsize=(12, 5))
 
@@ -190,11 +185,15 @@ def analyze_h2(parsed_df):
     critical_df = parsed_df[parsed_df['Region_Type'].isin(['Spillover', 'Fact'])].copy()
 
     # 조건별 평균
-    summary = critical_df.groupby(['Emotion', 'Plausibility'])['RT'].agg(
-        ['mean', 'std', 'count']).round(1)
+    summary = cell_summary(critical_df, 'RT', ['Emotion', 'Plausibility'], ['mean', 'std', 'count']).round(1)
     print("\n조건별 Critical Region RT:")
     print(summary)
 
+    if 'Residual_RT' in critical_df.columns:
+        residual = cell_summary(critical_df, 'Residual_RT', ['Emotion', 'Plausibility'], ['mean', 'std']).round(1)
+        print("\n조건별 Critical Region 길이 보정 RT (Residual_RT):")
+        print(residual)
+
     # Mixed model
     try:
         model = mixedlm("RT ~ Emotion * Plausibility", critical_df,
@@ -205,6 +204,21 @@ def analyze_h2(parsed_df):
     except:
         print("\nMixed model fitting failed")
 
+    # 참가자 × 아이템 교차 무선효과 (random intercept 2개)
+    try:
+        crossed = fit_crossed_lmm("RT ~ Emotion * Plausibility", critical_df, groups=('Participant_ID', 'Item_ID'), reml=False)
+        print("\n=== Crossed Random Effects (Participant × Item) ===")
+        print(crossed.summary_table())
+        print(crossed.variance_components.round(1).to_string(index=False))
+    except Exception:
+        print("\nCrossed model fitting failed")
+
+    # 참가자 × Base (Latin square 블록) 안에서 조건 라벨 순열 → 소표본 근사 없는 p값
+    perm = WithinPermutationTest(critical_df, 'RT', strata=['Participant_ID', 'Base'],
+                                 unit='Trial_Index', n_perm=20000, seed=42)
+    print(f"\n=== 참가자 내 순열 검정 (순열 {perm.n_perm}회, 참가자 {perm.n_clusters}명) ===")
+    print(perm.table().round(4).to_string(index=False))
+
     # 시각화
     fig, axes = plt.subplots(1, 3, figsize=(18, 5))
 
@@ -260,8 +274,7 @@ def analyze_h3(rating_data):
     rating_clean = rating_data[rating_data['Rating'].notna()].copy()
 
     # 조건별 요약
-    summary = rating_clean.groupby(['Emotion', 'Plausibility'])['Rating'].agg(
-        ['mean', 'std', 'count']).round(3)
+    summary = cell_summary(rating_clean, 'Rating', ['Emotion', 'Plausibility'], ['mean', 'std', 'count']).round(3)
     print("\n조건별 Rating:")
     print(summary)
 
@@ -343,32 +356,8 @@ def analyze_h3_h4_integration(rating_data, recall_data):
     # H3: 참가자별 기억 왜곡
     rating_clean = rating_data[rating_data['Rating'].notna()].copy()
 
-    participant_h3 = []
-    for pid in rating_clean['Participant_ID'].unique():
-        p_data = rating_clean[rating_clean['Participant_ID'] == pid]
-
-        h_data = p_data[p_data['Emotion'] == 'H']
-        h_p = h_data[h_data['Plausibility'] == 'P']['Rating'].mean()
-        h_i = h_data[h_data['Plausibility'] == 'I']['Rating'].mean()
-        hate_plaus_effect = h_p - h_i
-
-        n_data = p_data[p_data['Emotion'] == 'N']
-        n_p = n_data[n_data['Plausibility'] == 'P']['Rating'].mean()
-        n_i = n_data[n_data['Plausibility'] == 'I']['Rating'].mean()
-        neutral_plaus_effect = n_p - n_i
-
-        distortion = hate_plaus_effect - neutral_plaus_effect
-        hate_bias = h_data['Rating'].mean() - n_data['Rating'].mean()
-
-        participant_h3.append({
-            'Participant_ID': pid,
-            'Hate_Plaus_Effect': hate_plaus_effect,
-            'Neutral_Plaus_Effect': neutral_plaus_effect,
-            'Distortion': distortion,
-            'Hate_Bias': hate_bias
-        })
-
-    h3_df = pd.DataFrame(participant_h3)
+    h3_df = h3_effects(rating_clean)[['Participant_ID', 'Hate_Plaus_Effect', 'Neutral_Plaus_Effect',
+                                      'Distortion', 'Hate_Bias']]
 
     # H4: 참가자별 회상 패턴
     background_facts = ['중앙아시아', '협곡', '산악', '반지하', '흙', '돌',
@@ -540,12 +529,24 @@ def main():
     print("SPR 데이터 전처리")
     print("="*80)
 
-    spr_clean = remove_practice_trials(spr_data)
-    spr_clean = identify_outlier_trials(spr_clean)
+    # 제외 규칙은 Exclusion 비트마스크에만 기록 (행 삭제 없음)
+    spr_flagged = init_mask(spr_data)
+    remove_practice_trials(spr_flagged)
+    identify_outlier_trials(spr_flagged)
+
+    # 3. 문장 구조 파싱 (trial 비트는 region 행으로 전달)
+    parsed_all = parse_sentence_structure(spr_flagged)
+    remove_word_outliers(parsed_all)
+
+    # 규칙 × 참가자 × 조건별 제외 개수
+    audit = report_exclusions(parsed_all, by=['Participant_ID', 'Emotion'])
+    audit.to_csv(f'{OUTPUT_DIR}/exclusion_audit.csv')
+
+    # 모든 규칙 적용 (다른 조합: keep_mask(parsed_all, exclude=['practice', 'word_range']) 등)
+    parsed_df = parsed_all[keep_mask(parsed_all)].reset_index(drop=True)
 
-    # 3. 문장 구조 파싱
-    parsed_df = parse_sentence_structure(spr_clean)
-    parsed_df = remove_word_outliers(parsed_df)
+    # 길이 보정 RT (참가자별 RT ~ 음절 수 잔차)
+    parsed_df = add_residual_rt(parsed_df)
 
     print(f"\n파싱된 데이터: {len(parsed_df)}개 관찰치")
 
@@ -564,6 +565,7 @@ def main():
     print(f"  - {OUTPUT_DIR}/Figure_H3_MemoryBias.png")
     print(f"  - {OUTPUT_DIR}/Figure_H3_H4_Integration.png")
     print(f"  - {OUTPUT_DIR}/h3_h4_integrated.csv")
+    print(f"  - {OUTPUT_DIR}/exclusion_audit.csv")
 
 if __name__ == "__main__":
     main()
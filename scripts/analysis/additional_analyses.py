@@ -6,11 +6,19 @@
 """
 
 import pandas as pd
-import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
 from scipy import stats
 import warnings
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.spr_regions import parse_regions, explode_sentence_structure
+from common.factors import cell_summary
+from common.cluster_permutation import ClusterPermutationTest, participant_region_means
+from common.participant_effects import h1_effects
+
 warnings.filterwarnings('ignore')
 
 plt.rcParams['font.family'] = 'DejaVu Sans'
@@ -30,22 +38,11 @@ def analyze_h4_correlations():
     spr = spr[~spr['Sentence_Text'].str.contains('연습', na=False)]
 
     # Calculate per-participant hate modifier RT
-    hate_modifier_rt = []
-
-    for idx, row in spr.iterrows():
-        if row['Is_Filler'] == 1 or row['Emotion'] != 'H':
-            continue
-
-        regions = eval(row['Regions'])
-        rts = eval(row['Region_RTs'])
-
-        if len(regions) >= 2:
-            hate_modifier_rt.append({
-                'Participant_ID': row['Participant_ID'],
-                'Modifier_RT': rts[1]  # Second position
-            })
-
-    hate_rt_df = pd.DataFrame(hate_modifier_rt)
+    hate_trials = spr[(spr['Is_Filler'] != 1) & (spr['Emotion'] == 'H')]
+    hate_rt_df = pd.DataFrame({
+        'Participant_ID': hate_trials['Participant_ID'].to_numpy(),
+        'Modifier_RT': parse_regions(hate_trials).value_at(1)  # Second position
+    }).dropna(subset=['Modifier_RT'])
     hate_rt_summary = hate_rt_df.groupby('Participant_ID')['Modifier_RT'].mean().reset_index()
 
     # Recall patterns
@@ -93,6 +90,15 @@ def analyze_h4_correlations():
 
     return merged
 
+def print_plausibility_effects(tests, region):
+    """감정별 그럴듯함 효과 (I - P): paired t + 군집 순열 보정 p값"""
+    for emotion, test in tests.items():
+        row = test.region_table().set_index('Region').loc[region]
+        if row['n'] > 0:
+            corrected = (f"군집 보정 p={row['p_cluster']:.3f}" if row['cluster'] > 0
+                         else "유의 군집 없음")
+            print(f"  {emotion}: {row['Difference']:.1f}ms (t={row['t']:.2f}, p={row['p']:.3f}, {corrected})")
+
 def analyze_h2_regions_separate():
     """H2: Spillover vs Fact 영역 분리 분석"""
     print("\n\n" + "="*80)
@@ -110,74 +116,44 @@ def analyze_h2_regions_separate():
     spr = spr[spr['Total_Reading_Time_ms'] <= upper]
 
     # Parse separately
-    spillover_data = []
-    fact_data = []
-
-    for idx, row in spr.iterrows():
-        if row['Is_Filler'] == 1:
-            continue
-
-        regions = eval(row['Regions'])
-        rts = eval(row['Region_RTs'])
-
-        if len(regions) >= 4:
-            # Spillover (position 2)
-            if 200 <= rts[2] <= 3000:
-                spillover_data.append({
-                    'Participant_ID': row['Participant_ID'],
-                    'Emotion': row['Emotion'],
-                    'Plausibility': row['Plausibility'],
-                    'RT': rts[2],
-                    'Region': 'Spillover'
-                })
-
-            # Fact (average of rest)
-            fact_rts = [rt for rt in rts[3:] if 200 <= rt <= 3000]
-            if fact_rts:
-                fact_data.append({
-                    'Participant_ID': row['Participant_ID'],
-                    'Emotion': row['Emotion'],
-                    'Plausibility': row['Plausibility'],
-                    'RT': np.mean(fact_rts),
-                    'Region': 'Fact'
-                })
-
-    spillover_df = pd.DataFrame(spillover_data)
-    fact_df = pd.DataFrame(fact_data)
+    parsed = explode_sentence_structure(spr)
+    columns = ['Participant_ID', 'Emotion', 'Plausibility', 'RT']
+
+    # Spillover (position 2)
+    spillover = parsed[(parsed['Region_Type'] == 'Spillover') &
+                       (parsed['RT'] >= 200) & (parsed['RT'] <= 3000)]
+    spillover_df = spillover[columns].assign(Region='Spillover').reset_index(drop=True)
+
+    # Fact (average of rest, 200-3000ms)
+    fact = parsed[parsed['Region_Type'] == 'Fact']
+    fact_df = fact[columns].assign(Region='Fact').reset_index(drop=True)
+
+    # Spillover → Fact (인접 region): 감정별 그럴듯함 효과 (I - P)를 region 전체 paired t로 계산하고
+    # 인접 유의 region 군집 순열 검정으로 region 간 family-wise 보정
+    regions = pd.concat([spillover_df, fact_df], ignore_index=True)
+    regions['Region'] = pd.Categorical(regions['Region'], ['Spillover', 'Fact'], ordered=True)
+    plaus_tests = {}
+    for emotion in ['H', 'N']:
+        e_data = regions[regions['Emotion'] == emotion]
+        means = {plaus: participant_region_means(e_data[e_data['Plausibility'] == plaus], region='Region')
+                 for plaus in ['I', 'P']}
+        plaus_tests[emotion] = ClusterPermutationTest(means['I'], means['P'], n_perm=10000, seed=42)
 
     print("\n=== Spillover 영역 ===")
     print("\nEmotion × Plausibility:")
-    spill_summary = spillover_df.groupby(['Emotion', 'Plausibility'])['RT'].agg(['mean', 'std', 'count'])
+    spill_summary = cell_summary(spillover_df, 'RT', ['Emotion', 'Plausibility'], ['mean', 'std', 'count'])
     print(spill_summary)
 
     print("\n그럴듯함 효과:")
-    for emotion in ['H', 'N']:
-        e_data = spillover_df[spillover_df['Emotion'] == emotion]
-        p_rt = e_data[e_data['Plausibility'] == 'P'].groupby('Participant_ID')['RT'].mean()
-        i_rt = e_data[e_data['Plausibility'] == 'I'].groupby('Participant_ID')['RT'].mean()
-
-        common = p_rt.index.intersection(i_rt.index)
-        if len(common) > 0:
-            effect = i_rt.loc[common].mean() - p_rt.loc[common].mean()
-            t_stat, p_val = stats.ttest_rel(i_rt.loc[common], p_rt.loc[common])
-            print(f"  {emotion}: {effect:.1f}ms (t={t_stat:.2f}, p={p_val:.3f})")
+    print_plausibility_effects(plaus_tests, 'Spillover')
 
     print("\n\n=== Fact 영역 ===")
     print("\nEmotion × Plausibility:")
-    fact_summary = fact_df.groupby(['Emotion', 'Plausibility'])['RT'].agg(['mean', 'std', 'count'])
+    fact_summary = cell_summary(fact_df, 'RT', ['Emotion', 'Plausibility'], ['mean', 'std', 'count'])
     print(fact_summary)
 
     print("\n그럴듯함 효과:")
-    for emotion in ['H', 'N']:
-        e_data = fact_df[fact_df['Emotion'] == emotion]
-        p_rt = e_data[e_data['Plausibility'] == 'P'].groupby('Participant_ID')['RT'].mean()
-        i_rt = e_data[e_data['Plausibility'] == 'I'].groupby('Participant_ID')['RT'].mean()
-
-        common = p_rt.index.intersection(i_rt.index)
-        if len(common) > 0:
-            effect = i_rt.loc[common].mean() - p_rt.loc[common].mean()
-            t_stat, p_val = stats.ttest_rel(i_rt.loc[common], p_rt.loc[common])
-            print(f"  {emotion}: {effect:.1f}ms (t={t_stat:.2f}, p={p_val:.3f})")
+    print_plausibility_effects(plaus_tests, 'Fact')
 
     return spillover_df, fact_df
 
@@ -197,47 +173,16 @@ def analyze_individual_differences():
     spr = spr[spr['Total_Reading_Time_ms'] <= upper]
 
     # Extract modifier RTs
-    modifier_data = []
-    for idx, row in spr.iterrows():
-        if row['Is_Filler'] == 1:
-            continue
-
-        regions = eval(row['Regions'])
-        rts = eval(row['Region_RTs'])
-
-        if len(regions) >= 2 and 200 <= rts[1] <= 3000:
-            modifier_data.append({
-                'Participant_ID': row['Participant_ID'],
-                'Emotion': row['Emotion'],
-                'RT': rts[1]
-            })
-
-    mod_df = pd.DataFrame(modifier_data)
-
-    # By participant
-    participant_effects = []
-
-    for pid in mod_df['Participant_ID'].unique():
-        p_data = mod_df[mod_df['Participant_ID'] == pid]
-
-        h_rt = p_data[p_data['Emotion'] == 'H']['RT'].mean()
-        n_rt = p_data[p_data['Emotion'] == 'N']['RT'].mean()
-
-        h_std = p_data[p_data['Emotion'] == 'H']['RT'].std()
-
-        diff = h_rt - n_rt
-        cohens_d = diff / h_std if h_std > 0 else 0
-
-        participant_effects.append({
-            'Participant_ID': pid,
-            'Hate_RT': h_rt,
-            'Neutral_RT': n_rt,
-            'Difference': diff,
-            'Cohens_d': cohens_d,
-            'Direction': 'H>N' if diff > 0 else 'N>H'
-        })
-
-    effects_df = pd.DataFrame(participant_effects).sort_values('Difference', ascending=False)
+    trials = spr[spr['Is_Filler'] != 1]
+    mod_df = pd.DataFrame({
+        'Participant_ID': trials['Participant_ID'].to_numpy(),
+        'Emotion': trials['Emotion'].to_numpy(),
+        'RT': parse_regions(trials).value_at(1)
+    })
+    mod_df = mod_df[(mod_df['RT'] >= 200) & (mod_df['RT'] <= 3000)]
+
+    # By participant (참가자 × 조건 셀 pivot 한 번)
+    effects_df = h1_effects(mod_df).sort_values('Difference', ascending=False)
 
     print("\n참가자별 H1 효과 (혐오 - 중립):")
     print(effects_df.to_string(index=False))
@@ -12,6 +12,15 @@ from scipy import stats
 from statsmodels.formula.api import mixedlm
 import warnings
 import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.data_cache import open_workbook, SPR_ANALYSIS_COLUMNS
+from common.spr_regions import explode_sentence_structure
+from common.factors import cell_summary
+from common.exclusion_sweep import exclusion_sweep
+from common.participant_effects import h3_effects
+
 warnings.filterwarnings('ignore')
 
 # 폰트 설정
@@ -29,12 +38,11 @@ def ensure_output_dir():
     print(f"출력 디렉토리: {OUTPUT_DIR}")
 
 def load_data():
-    """데이터 로드"""
+    """데이터 로드 (시트는 처음 접근할 때 읽음, 시트별 Parquet 캐시 사용)"""
     excel_path = f'{OUTPUT_DIR}/ExpLing_Project.xlsx'
-    xl = pd.ExcelFile(excel_path)
-    data = {}
-    for sheet in xl.sheet_names:
-        data[sheet] = pd.read_excel(excel_path, sheet_name=sheet)
+    data = open_workbook(excel_path,
+                         sheets=['SPR_Data', 'Rating_Data', 'Manipulation_Check', 'Recall_Data'],
+                         columns={'SPR_Data': SPR_ANALYSIS_COLUMNS})
     print(f"\n데이터 로드 완료: {list(data.keys())}")
     return data
 
@@ -65,45 +73,9 @@ def identify_outlier_trials(df, method='iqr', k=2.5):
     return df[~outliers].copy()
 
 def parse_sentence_structure(df):
-    """문장 구조 파싱: Subject - Modifier - Spillover - Fact(avg)"""
-    parsed_rows = []
-
-    for idx, row in df.iterrows():
-        if row['Is_Filler'] == 1:
-            continue
+    """문장 구조 파싱: Subject - Modifier - Spillover - Fact(avg) (common.spr_regions 벡터화 엔진)"""
+    return explode_sentence_structure(df)
 
-        regions = eval(row['Regions'])
-        rts = eval(row['Region_RTs'])
-
-        base_info = {
-            'Participant_ID': row['Participant_ID'],
-            'List_ID': row['List_ID'],
-            'Trial_Index': row['Trial_Index'],
-            'Item_ID': row['Item_ID'],
-            'Base': row['Base'],
-            'Emotion': row['Emotion'],
-            'Plausibility': row['Plausibility'],
-            'Version': row['Version']
-        }
-
-        if len(regions) >= 4:
-            # Subject
-            parsed_rows.append({**base_info, 'Region_Type': 'Subject',
-                               'Region_Text': regions[0], 'RT': rts[0]})
-            # Modifier
-            parsed_rows.append({**base_info, 'Region_Type': 'Modifier',
-                               'Region_Text': regions[1], 'RT': rts[1]})
-            # Spillover
-            parsed_rows.append({**base_info, 'Region_Type': 'Spillover',
-                               'Region_Text': regions[2], 'RT': rts[2]})
-            # Fact (평균)
-            fact_rts = [rt for rt in rts[3:] if 200 <= rt <= 3000]
-            if len(fact_rts) > 0:
-                parsed_rows.append({**base_info, 'Region_Type': 'Fact',
-                                   'Region_Text': ' '.join(regions[3:]),
-                                   'RT': np.mean(fact_rts)})
-
-    return pd.DataFrame(parsed_rows)
 
 def remove_word_outliers(df, lower=200, upper=3000):
     """Word-level outlier 제거"""
@@ -201,66 +173,54 @@ def analyze_outlier_exclusion(parsed_df):
         'Stricter (200-1600ms)': (200, 1600)
     }
 
+    # 모든 기준을 한 번에 계산 (RT 정렬 + 누적합)
+    sweep = exclusion_sweep(modifier_df['RT'], modifier_df['Emotion'],
+                            [lo for lo, _ in criteria.values()], [hi for _, hi in criteria.values()],
+                            participant=modifier_df['Participant_ID'])
+
     results = []
 
     print("\n" + "="*80)
     print("기준별 비교")
     print("="*80)
 
-    for criterion_name, (lower, upper) in criteria.items():
+    for (criterion_name, (lower, upper)), row in zip(criteria.items(), sweep.itertuples()):
         print(f"\n{criterion_name}:")
         print(f"  하한: {lower}ms, 상한: {upper}ms")
 
-        # 제거 적용
-        mask = (modifier_df['RT'] >= lower) & (modifier_df['RT'] <= upper)
-        df_filtered = modifier_df[mask].copy()
-
-        n_excluded = len(modifier_df) - len(df_filtered)
-        pct_excluded = 100 * n_excluded / len(modifier_df)
-
-        print(f"  제거: {n_excluded} trials ({pct_excluded:.1f}%)")
-        print(f"  유지: {len(df_filtered)} trials")
-
-        # 정서별 통계
-        hate_rts = df_filtered[df_filtered['Emotion'] == 'H']['RT']
-        neutral_rts = df_filtered[df_filtered['Emotion'] == 'N']['RT']
+        print(f"  제거: {row.N_excluded} trials ({row.Pct_excluded:.1f}%)")
+        print(f"  유지: {row.N_retained} trials")
 
-        mean_hate = hate_rts.mean()
-        mean_neutral = neutral_rts.mean()
-        diff = mean_hate - mean_neutral
-
-        # Paired t-test (참가자별 평균)
-        h_by_subj = df_filtered[df_filtered['Emotion'] == 'H'].groupby('Participant_ID')['RT'].mean()
-        n_by_subj = df_filtered[df_filtered['Emotion'] == 'N'].groupby('Participant_ID')['RT'].mean()
-
-        t_stat, p_value = stats.ttest_rel(h_by_subj, n_by_subj)
-
-        # Cohen's d (within-subjects)
-        diff_scores = h_by_subj - n_by_subj
-        cohens_d = diff_scores.mean() / diff_scores.std()
-
-        print(f"  평균 Hate RT: {mean_hate:.2f}ms")
-        print(f"  평균 Neutral RT: {mean_neutral:.2f}ms")
-        print(f"  차이: {diff:.2f}ms")
-        print(f"  Paired t({len(h_by_subj)-1}) = {t_stat:.4f}, p = {p_value:.4f}")
-        print(f"  Cohen's d: {cohens_d:.4f}")
+        # 정서별 통계 + Paired t-test (참가자별 평균), Cohen's d (within-subjects)
+        print(f"  평균 Hate RT: {row.Mean_H:.2f}ms")
+        print(f"  평균 Neutral RT: {row.Mean_N:.2f}ms")
+        print(f"  차이: {row.Difference:.2f}ms")
+        print(f"  Paired t({row.N_participants-1}) = {row.t_paired:.4f}, p = {row.p_paired:.4f}")
+        print(f"  Cohen's d: {row.d_z:.4f}")
 
         results.append({
             'Criterion': criterion_name,
             'Lower_bound': lower,
             'Upper_bound': upper,
-            'N_excluded': n_excluded,
-            'Pct_excluded': pct_excluded,
-            'N_retained': len(df_filtered),
-            'Mean_Hate': mean_hate,
-            'Mean_Neutral': mean_neutral,
-            'Difference': diff,
-            't_stat': t_stat,
-            'p_value': p_value,
-            'cohens_d': cohens_d,
-            'N_participants': len(h_by_subj)
+            'N_excluded': row.N_excluded,
+            'Pct_excluded': row.Pct_excluded,
+            'N_retained': row.N_retained,
+            'Mean_Hate': row.Mean_H,
+            'Mean_Neutral': row.Mean_N,
+            'Difference': row.Difference,
+            't_stat': row.t_paired,
+            'p_value': row.p_paired,
+            'cohens_d': row.d_z,
+            'N_participants': row.N_participants
         })
 
+    # 상한 민감도 곡선 (하한 200ms, 상한 1000-3000ms)
+    uppers = np.arange(1000, 3001, 50)
+    sensitivity = exclusion_sweep(modifier_df['RT'], modifier_df['Emotion'], 200, uppers,
+                                  participant=modifier_df['Participant_ID'])
+    sensitivity.to_csv(f'{OUTPUT_DIR}/outlier_threshold_sweep.csv', index=False)
+    print(f"\n상한 민감도 ({len(uppers)}개 기준) 저장: {OUTPUT_DIR}/outlier_threshold_sweep.csv")
+
     # 결과 저장
     results_df = pd.DataFrame(results)
     results_df.to_csv(f'{OUTPUT_DIR}/outlier_criteria_comparison.csv', index=False)
@@ -332,14 +292,9 @@ def analyze_outlier_exclusion(parsed_df):
     hate_means = [r['Mean_Hate'] for r in results]
     neutral_means = [r['Mean_Neutral'] for r in results]
 
-    # Calculate SEM
-    hate_sems = []
-    neutral_sems = []
-    for criterion_name, (lower, upper) in criteria.items():
-        mask = (modifier_df['RT'] >= lower) & (modifier_df['RT'] <= upper)
-        df_filtered = modifier_df[mask]
-        hate_sems.append(df_filtered[df_filtered['Emotion'] == 'H'].groupby('Participant_ID')['RT'].mean().sem())
-        neutral_sems.append(df_filtered[df_filtered['Emotion'] == 'N'].groupby('Participant_ID')['RT'].mean().sem())
+    # SEM (참가자 평균 기준)
+    hate_sems = (sweep['PSD_H'] / np.sqrt(sweep['N_participants'])).tolist()
+    neutral_sems = (sweep['PSD_N'] / np.sqrt(sweep['N_participants'])).tolist()
 
     ax4.bar(x_pos - width/2, hate_means, width, yerr=hate_sems,
             label='Hate', color='lightcoral', capsize=5, edgecolor='black')
@@ -491,8 +446,7 @@ def analyze_h2(parsed_df):
     critical_df = parsed_df[parsed_df['Region_Type'].isin(['Spillover', 'Fact'])].copy()
 
     # 조건별 평균
-    summary = critical_df.groupby(['Emotion', 'Plausibility'])['RT'].agg(
-        ['mean', 'std', 'count']).round(1)
+    summary = cell_summary(critical_df, 'RT', ['Emotion', 'Plausibility'], ['mean', 'std', 'count']).round(1)
     print("\n조건별 Critical Region RT:")
     print(summary)
 
@@ -561,8 +515,7 @@ def analyze_h3(rating_data):
     rating_clean = rating_data[rating_data['Rating'].notna()].copy()
 
     # 조건별 요약
-    summary = rating_clean.groupby(['Emotion', 'Plausibility'])['Rating'].agg(
-        ['mean', 'std', 'count']).round(3)
+    summary = cell_summary(rating_clean, 'Rating', ['Emotion', 'Plausibility'], ['mean', 'std', 'count']).round(3)
     print("\n조건별 Rating:")
     print(summary)
 
@@ -644,32 +597,8 @@ def analyze_h3_h4_integration(rating_data, recall_data):
     # H3: 참가자별 기억 왜곡
     rating_clean = rating_data[rating_data['Rating'].notna()].copy()
 
-    participant_h3 = []
-    for pid in rating_clean['Participant_ID'].unique():
-        p_data = rating_clean[rating_clean['Participant_ID'] == pid]
-
-        h_data = p_data[p_data['Emotion'] == 'H']
-        h_p = h_data[h_data['Plausibility'] == 'P']['Rating'].mean()
-        h_i = h_data[h_data['Plausibility'] == 'I']['Rating'].mean()
-        hate_plaus_effect = h_p - h_i
-
-        n_data = p_data[p_data['Emotion'] == 'N']
-        n_p = n_data[n_data['Plausibility'] == 'P']['Rating'].mean()
-        n_i = n_data[n_data['Plausibility'] == 'I']['Rating'].mean()
-        neutral_plaus_effect = n_p - n_i
-
-        distortion = hate_plaus_effect - neutral_plaus_effect
-        hate_bias = h_data['Rating'].mean() - n_data['Rating'].mean()
-
-        participant_h3.append({
-            'Participant_ID': pid,
-            'Hate_Plaus_Effect': hate_plaus_effect,
-            'Neutral_Plaus_Effect': neutral_plaus_effect,
-            'Distortion': distortion,
-            'Hate_Bias': hate_bias
-        })
-
-    h3_df = pd.DataFrame(participant_h3)
+    h3_df = h3_effects(rating_clean)[['Participant_ID', 'Hate_Plaus_Effect', 'Neutral_Plaus_Effect',
+                                      'Distortion', 'Hate_Bias']]
 
     # H4: 참가자별 회상 패턴
     background_facts = ['중앙아시아', '협곡', '산악', '반지하', '흙', '돌',
@@ -10,6 +10,13 @@ import seaborn as sns
 from scipy import stats
 from statsmodels.formula.api import mixedlm
 import warnings
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.region_store import RegionStore
+from common.permutation import WithinPermutationTest
+
 warnings.filterwarnings('ignore')
 
 # Set plotting style
@@ -29,52 +36,31 @@ def load_data():
 
 def parse_spr_regions(df):
     """
-    Parse SPR data to extract reading times by region.
+    Parse SPR data into a RegionStore (trial metadata once, int32 region RTs + offsets).
+    Long tables are built per analysis with region_frame(), only for the regions it needs.
+    """
+    return RegionStore.from_spr(df)
+
+def region_frame(store, regions, columns=('Participant_ID', 'Emotion', 'Plausibility')):
+    """
+    Long table of experimental (non-filler) trials for the given region positions.
     Assumes sentence structure: [modifier1] [modifier2] [noun] [spillover1] [spillover2] ...
     """
-    # Convert string representation of lists to actual lists
-    df['Regions_List'] = df['Regions'].apply(eval)
-    df['RT_List'] = df['Region_RTs'].apply(eval)
-
-    parsed_rows = []
-
-    for idx, row in df.iterrows():
-        regions = row['Regions_List']
-        rts = row['RT_List']
-
-        # Create a record for each region
-        for i, (region_text, rt) in enumerate(zip(regions, rts)):
-            parsed_row = {
-                'Participant_ID': row['Participant_ID'],
-                'List_ID': row['List_ID'],
-                'Trial_Index': row['Trial_Index'],
-                'Item_ID': row['Item_ID'],
-                'Base': row['Base'],
-                'Emotion': row['Emotion'],
-                'Plausibility': row['Plausibility'],
-                'Version': row['Version'],
-                'Is_Filler': row['Is_Filler'],
-                'Region_Index': i,
-                'Region_Text': region_text,
-                'RT': rt,
-                'Total_RT': row['Total_Reading_Time_ms']
-            }
-
-            # Classify region type based on position
-            # First 1-2 regions: modifiers, then noun, then spillover
-            if i <= 1:
-                parsed_row['Region_Type'] = 'Modifier'
-                parsed_row['Region_Position'] = f'Modifier_{i+1}'
-            elif i == 2:
-                parsed_row['Region_Type'] = 'Noun'
-                parsed_row['Region_Position'] = 'Critical_Noun'
-            else:
-                parsed_row['Region_Type'] = 'Spillover'
-                parsed_row['Region_Position'] = f'Spillover_{i-2}'
-
-            parsed_rows.append(parsed_row)
-
-    return pd.DataFrame(parsed_rows)
+    experimental = store.trials['Is_Filler'].to_numpy() == 0
+    parsed = store.to_frame(list(columns), with_text=False, regions=regions, trials=experimental)
+
+    # Classify region type based on position
+    # First 1-2 regions: modifiers, then noun, then spillover
+    index = parsed['Region_Index']
+    is_modifier = index <= 1
+    is_noun = index == 2
+    parsed['Region_Type'] = np.select([is_modifier, is_noun], ['Modifier', 'Noun'], 'Spillover')
+    parsed['Region_Position'] = np.select(
+        [is_modifier, is_noun],
+        ['Modifier_' + (index + 1).astype(str), 'Critical_Noun'],
+        'Spillover_' + (index - 2).astype(str))
+
+    return parsed
 
 def remove_outliers(df, rt_col='RT', lower_bound=200, upper_bound=3000):
     """Remove outliers based on RT thresholds"""
@@ -84,7 +70,7 @@ def remove_outliers(df, rt_col='RT', lower_bound=200, upper_bound=3000):
     print(f"Removed {before - after} outliers ({(before-after)/before*100:.1f}%) from {before} observations")
     return df_clean
 
-def test_h1_attention_capture(spr_parsed):
+def test_h1_attention_capture(spr_store):
     """
     H1: Hate-modifier sentences will show longer reading times at the hate modifier
     than at neutral modifiers (affect-driven attentional capture)
@@ -93,11 +79,8 @@ def test_h1_attention_capture(spr_parsed):
     print("H1: ATTENTION CAPTURE AT HATE MODIFIER")
     print("="*80)
 
-    # Filter to modifier regions only, excluding fillers
-    modifier_data = spr_parsed[
-        (spr_parsed['Region_Type'] == 'Modifier') &
-        (spr_parsed['Is_Filler'] == 0)
-    ].copy()
+    # Modifier regions (positions 0-1) of experimental trials only
+    modifier_data = region_frame(spr_store, regions=[0, 1])
 
     # Clean outliers
     modifier_data = remove_outliers(modifier_data)
@@ -130,7 +113,7 @@ def test_h1_attention_capture(spr_parsed):
 
     return modifier_data
 
-def test_h2_attention_narrowing(spr_parsed):
+def test_h2_attention_narrowing(spr_store):
     """
     H2: Attention narrowing & shallow integration
     - Neutral condition should show clear plausibility effect (I > P)
@@ -141,11 +124,10 @@ def test_h2_attention_narrowing(spr_parsed):
     print("H2: ATTENTION NARROWING (Reduced Plausibility Effect in Hate Condition)")
     print("="*80)
 
-    # Filter to critical noun and spillover regions
-    critical_data = spr_parsed[
-        (spr_parsed['Region_Type'].isin(['Noun', 'Spillover'])) &
-        (spr_parsed['Is_Filler'] == 0)
-    ].copy()
+    # Critical noun and spillover regions (position 2 onwards) of experimental trials
+    critical_data = region_frame(spr_store, regions=range(2, spr_store.lengths.max(initial=2)),
+                                 columns=['Participant_ID', 'Trial_Index', 'Base', 'Emotion',
+                                          'Plausibility'])
 
     critical_data = remove_outliers(critical_data)
 
@@ -166,6 +148,14 @@ def test_h2_attention_narrowing(spr_parsed):
 
         print(f"  {emotion}: {effect:.1f} ms (t={t_stat:.3f}, p={p_val:.4f})")
 
+    # Permutation test: labels shuffled within participant × base (Latin-square blocks),
+    # so p-values do not rely on large-sample approximations with few participants
+    perm = WithinPermutationTest(critical_data, 'RT', strata=['Participant_ID', 'Base'],
+                                 unit='Trial_Index', n_perm=20000, seed=42)
+    print(f"\nWithin-participant permutation test ({perm.n_perm} permutations, "
+          f"N={perm.n_clusters} participants):")
+    print(perm.table().round(4).to_string(index=False))
+
     # Test interaction: Emotion × Plausibility
     try:
         model = mixedlm("RT ~ C(Emotion) * C(Plausibility)",
@@ -251,7 +241,7 @@ def test_manipulation_check(manip_data):
 
     return manip_data
 
-def visualize_results(spr_parsed, modifier_data, critical_data, manip_data):
+def visualize_results(spr_store, modifier_data, critical_data, manip_data):
     """Create comprehensive visualizations"""
     print("\n" + "="*80)
     print("CREATING VISUALIZATIONS")
@@ -264,11 +254,8 @@ def visualize_results(spr_parsed, modifier_data, critical_data, manip_data):
     ax = axes[0, 0]
     region_order = ['Modifier_1', 'Modifier_2', 'Critical_Noun', 'Spillover_1', 'Spillover_2']
 
-    # Filter to first 5 positions for clarity
-    plot_data = spr_parsed[
-        (spr_parsed['Region_Position'].isin(region_order)) &
-        (spr_parsed['Is_Filler'] == 0)
-    ].copy()
+    # First 5 positions for clarity
+    plot_data = region_frame(spr_store, regions=range(len(region_order)), columns=['Participant_ID'])
 
     # Clean outliers
     plot_data = remove_outliers(plot_data)
@@ -397,12 +384,12 @@ def main():
 
     # Parse SPR data
     print("\nParsing SPR regions...")
-    spr_parsed = parse_spr_regions(spr_data)
-    print(f"Total region observations: {len(spr_parsed)}")
+    spr_store = parse_spr_regions(spr_data)
+    print(f"Total region observations: {spr_store.n_regions}")
 
     # Run hypothesis tests
-    modifier_data = test_h1_attention_capture(spr_parsed)
-    critical_data = test_h2_attention_narrowing(spr_parsed)
+    modifier_data = test_h1_attention_capture(spr_store)
+    critical_data = test_h2_attention_narrowing(spr_store)
     test_h3_memory_bias(rating_data)
     test_manipulation_check(manip_data)
 
@@ -410,7 +397,7 @@ def main():
     analyze_secondary_metrics(spr_data, manip_data, metadata)
 
     # Visualizations
-    visualize_results(spr_parsed, modifier_data, critical_data, manip_data)
+    visualize_results(spr_store, modifier_data, critical_data, manip_data)
 
     print("\n" + "="*80)
     print("ANALYSIS COMPLETE")
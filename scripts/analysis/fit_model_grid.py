@@ -0,0 +1,98 @@
+"""
+가설 × region 혼합효과 모형 일괄 적합 (프로세스 풀, common.model_grid)
+- Hypothesis_Check.py와 같은 전처리 (연습 문장, trial IQR k=2.5, word RT 200-3000ms) 후
+  H1 (RT ~ Emotion), H2 (RT ~ Emotion * Plausibility)를 region별 + critical region (Spillover + Fact)에,
+  길이 보정 RT (Residual_RT)에도 같은 모형, 참가자 × 아이템 교차 무선효과 H1 / H2 (common.crossed_lmm),
+  H3 (Rating ~ Emotion * Plausibility) 적합
+- 모든 모형을 CPU 수만큼의 프로세스에서 동시에 적합, 데이터는 공유 메모리로 전달
+- 결과: result_1201/model_grid.csv (모형 × 고정효과 항: 계수, SE, p, 95% CI, 수렴 여부)
+
+사용법 (저장소 루트에서):
+    python scripts/analysis/fit_model_grid.py [프로세스 수]
+"""
+
+import os
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.data_cache import open_workbook, SPR_ANALYSIS_COLUMNS
+from common.spr_regions import explode_sentence_structure, REGION_TYPES
+from common.exclusion_mask import init_mask, flag, keep_mask
+from common.trimming import trim_mask
+from common.residual_rt import add_residual_rt
+from common.model_grid import fit_model_grid, grid_specs
+
+OUTPUT_DIR = 'result_1201'
+
+RT_FORMULAS = {
+    'H1': "RT ~ Emotion",
+    'H2': "RT ~ Emotion * Plausibility",
+    'H1 (Residual_RT)': "Residual_RT ~ Emotion",
+    'H2 (Residual_RT)': "Residual_RT ~ Emotion * Plausibility",
+}
+
+
+def prepare_data():
+    """SPR region long table (제외 규칙 적용 + Residual_RT)와 Rating 데이터"""
+    data = open_workbook(f'{OUTPUT_DIR}/ExpLing_Project.xlsx',
+                         sheets=['SPR_Data', 'Rating_Data'],
+                         columns={'SPR_Data': SPR_ANALYSIS_COLUMNS})
+
+    spr = init_mask(data['SPR_Data'])
+    flag(spr, 'practice', spr['Sentence_Text'].str.contains('연습', na=False))
+    remaining = spr[keep_mask(spr)]
+    flag(spr, 'trial_iqr', ~trim_mask(remaining, 'Total_Reading_Time_ms', rule='iqr', k=2.5))
+
+    parsed = explode_sentence_structure(spr)
+    flag(parsed, 'word_range', ~parsed['RT'].between(200, 3000))
+    parsed = add_residual_rt(parsed[keep_mask(parsed)].reset_index(drop=True), report=False)
+
+    rating = data['Rating_Data']
+    return parsed, rating[rating['Rating'].notna()].reset_index(drop=True)
+
+
+def build_specs():
+    """가설 × region 모형 명세"""
+    specs = grid_specs(RT_FORMULAS, 'Region_Type', REGION_TYPES, data='spr')
+    specs += grid_specs(RT_FORMULAS, 'Region_Type', {'Spillover+Fact': ['Spillover', 'Fact']}, data='spr')
+    specs += grid_specs({'H1 (crossed)': RT_FORMULAS['H1'], 'H2 (crossed)': RT_FORMULAS['H2']},
+                        'Region_Type', REGION_TYPES, data='spr', crossed='Item_ID')
+    specs += grid_specs({'H3': "Rating ~ Emotion * Plausibility"}, data='rating')
+    return specs
+
+
+def main():
+    processes = int(sys.argv[1]) if len(sys.argv) > 1 else None
+
+    print("="*80)
+    print("가설 × region 혼합효과 모형 일괄 적합")
+    print("="*80)
+
+    parsed, rating = prepare_data()
+    specs = build_specs()
+    print(f"\nSPR region 관찰치 {len(parsed)}개, Rating 관찰치 {len(rating)}개")
+    print(f"모형 {len(specs)}개, 프로세스 {processes or os.cpu_count()}개")
+
+    start = time.perf_counter()
+    table = fit_model_grid({'spr': parsed, 'rating': rating}, specs, processes=processes)
+    print(f"적합 시간: {time.perf_counter() - start:.1f}초")
+
+    failed = table[table['error'].notna()]
+    not_converged = table.drop_duplicates('model').query('error.isna() and not converged')
+    print(f"실패 {failed['model'].nunique()}개, 수렴 경고 {len(not_converged)}개")
+
+    effects = table[table['term'].fillna('').str.contains('Emotion')]
+    with pd.option_context('display.width', 200, 'display.max_rows', 200):
+        print("\n=== Emotion 관련 고정효과 ===")
+        print(effects[['model', 'term', 'coef', 'se', 'p', 'converged']].round(3).to_string(index=False))
+
+    out_path = f'{OUTPUT_DIR}/model_grid.csv'
+    table.to_csv(out_path, index=False)
+    print(f"\n저장: {out_path}")
+
+
+if __name__ == "__main__":
+    main()
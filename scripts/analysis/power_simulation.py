@@ -0,0 +1,122 @@
+"""
+시뮬레이션 기반 검정력 분석 (common.power_sim)
+- revised_analysis.power_analysis (z 근사, r=0.5 가정) 대신
+  실제 리스트 구조 (stimuli/List1-4.csv), pilot 분산 성분 (참가자 × 아이템), trial 제외 비율 반영
+- pilot 자료: Hypothesis_Check.py와 같은 전처리 (연습 문장, trial IQR k=2.5, word RT 200-3000ms)
+  H1은 Modifier region, H2는 Spillover + Fact (trial 평균)에서 분산 성분 추정
+- 목표 효과 (ms)는 create_outlier_comparison_plots.create_example_data의 가정 효과
+  (Hate 수식어 +50ms, Hate 조건에서 그럴듯함 효과 80ms → 32ms 감소)
+- 반복마다 최대 N명 참가자 pool 1개를 만들고 작은 N은 앞쪽 참가자로 평가 (nested, 같은 난수로 곡선 비교)
+- 결과: result_1201/power_curve.csv, result_1201/Figure_Power_Curve.png
+
+사용법 (저장소 루트에서):
+    python scripts/analysis/power_simulation.py [프로세스 수]
+"""
+
+import os
+import sys
+import time
+
+import matplotlib.pyplot as plt
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.data_cache import open_workbook, SPR_ANALYSIS_COLUMNS
+from common.spr_regions import explode_sentence_structure
+from common.exclusion_mask import init_mask, flag, keep_mask
+from common.trimming import trim_mask
+from common.power_sim import (HYPOTHESES, PowerSimulation, load_list_structure,
+                              estimate_components)
+
+OUTPUT_DIR = 'result_1201'
+
+# 가설별 목표 효과 (ms)
+TARGET_EFFECTS = {
+    'H1': {'Emotion': 50.0},
+    'H2': {'Emotion × Plausibility': -48.0},
+}
+
+SAMPLE_SIZES = list(range(8, 81, 8))
+
+
+def prepare_pilot():
+    """pilot region long table (제외 규칙 적용)과 trial 제외 비율"""
+    data = open_workbook(f'{OUTPUT_DIR}/ExpLing_Project.xlsx', sheets=['SPR_Data'],
+                         columns={'SPR_Data': SPR_ANALYSIS_COLUMNS})
+
+    spr = init_mask(data['SPR_Data'])
+    flag(spr, 'practice', spr['Sentence_Text'].str.contains('연습', na=False))
+    remaining = spr[keep_mask(spr)]
+    flag(spr, 'trial_iqr', ~trim_mask(remaining, 'Total_Reading_Time_ms', rule='iqr', k=2.5))
+
+    parsed = explode_sentence_structure(spr)
+    flag(parsed, 'word_range', ~parsed['RT'].between(200, 3000))
+
+    # 실험 trial 중 (trial IQR + word RT 범위로) 전부 제외된 trial 비율
+    trials = parsed[keep_mask(parsed, exclude=['practice'])]
+    kept = trials[keep_mask(trials)].groupby(['Participant_ID', 'Trial_Index'], observed=True).ngroups
+    total = trials.groupby(['Participant_ID', 'Trial_Index'], observed=True).ngroups
+    return parsed[keep_mask(parsed)].reset_index(drop=True), 1 - kept / total
+
+
+def plot_power_curve(curve, out_path):
+    fig, ax = plt.subplots(figsize=(8, 5))
+    for name, group in curve.groupby('hypothesis'):
+        ax.plot(group['n_participants'], group['power'], marker='o', label=name)
+        ax.fill_between(group['n_participants'], group['ci_low'], group['ci_high'], alpha=0.2)
+    ax.axhline(0.8, color='black', linestyle='--', linewidth=1)
+    ax.set_xlabel('Participants', fontsize=12)
+    ax.set_ylabel('Power', fontsize=12)
+    ax.set_ylim(0, 1)
+    ax.set_title('Simulated Power (crossed random effects)', fontsize=13, fontweight='bold')
+    ax.legend()
+    ax.grid(alpha=0.3)
+    plt.tight_layout()
+    plt.savefig(out_path, dpi=300, bbox_inches='tight')
+    plt.close()
+
+
+def main():
+    processes = int(sys.argv[1]) if len(sys.argv) > 1 else os.cpu_count() or 1
+
+    print("="*80)
+    print("시뮬레이션 기반 검정력 분석")
+    print("="*80)
+
+    pilot, exclusion_rate = prepare_pilot()
+    design = load_list_structure('stimuli')
+    print(f"\n리스트 {design['List_ID'].nunique()}개 × 실험 문장 {len(design) // design['List_ID'].nunique()}개")
+    print(f"pilot trial 제외 비율: {exclusion_rate:.3f}")
+
+    hypotheses = {}
+    for name, spec in HYPOTHESES.items():
+        region = pilot[pilot['Region_Type'].isin(spec['regions'])]
+        components = estimate_components(region, spec['formula'])
+        hypotheses[name] = dict(spec, components=components, effects=TARGET_EFFECTS[name])
+        print(f"\n{name} ({' + '.join(spec['regions'])}) 분산 성분 (pilot 참가자 {components['n_participants']}명):")
+        print(f"  참가자 SD {components['sd_participant']:.1f}, 아이템 SD {components['sd_item']:.1f}, "
+              f"잔차 SD {components['sd_residual']:.1f}")
+        print(f"  목표 효과: {TARGET_EFFECTS[name]}")
+
+    simulation = PowerSimulation(design, hypotheses, exclusion_rate=exclusion_rate)
+    print(f"\n참가자 수 {SAMPLE_SIZES[0]}-{SAMPLE_SIZES[-1]}명, 프로세스 {processes}개")
+    start = time.perf_counter()
+    curve = simulation.run(SAMPLE_SIZES, seed=42, processes=processes)
+    print(f"시뮬레이션 시간: {time.perf_counter() - start:.1f}초")
+
+    with pd.option_context('display.width', 200):
+        print("\n=== 검정력 곡선 ===")
+        print(curve.round(3).to_string(index=False))
+
+    for name, group in curve.groupby('hypothesis'):
+        enough = group[group['power'] >= 0.8]
+        needed = f"{enough['n_participants'].min()}명" if len(enough) else f"{SAMPLE_SIZES[-1]}명 초과"
+        print(f"  {name}: 검정력 0.8 이상 최소 참가자 수 {needed}")
+
+    curve.to_csv(f'{OUTPUT_DIR}/power_curve.csv', index=False)
+    plot_power_curve(curve, f'{OUTPUT_DIR}/Figure_Power_Curve.png')
+    print(f"\n저장: {OUTPUT_DIR}/power_curve.csv, {OUTPUT_DIR}/Figure_Power_Curve.png")
+
+
+if __name__ == "__main__":
+    main()
@@ -15,6 +15,14 @@ from scipy import stats
 from statsmodels.formula.api import mixedlm
 import warnings
 import re
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.data_cache import load_sheets, SPR_ANALYSIS_COLUMNS
+from common.spr_regions import explode_sentence_structure
+from common.factors import cell_summary
+
 warnings.filterwarnings('ignore')
 
 # Font settings - use English to avoid font issues
@@ -23,12 +31,10 @@ plt.rcParams['axes.unicode_minus'] = False
 sns.set_style("whitegrid")
 
 def load_data():
-    """데이터 로드"""
-    xl = pd.ExcelFile('result_1128/ExpLing_Project.xlsx')
-    data = {}
-    for sheet in xl.sheet_names:
-        data[sheet] = pd.read_excel('result_1128/ExpLing_Project.xlsx', sheet_name=sheet)
-    return data
+    """데이터 로드 (시트별 Parquet 캐시 사용)"""
+    return load_sheets('result_1128/ExpLing_Project.xlsx',
+                       sheets=['SPR_Data', 'Manipulation_Check', 'Recall_Data'],
+                       columns={'SPR_Data': SPR_ANALYSIS_COLUMNS})
 
 def remove_practice_trials(df):
     """연습 문장 제거"""
@@ -75,75 +81,12 @@ def parse_sentence_structure(df):
     """
     문장 구조 파싱: 주어 - 수식어 - spillover - 사실부분(평균)
     탈렌족은(주어) - 저급한(수식어) - 민족으로(spillover) - 나머지(사실부분)
+
+    사실부분 평균은 word-level outlier (200-3000ms) 제외 후 계산
+    (common.spr_regions 벡터화 엔진)
     """
-    parsed_rows = []
-
-    for idx, row in df.iterrows():
-        if row['Is_Filler'] == 1:  # 필러는 제외
-            continue
-
-        regions = eval(row['Regions'])
-        rts = eval(row['Region_RTs'])
-
-        # 기본 정보
-        base_info = {
-            'Participant_ID': row['Participant_ID'],
-            'List_ID': row['List_ID'],
-            'Trial_Index': row['Trial_Index'],
-            'Item_ID': row['Item_ID'],
-            'Base': row['Base'],
-            'Emotion': row['Emotion'],
-            'Plausibility': row['Plausibility'],
-            'Version': row['Version']
-        }
-
-        # 문장 구조 파싱
-        # 첫 번째: 주어 (탈렌족은/탈렌족의 등)
-        # 두 번째: 수식어 (저급한, 정착한 등)
-        # 세 번째: spillover (민족으로,)
-        # 나머지: 사실부분
-
-        if len(regions) >= 4:
-            # 주어
-            parsed_rows.append({
-                **base_info,
-                'Region_Type': 'Subject',
-                'Region_Text': regions[0],
-                'RT': rts[0]
-            })
-
-            # 수식어
-            parsed_rows.append({
-                **base_info,
-                'Region_Type': 'Modifier',
-                'Region_Text': regions[1],
-                'RT': rts[1]
-            })
-
-            # Spillover
-            parsed_rows.append({
-                **base_info,
-                'Region_Type': 'Spillover',
-                'Region_Text': regions[2],
-                'RT': rts[2]
-            })
-
-            # 사실부분 (평균)
-            fact_regions = regions[3:]
-            fact_rts = rts[3:]
-
-            # Word-level outlier 제거 (200-3000ms)
-            valid_rts = [rt for rt in fact_rts if 200 <= rt <= 3000]
-            if len(valid_rts) > 0:
-                avg_fact_rt = np.mean(valid_rts)
-                parsed_rows.append({
-                    **base_info,
-                    'Region_Type': 'Fact',
-                    'Region_Text': ' '.join(fact_regions),
-                    'RT': avg_fact_rt
-                })
-
-    return pd.DataFrame(parsed_rows)
+    return explode_sentence_structure(df)
+
 
 def remove_word_outliers(df, lower=200, upper=3000):
     """Word-level outlier 제거"""
@@ -241,6 +184,7 @@ def power_analysis(observed_d, alpha=0.05, power=0.80):
     print(f"- 중간 효과(d=0.5) 탐지: 약 {int(np.ceil(2*((z_alpha+z_beta)/0.5)**2*(1-r)))}명 필요")
     print(f"- 큰 효과(d=0.8) 탐지: 약 {int(np.ceil(2*((z_alpha+z_beta)/0.8)**2*(1-r)))}명 필요")
     print(f"\n권장: 중간 효과크기 기준 최소 30-35명 모집")
+    print("(교차 무선효과 / trial 제외 / 리스트 구조 반영 시뮬레이션: scripts/analysis/power_simulation.py)")
 
     return results_df
 
@@ -361,7 +305,7 @@ def test_hypotheses(parsed_data):
     critical_data = parsed_data[parsed_data['Region_Type'].isin(['Spillover', 'Fact'])].copy()
 
     print("\nCritical Region RT (Emotion × Plausibility):")
-    h2_desc = critical_data.groupby(['Emotion', 'Plausibility'])['RT'].agg(['mean', 'std', 'count', 'sem'])
+    h2_desc = cell_summary(critical_data, 'RT', ['Emotion', 'Plausibility'], ['mean', 'std', 'count', 'sem'])
     print(h2_desc)
 
     # Plausibility effect by Emotion
@@ -465,7 +409,7 @@ def create_visualizations(parsed_data, modifier_data, critical_data, manip_data)
     # Panel 1: 2x2 bar plot
     ax1 = plt.subplot(1, 3, 1)
     h2_summary = critical_data.groupby(['Emotion', 'Plausibility'])['RT'].mean().reset_index()
-    h2_summary['Condition'] = h2_summary['Emotion'] + h2_summary['Plausibility']
+    h2_summary['Condition'] = h2_summary['Emotion'].astype(str) + h2_summary['Plausibility'].astype(str)
     condition_map = {'HP': 'Hate-Plausible', 'HI': 'Hate-Implausible',
                      'NP': 'Neutral-Plausible', 'NI': 'Neutral-Implausible'}
     h2_summary['Condition_Label'] = h2_summary['Condition'].map(condition_map)
@@ -10,6 +10,14 @@ import seaborn as sns
 from scipy import stats
 from statsmodels.formula.api import mixedlm
 import warnings
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.spr_regions import explode_sentence_structure
+from common.exclusion_sweep import exclusion_sweep
+from common.factors import cell_summary
+
 warnings.filterwarnings('ignore')
 
 # Font settings - Korean support for modifier words
@@ -61,47 +69,12 @@ def identify_outlier_trials(df, method='iqr', k=2.5):
 
 def parse_sentence_structure(df, upper_bound):
     """문장 구조 파싱 with stricter word-level outlier removal"""
-    parsed_rows = []
-
-    for idx, row in df.iterrows():
-        if row['Is_Filler'] == 1:
-            continue
-
-        regions = eval(row['Regions'])
-        rts = eval(row['Region_RTs'])
-
-        base_info = {
-            'Participant_ID': row['Participant_ID'],
-            'List_ID': row['List_ID'],
-            'Trial_Index': row['Trial_Index'],
-            'Item_ID': row['Item_ID'],
-            'Base': row['Base'],
-            'Emotion': row['Emotion'],
-            'Plausibility': row['Plausibility'],
-            'Version': row['Version']
-        }
-
-        if len(regions) >= 4:
-            # Subject
-            if WORD_RT_LOWER <= rts[0] <= upper_bound:
-                parsed_rows.append({**base_info, 'Region_Type': 'Subject', 'Region_Text': regions[0], 'RT': rts[0]})
-
-            # Modifier
-            if WORD_RT_LOWER <= rts[1] <= upper_bound:
-                parsed_rows.append({**base_info, 'Region_Type': 'Modifier', 'Region_Text': regions[1], 'RT': rts[1]})
-
-            # Spillover
-            if WORD_RT_LOWER <= rts[2] <= upper_bound:
-                parsed_rows.append({**base_info, 'Region_Type': 'Spillover', 'Region_Text': regions[2], 'RT': rts[2]})
-
-            # Fact (average)
-            fact_rts = rts[3:]
-            valid_rts = [rt for rt in fact_rts if WORD_RT_LOWER <= rt <= upper_bound]
-            if len(valid_rts) > 0:
-                avg_fact_rt = np.mean(valid_rts)
-                parsed_rows.append({**base_info, 'Region_Type': 'Fact', 'Region_Text': ' '.join(regions[3:]), 'RT': avg_fact_rt})
-
-    return pd.DataFrame(parsed_rows)
+    parsed = explode_sentence_structure(df, fact_lower=WORD_RT_LOWER, fact_upper=upper_bound)
+
+    # Subject / Modifier / Spillover도 같은 범위로 제외 (Fact 평균은 항상 범위 내)
+    in_range = (parsed['RT'] >= WORD_RT_LOWER) & (parsed['RT'] <= upper_bound)
+    return parsed[in_range].reset_index(drop=True)
+
 
 def compare_analyses(data):
     """Compare original vs stricter criteria"""
@@ -132,21 +105,21 @@ def compare_analyses(data):
     print("H1 COMPARISON: Modifier RT")
     print("="*80)
 
-    results_comparison = []
-
-    for label, parsed in [("Original (200-3000ms)", parsed_original),
-                          ("Stricter (200-1600ms)", parsed_strict)]:
-        modifier_data = parsed[parsed['Region_Type'] == 'Modifier'].copy()
+    # 두 기준을 한 번에 계산 (modifier RT 정렬 + 누적합)
+    modifier_all = explode_sentence_structure(spr_clean)
+    modifier_all = modifier_all[modifier_all['Region_Type'] == 'Modifier']
+    sweep = exclusion_sweep(modifier_all['RT'], modifier_all['Emotion'], WORD_RT_LOWER,
+                            [WORD_RT_UPPER_ORIGINAL, WORD_RT_UPPER_STRICT],
+                            participant=modifier_all['Participant_ID'])
 
-        hate_rt = modifier_data[modifier_data['Emotion'] == 'H'].groupby('Participant_ID')['RT'].mean()
-        neutral_rt = modifier_data[modifier_data['Emotion'] == 'N'].groupby('Participant_ID')['RT'].mean()
+    results_comparison = []
 
-        mean_h = hate_rt.mean()
-        mean_n = neutral_rt.mean()
+    for label, row in zip(["Original (200-3000ms)", "Stricter (200-1600ms)"], sweep.itertuples()):
+        mean_h = row.PMean_H
+        mean_n = row.PMean_N
         diff = mean_h - mean_n
-
-        t_stat, p_val = stats.ttest_rel(hate_rt, neutral_rt)
-        cohens_d = diff / hate_rt.std()
+        t_stat, p_val = row.t_paired, row.p_paired
+        cohens_d = diff / row.PSD_H
 
         results_comparison.append({
             'Criterion': label,
@@ -156,16 +129,16 @@ def compare_analyses(data):
             't_stat': t_stat,
             'p_value': p_val,
             'cohens_d': cohens_d,
-            'N_obs': len(modifier_data)
+            'N_obs': row.N_retained
         })
 
         print(f"\n{label}:")
         print(f"  Hate RT: {mean_h:.1f} ms")
         print(f"  Neutral RT: {mean_n:.1f} ms")
         print(f"  Difference: {diff:.1f} ms")
-        print(f"  t({len(hate_rt)-1}) = {t_stat:.3f}, p = {p_val:.4f}")
+        print(f"  t({row.N_participants-1}) = {t_stat:.3f}, p = {p_val:.4f}")
         print(f"  Cohen's d = {cohens_d:.3f}")
-        print(f"  N observations: {len(modifier_data)}")
+        print(f"  N observations: {row.N_retained}")
 
     comparison_df = pd.DataFrame(results_comparison)
 
@@ -210,7 +183,7 @@ def run_full_analysis_strict(parsed_data, label):
     critical_data = parsed_data[parsed_data['Region_Type'].isin(['Spillover', 'Fact'])].copy()
 
     print("\nCritical Region RT (Emotion × Plausibility):")
-    h2_desc = critical_data.groupby(['Emotion', 'Plausibility'])['RT'].agg(['mean', 'std', 'count', 'sem'])
+    h2_desc = cell_summary(critical_data, 'RT', ['Emotion', 'Plausibility'], ['mean', 'std', 'count', 'sem'])
     print(h2_desc)
 
     print("\n\nPlausibility Effect (Implausible - Plausible):")
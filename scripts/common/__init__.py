@@ -0,0 +1,30 @@
+"""
+분석 스크립트 공용 모듈
+- data_cache: ExpLing_Project.xlsx 시트 로드 (LazyWorkbook: 접근 시 로드) 및 Parquet 캐시
+- list_parser: 리스트 문자열 셀 일괄 파서 (offset + 평면 배열, 형식 오류 행 보고)
+- spr_regions: Regions / Region_RTs 벡터화 파싱 (문장 구조 long table)
+- region_store: trial × region RT ragged 저장소 (int32 RT + offset, 텍스트 사전 인코딩)
+- server_ingest: server.js 참가자 JSON 증분 적재 (manifest + 파일별 Parquet 파티션)
+- rt_tensor: 참가자 × trial × region RT 텐서 (디스크 memmap + sidecar, region별 조회, 참가자 × region 평균)
+- spr_stream: SPR_Data 청크 단위 스트리밍 파싱 (Parquet writer / callback, 메모리 일정)
+- factors: 설계 요인 범주형 인코딩 (고정 범주 순서) + bincount 조건 셀 집계
+- trial_measures: trial별 파생 측정치 wide 테이블 (modifier_RT 등 + 유효 플래그, provenance, 워크북 변경 시 재생성)
+- exclusion_sweep: RT 제거 기준 (하한, 상한) 여러 개를 정렬 + 누적합 + searchsorted로 한 번에 비교
+- trimming: 그룹별 (참가자, 참가자 × 조건) RT trimming 마스크 (IQR / SD / MAD / percentile, groupby-transform)
+- exclusion_mask: trial / region 제외 규칙 uint32 비트마스크 (규칙 조합 즉시 적용, 규칙 × 참가자 × 조건 audit)
+- quantile_sketch: 병합 가능한 스트리밍 분위수 sketch (KLL, 청크 / 프로세스별 IQR 기준, 오차 상한)
+- residual_rt: 길이 보정 RT (참가자별 RT ~ 한글 음절 수, 배치 최소제곱, Residual_RT 컬럼)
+- model_grid: mixedlm 모형 명세 목록 일괄 적합 (프로세스 풀 + 공유 메모리 데이터, 계수 / SE / p / 수렴 tidy 표)
+- crossed_lmm: 참가자 × 아이템 교차 무선효과 LMM (REML / ML, 충분통계량 + 블록 Cholesky / Schur complement)
+- fit_session: 혼합모형 warm start 재적합 세션 (모형별 직전 해 → 시작값, 반복 수 기록)
+- bootstrap: 두 집단 효과 크기 벡터화 bootstrap (블록 인덱스 행렬, percentile / BCa / studentized 구간) + 참가자 군집 (계층) bootstrap
+- permutation: 2 × 2 참가자 내 순열 검정 (Latin square 블록 안 라벨 교환, Freedman-Lane 잔차, 부호 뒤집기 정확 p값)
+- power_sim: 리스트 구조 + pilot 분산 성분 기반 검정력 시뮬레이션 (교차 무선효과 적합, 병렬 난수 스트림, 조기 종료)
+- cluster_permutation: region 전체 paired t (참가자 × region 행렬) + 인접 유의 region 군집 질량 순열 검정 (부호 뒤집기, FWER 보정, 병렬 난수 스트림)
+- participant_effects: 참가자별 H1 차이 / H2·H3 그럴듯함 효과 / 왜곡 / 혐오 편향 (groupby 한 번 → 참가자 × 조건 셀 합 / 개수 / 제곱합 pivot)
+
+사용법 (scripts/<하위폴더>/*.py 에서):
+    import os, sys
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+    from common.data_cache import load_sheets
+"""
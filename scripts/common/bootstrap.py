@@ -0,0 +1,430 @@
+"""
+두 집단 효과 크기 bootstrap (벡터화)
+- 재표집 인덱스 행렬 (반복 × n)을 메모리 한도 블록 단위로 생성 → 평균 / 분산을 행 단위 배치 연산
+  (반복마다 np.random.choice + Python 함수 호출 없음)
+- 신뢰구간: percentile, BCa (jackknife 가속 상수), studentized (bootstrap-t)
+- ClusterBootstrap: 반복측정 자료용 참가자 군집 bootstrap (선택적으로 참가자 안 trial도 재표집)
+- 난수: np.random.Generator (seed 지정 시 재현 가능)
+
+통계량 (집단별 평균 / 분산 / n만으로 계산):
+    cohens_d  : (M1 - M2) / pooled SD   (effect_size_calculator.cohens_d와 동일)
+    hedges_g  : cohens_d × 소표본 보정
+    mean_diff : M1 - M2
+
+사용 예:
+    boot = TwoSampleBootstrap(hate_rt, neutral_rt, n_boot=100000, seed=42)
+    lower, upper = boot.ci('bca')
+"""
+
+import numpy as np
+from scipy import stats
+
+# 블록당 최대 인덱스 원소 수 (int64 기준 약 32MB)
+DEFAULT_BLOCK_ELEMENTS = 2 ** 22
+
+CI_METHODS = ('percentile', 'bca', 'studentized')
+
+
+def _pooled_sd(v1, n1, v2, n2):
+    return np.sqrt(((n1 - 1) * v1 + (n2 - 1) * v2) / (n1 + n2 - 2))
+
+
+def _cohens_d(m1, v1, n1, m2, v2, n2):
+    return (m1 - m2) / _pooled_sd(v1, n1, v2, n2)
+
+
+def _hedges_g(m1, v1, n1, m2, v2, n2):
+    return _cohens_d(m1, v1, n1, m2, v2, n2) * (1 - 3 / (4 * (n1 + n2) - 9))
+
+
+def _mean_diff(m1, v1, n1, m2, v2, n2):
+    return m1 - m2
+
+
+def _se_d(m1, v1, n1, m2, v2, n2):
+    d = _cohens_d(m1, v1, n1, m2, v2, n2)
+    return np.sqrt((n1 + n2) / (n1 * n2) + d ** 2 / (2 * (n1 + n2)))
+
+
+def _se_g(m1, v1, n1, m2, v2, n2):
+    return _se_d(m1, v1, n1, m2, v2, n2) * (1 - 3 / (4 * (n1 + n2) - 9))
+
+
+def _se_mean_diff(m1, v1, n1, m2, v2, n2):
+    return np.sqrt(v1 / n1 + v2 / n2)
+
+
+# 이름 → (통계량, 표준오차 근사) : studentized 구간은 표준오차 근사 사용
+STATISTICS = {
+    'cohens_d': (_cohens_d, _se_d),
+    'hedges_g': (_hedges_g, _se_g),
+    'mean_diff': (_mean_diff, _se_mean_diff),
+}
+
+
+def resample_moments(x, n_boot, rng, block_elements=DEFAULT_BLOCK_ELEMENTS):
+    """
+    x의 bootstrap 재표집별 (평균, 분산 ddof=1)
+
+    인덱스 행렬을 block_elements 이하 크기로 나눠 생성 → 최대 메모리 일정
+
+    Returns:
+    --------
+    tuple : (means, variances) 각각 (n_boot,)
+    """
+    x = np.asarray(x, dtype=np.float64)
+    n = len(x)
+    means = np.empty(n_boot)
+    variances = np.empty(n_boot)
+    rows = max(1, block_elements // max(n, 1))
+    for start in range(0, n_boot, rows):
+        stop = min(start + rows, n_boot)
+        sample = x[rng.integers(0, n, size=(stop - start, n))]
+        means[start:stop] = sample.mean(axis=1)
+        variances[start:stop] = sample.var(axis=1, ddof=1)
+    return means, variances
+
+
+def _jackknife_moments(x):
+    """leave-one-out 평균 / 분산 (합, 제곱합으로 한 번에)"""
+    n = len(x)
+    centered = x - x.mean()
+    s, ss = centered.sum(), (centered ** 2).sum()
+    loo_mean = (s - centered) / (n - 1)
+    loo_var = (ss - centered ** 2 - (n - 1) * loo_mean ** 2) / (n - 2)
+    return loo_mean + x.mean(), loo_var
+
+
+class TwoSampleBootstrap:
+    """
+    두 집단 bootstrap 분포 (집단별로 독립 재표집)
+
+    Parameters:
+    -----------
+    group1, group2 : array-like
+        결측치는 제외, 집단별 관찰치 3개 이상 (BCa의 jackknife 분산이 n - 2로 나눔)
+    statistic : str
+        STATISTICS 이름 (기본값 'cohens_d')
+    n_boot : int
+        재표집 횟수
+    seed : int or np.random.Generator, optional
+    block_elements : int
+        블록당 최대 인덱스 원소 수
+
+    Attributes:
+    -----------
+    estimate : float
+        원자료 통계량
+    replicates : ndarray (n_boot,)
+    """
+
+    def __init__(self, group1, group2, statistic='cohens_d', n_boot=10000, seed=None,
+                 block_elements=DEFAULT_BLOCK_ELEMENTS):
+        if statistic not in STATISTICS:
+            raise ValueError(f"알 수 없는 통계량: {statistic} (가능: {', '.join(STATISTICS)})")
+        self.x = np.asarray(group1, dtype=np.float64)
+        self.y = np.asarray(group2, dtype=np.float64)
+        self.x = self.x[~np.isnan(self.x)]
+        self.y = self.y[~np.isnan(self.y)]
+        if min(len(self.x), len(self.y)) < 3:
+            raise ValueError(f"집단별 관찰치가 3개 이상 필요합니다 "
+                             f"(group1: {len(self.x)}개, group2: {len(self.y)}개)")
+        self.statistic = statistic
+        self.n_boot = int(n_boot)
+        self._func, self._se = STATISTICS[statistic]
+
+        n1, n2 = len(self.x), len(self.y)
+        self._observed = (self.x.mean(), self.x.var(ddof=1), n1, self.y.mean(), self.y.var(ddof=1), n2)
+        self.estimate = float(self._func(*self._observed))
+
+        rng = seed if isinstance(seed, np.random.Generator) else np.random.default_rng(seed)
+        m1, v1 = resample_moments(self.x, self.n_boot, rng, block_elements)
+        m2, v2 = resample_moments(self.y, self.n_boot, rng, block_elements)
+        self._moments = (m1, v1, n1, m2, v2, n2)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            self.replicates = self._func(*self._moments)
+
+    def _jackknife(self):
+        """집단별 leave-one-out 통계량 (BCa 가속 상수용)"""
+        m1, v1, n1, m2, v2, n2 = self._observed
+        jm1, jv1 = _jackknife_moments(self.x)
+        jm2, jv2 = _jackknife_moments(self.y)
+        return np.concatenate([self._func(jm1, jv1, n1 - 1, m2, v2, n2),
+                               self._func(m1, v1, n1, jm2, jv2, n2 - 1)])
+
+    def ci(self, method='percentile', confidence=0.95):
+        """
+        신뢰구간
+
+        Parameters:
+        -----------
+        method : str
+            'percentile', 'bca', 'studentized'
+        confidence : float
+
+        Returns:
+        --------
+        tuple : (lower, upper)
+        """
+        with np.errstate(invalid='ignore', divide='ignore'):
+            replicate_se = self._se(*self._moments)
+        return _interval(self.estimate, self.replicates, method, confidence,
+                         jackknife=self._jackknife,
+                         studentized=(replicate_se, self._se(*self._observed)))
+
+
+def _interval(estimate, replicates, method, confidence, jackknife, studentized):
+    """
+    bootstrap 분포 → 신뢰구간 (percentile / BCa / studentized)
+
+    jackknife : callable, leave-one-out 통계량 배열 반환 (BCa 가속 상수)
+    studentized : (반복별 표준오차, 원자료 표준오차)
+    """
+    alpha = 1 - confidence
+    reps = replicates[np.isfinite(replicates)]
+
+    if method == 'percentile':
+        lower, upper = np.percentile(reps, [alpha / 2 * 100, (1 - alpha / 2) * 100])
+
+    elif method == 'bca':
+        # 편향 보정 z0 + jackknife 가속 a
+        z0 = stats.norm.ppf((reps < estimate).mean() + (reps == estimate).mean() / 2)
+        jack = jackknife()
+        jack = jack[np.isfinite(jack)]
+        dev = jack.mean() - jack
+        denom = 6 * (dev ** 2).sum() ** 1.5
+        a = (dev ** 3).sum() / denom if denom > 0 else 0.0
+        z = stats.norm.ppf([alpha / 2, 1 - alpha / 2])
+        adjusted = stats.norm.cdf(z0 + (z0 + z) / (1 - a * (z0 + z)))
+        lower, upper = np.percentile(reps, adjusted * 100)
+
+    elif method == 'studentized':
+        replicate_se, se = studentized
+        with np.errstate(invalid='ignore', divide='ignore'):
+            t = (replicates - estimate) / replicate_se
+        t = t[np.isfinite(t)]
+        t_lo, t_hi = np.percentile(t, [alpha / 2 * 100, (1 - alpha / 2) * 100])
+        lower, upper = estimate - t_hi * se, estimate - t_lo * se
+
+    else:
+        raise ValueError(f"알 수 없는 신뢰구간 방법: {method} (가능: {', '.join(CI_METHODS)})")
+    return float(lower), float(upper)
+
+
+def bootstrap_ci(group1, group2, statistic='cohens_d', method='percentile', confidence=0.95,
+                 n_boot=10000, seed=None):
+    """TwoSampleBootstrap(...).ci(method, confidence) 간단 호출"""
+    boot = TwoSampleBootstrap(group1, group2, statistic=statistic, n_boot=n_boot, seed=seed)
+    return boot.ci(method, confidence)
+
+
+# ---------------------------------------------------------------------------
+# 참가자 군집 (cluster) bootstrap
+# ---------------------------------------------------------------------------
+
+CLUSTER_STATISTICS = ('d_z', 'paired_diff', 'cohens_d', 'mean_diff')
+
+# 작업 프로세스의 참가자별 충분통계량 (프로세스마다 1회 전달)
+_WORKER_STATE = {}
+
+
+def _se_d_z(mean, sd, k):
+    d = mean / sd
+    return np.sqrt(1 / k + d ** 2 / (2 * k))
+
+
+def _cluster_statistic(statistic, stats_, weights, draw=None):
+    """
+    참가자 가중치 (반복 × 참가자)로 통계량 계산 → (값, 표준오차 근사)
+
+    stats_ : dict of (참가자,) 배열 n_a, s_a, q_a, n_b, s_b, q_b (중심화한 합 / 제곱합)
+        draw가 있으면 s, q는 (참가자, pool) 이고 draw (반복 × 참가자)번째 pool 값 사용
+    """
+    def pick(name):
+        values = stats_[name]
+        if draw is None or values.ndim == 1:
+            return values
+        return values[np.arange(values.shape[0]), draw]
+
+    n_a, n_b = stats_['n_a'], stats_['n_b']
+    s_a, q_a, s_b, q_b = pick('s_a'), pick('q_a'), pick('s_b'), pick('q_b')
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        if statistic in ('d_z', 'paired_diff'):
+            # 참가자 평균 차이의 가중 평균 / SD (두 조건 모두 있는 참가자만)
+            both = (n_a > 0) & (n_b > 0)
+            delta = np.where(both, s_a / np.where(both, n_a, 1) - s_b / np.where(both, n_b, 1), 0.0)
+            w = weights * both
+            k = w.sum(axis=-1)
+            mean = (w * delta).sum(axis=-1) / k
+            var = ((w * delta ** 2).sum(axis=-1) - k * mean ** 2) / (k - 1)
+            sd = np.sqrt(np.maximum(var, 0.0))
+            if statistic == 'paired_diff':
+                return mean, sd / np.sqrt(k)
+            return mean / sd, _se_d_z(mean, sd, k)
+
+        # trial 수준 통계량 (참가자 단위로 재표집한 trial 합)
+        N_a, N_b = (weights * n_a).sum(axis=-1), (weights * n_b).sum(axis=-1)
+        m_a, m_b = (weights * s_a).sum(axis=-1) / N_a, (weights * s_b).sum(axis=-1) / N_b
+        v_a = ((weights * q_a).sum(axis=-1) - N_a * m_a ** 2) / (N_a - 1)
+        v_b = ((weights * q_b).sum(axis=-1) - N_b * m_b ** 2) / (N_b - 1)
+        func, se = STATISTICS[statistic]
+        moments = (m_a, v_a, N_a, m_b, v_b, N_b)
+        return func(*moments), se(*moments)
+
+
+def _cluster_chunk(statistic, stats_, n_boot, seed_seq, within, block_elements):
+    """독립 난수 스트림 1개로 n_boot개 반복 (값, 표준오차)"""
+    rng = np.random.default_rng(seed_seq)
+    n_p = len(stats_['n_a'])
+    pool = stats_['s_a'].shape[1] if within else None
+    values = np.empty(n_boot)
+    ses = np.empty(n_boot)
+    rows = max(1, block_elements // max(n_p, 1))
+    for start in range(0, n_boot, rows):
+        stop = min(start + rows, n_boot)
+        weights = rng.multinomial(n_p, np.full(n_p, 1 / n_p), size=stop - start).astype(np.float64)
+        draw = rng.integers(0, pool, size=weights.shape) if within else None
+        values[start:stop], ses[start:stop] = _cluster_statistic(statistic, stats_, weights, draw)
+    return values, ses
+
+
+def _init_cluster_worker(stats_):
+    _WORKER_STATE['stats'] = stats_
+
+
+def _cluster_chunk_in_worker(args):
+    statistic, n_boot, seed_seq, within, block_elements = args
+    return _cluster_chunk(statistic, _WORKER_STATE['stats'], n_boot, seed_seq, within, block_elements)
+
+
+class ClusterBootstrap:
+    """
+    참가자 군집 bootstrap (반복측정 자료)
+
+    참가자를 복원 추출 (선택적으로 참가자 안에서 trial / 아이템도 복원 추출)
+    - 참가자 × 조건별 (n, 합, 제곱합)을 한 번만 계산 → 반복마다 참가자 가중치의 가중합 O(참가자)
+    - within=True: 참가자 × 조건별 trial 재표집 (합, 제곱합)을 inner_pool개 미리 만들어 두고
+      반복마다 참가자별로 하나씩 뽑음 (2단계 계층 bootstrap, 역시 O(참가자))
+    - 반복은 chunk_size 단위로 나누고 chunk마다 SeedSequence.spawn 독립 난수 스트림
+      → processes 수와 무관하게 같은 seed면 같은 결과
+
+    Parameters:
+    -----------
+    values : array-like
+        RT / Rating (trial 단위)
+    condition : array-like
+        조건 라벨 (예: Emotion)
+    cluster : array-like
+        참가자 ID
+    conditions : tuple
+        비교할 두 조건 (A, B), 차이는 A - B
+    statistic : str
+        'd_z'        : 참가자 평균 차이 / SD (paired, 기본값)
+        'paired_diff': 참가자 평균 차이의 평균
+        'cohens_d'   : trial 수준 pooled SD 기준 d (참가자 단위 재표집)
+        'mean_diff'  : trial 수준 평균 차이 (참가자 단위 재표집)
+    n_boot : int
+    seed : int or np.random.SeedSequence, optional
+    within : bool
+        참가자 안에서 trial도 재표집
+    inner_pool : int
+        within=True일 때 참가자 × 조건별로 미리 만드는 재표집 수
+    processes : int
+        프로세스 수 (1이면 현재 프로세스)
+    chunk_size : int
+        난수 스트림 1개가 담당하는 반복 수
+
+    Attributes:
+    -----------
+    estimate : float
+    replicates : ndarray (n_boot,)
+    n_clusters : int
+    """
+
+    def __init__(self, values, condition, cluster, conditions=('H', 'N'), statistic='d_z',
+                 n_boot=10000, seed=None, within=False, inner_pool=200, processes=1,
+                 chunk_size=10000, block_elements=DEFAULT_BLOCK_ELEMENTS):
+        if statistic not in CLUSTER_STATISTICS:
+            raise ValueError(f"알 수 없는 통계량: {statistic} (가능: {', '.join(CLUSTER_STATISTICS)})")
+        values = np.asarray(values, dtype=np.float64)
+        condition = np.asarray(condition, dtype=object)
+        a, b = conditions
+        use = ((condition == a) | (condition == b)) & ~np.isnan(values)
+        codes, self.clusters = _factorize(np.asarray(cluster, dtype=object)[use])
+        values, is_b = values[use], (condition[use] == b)
+
+        self.statistic = statistic
+        self.n_boot = int(n_boot)
+        self.n_clusters = n_p = len(self.clusters)
+        root = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+        pool_seq, chunk_root = root.spawn(2)
+
+        # 수치 안정성: 전체 평균 기준 중심화 후 합 / 제곱합
+        x = values - (values.mean() if len(values) else 0.0)
+        group = codes * 2 + is_b
+        counts = np.bincount(group, minlength=2 * n_p).astype(np.float64)
+        sums = np.bincount(group, weights=x, minlength=2 * n_p)
+        squares = np.bincount(group, weights=x * x, minlength=2 * n_p)
+        self._stats = {'n_a': counts[0::2], 's_a': sums[0::2], 'q_a': squares[0::2],
+                       'n_b': counts[1::2], 's_b': sums[1::2], 'q_b': squares[1::2]}
+        estimate, se_hat = _cluster_statistic(statistic, self._stats, np.ones(n_p))
+        self.estimate, self._se_hat = float(estimate), float(se_hat)
+
+        boot_stats = self._stats
+        if within:
+            pool_s, pool_q = _inner_pool(x, group, counts, inner_pool, np.random.default_rng(pool_seq))
+            boot_stats = dict(self._stats, s_a=pool_s[0::2], q_a=pool_q[0::2],
+                              s_b=pool_s[1::2], q_b=pool_q[1::2])
+
+        sizes = [min(chunk_size, self.n_boot - start) for start in range(0, self.n_boot, chunk_size)]
+        tasks = [(statistic, size, seq, within, block_elements)
+                 for size, seq in zip(sizes, chunk_root.spawn(len(sizes)))]
+        if processes == 1 or len(tasks) == 1:
+            parts = [_cluster_chunk(statistic, boot_stats, *task[1:]) for task in tasks]
+        else:
+            from concurrent.futures import ProcessPoolExecutor
+            with ProcessPoolExecutor(max_workers=processes, initializer=_init_cluster_worker,
+                                     initargs=(boot_stats,)) as pool:
+                parts = list(pool.map(_cluster_chunk_in_worker, tasks))
+
+        self.replicates = np.concatenate([p[0] for p in parts]) if parts else np.empty(0)
+        self._replicate_se = np.concatenate([p[1] for p in parts]) if parts else np.empty(0)
+
+    def _jackknife(self):
+        """참가자 1명씩 제외한 통계량 (가중치 행렬: 단위 행렬의 보수)"""
+        weights = 1.0 - np.eye(self.n_clusters)
+        return _cluster_statistic(self.statistic, self._stats, weights)[0]
+
+    def ci(self, method='percentile', confidence=0.95):
+        """신뢰구간 (TwoSampleBootstrap.ci와 같은 방법)"""
+        return _interval(self.estimate, self.replicates, method, confidence,
+                         jackknife=self._jackknife,
+                         studentized=(self._replicate_se, self._se_hat))
+
+
+def _factorize(values):
+    """참가자 ID → (코드, 고유 ID)"""
+    uniques, codes = np.unique(values.astype(str), return_inverse=True)
+    return codes, uniques
+
+
+def _inner_pool(x, group, counts, pool, rng):
+    """
+    참가자 × 조건 그룹별 trial 재표집 pool개의 (합, 제곱합) → 각각 (그룹, pool)
+
+    trial을 그룹 순서로 정렬해 두고 그룹 시작 위치 + floor(u × 그룹 크기)로 한 번에 뽑음
+    """
+    order = np.argsort(group, kind='stable')
+    x = x[order]
+    group = group[order]
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]]).astype(np.int64)
+    n_groups = len(counts)
+    sums = np.empty((n_groups, pool))
+    squares = np.empty((n_groups, pool))
+    for j in range(pool):
+        idx = starts[group] + (rng.random(len(x)) * counts[group]).astype(np.int64)
+        sample = x[idx]
+        sums[:, j] = np.bincount(group, weights=sample, minlength=n_groups)
+        squares[:, j] = np.bincount(group, weights=sample * sample, minlength=n_groups)
+    return sums, squares
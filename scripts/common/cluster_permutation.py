@@ -0,0 +1,284 @@
+"""
+region (단어 위치) 전체 paired t + 군집 기반 순열 검정 (cluster-mass, FWER 보정)
+- region마다 ttest_rel을 따로 돌리는 대신 참가자 × region 차이 행렬에서 t를 한 번에 계산
+  (region별로 두 조건 모두 자료가 있는 참가자만 → ttest_rel과 같은 값)
+- 인접한 유의 region (|t| > 임계값, 같은 부호)을 군집으로 묶고 군집 질량 = 군집 안 t 합
+- 귀무 분포: 참가자별 차이의 부호 뒤집기 (참가자 전체 region에 같은 부호)
+  → 순열마다 최대 군집 질량, 관측 군집 질량과 비교한 p값이 region 전체 family-wise 보정
+  - 부호만 바뀌므로 region별 제곱합 / 참가자 수는 고정: (순열 × 참가자) @ (참가자 × region) 행렬 곱 한 번
+  - 2^참가자 ≤ exact_limit이면 모든 부호 조합 (정확 p값), 아니면 Monte Carlo
+  - 순열은 chunk_size 단위로 나누고 chunk마다 SeedSequence.spawn 독립 난수 스트림
+    → 프로세스 풀로 병렬화, processes 수와 무관하게 같은 seed면 같은 결과
+
+사용 예:
+    hate = participant_region_means(words[words['Emotion'] == 'H'])
+    neutral = participant_region_means(words[words['Emotion'] == 'N'])
+    print(cluster_permutation_test(hate, neutral, n_perm=10000, seed=42))
+"""
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+# 작업 프로세스의 차이 행렬 / 임계값 (프로세스마다 1회 전달)
+_WORKER_STATE = {}
+
+
+def participant_region_means(data, value='RT', region='Region_Index', cluster='Participant_ID'):
+    """
+    long table → 참가자 × region 평균 (자료가 없으면 NaN)
+
+    Returns:
+    --------
+    DataFrame : index 참가자, columns region (정렬)
+    """
+    return data.pivot_table(index=cluster, columns=region, values=value, aggfunc='mean',
+                            observed=True).sort_index(axis=1)
+
+
+def _state(diff):
+    """차이 행렬 → NaN을 0으로 채운 행렬, region별 참가자 수 / 제곱합"""
+    present = ~np.isnan(diff)
+    filled = np.where(present, diff, 0.0)
+    return {'diff': filled, 'n': present.sum(axis=0), 'ss': (filled ** 2).sum(axis=0)}
+
+
+def _sign_t(signs, state):
+    """
+    부호 (순열 × 참가자) → region별 t (순열 × region)
+
+    차이 행렬의 NaN은 0으로 두고 region별 참가자 수 / 제곱합으로 보정
+    """
+    n, ss = state['n'], state['ss']
+    mean = signs @ state['diff'] / np.maximum(n, 1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        sd = np.sqrt(np.maximum((ss - n * mean ** 2) / (n - 1), 0.0))
+        t = mean / (sd / np.sqrt(n))
+    return np.where(n > 1, t, np.nan)
+
+
+def _max_run_mass(t, threshold):
+    """
+    행마다 (t > threshold)인 인접 region 군집의 t 합 최댓값 (군집이 없으면 0)
+
+    누적합에서 직전 비유의 위치의 누적합을 빼면 현재 군집 안 누적 질량
+    (유의 region의 t > 0이라 누적합이 증가 → maximum.accumulate로 직전 값)
+    """
+    x = np.where(t > threshold, t, 0.0)
+    cs = np.cumsum(x, axis=1)
+    base = np.maximum.accumulate(np.where(x > 0, 0.0, cs), axis=1)
+    return (cs - base).max(axis=1, initial=0.0)
+
+
+def _null_mass(t, state):
+    """순열별 최대 군집 질량 (tail: 0 양측 → 양 / 음 군집 중 큰 값)"""
+    tail, threshold = state['tail'], state['threshold']
+    if tail > 0:
+        return _max_run_mass(t, threshold)
+    if tail < 0:
+        return _max_run_mass(-t, threshold)
+    return np.maximum(_max_run_mass(t, threshold), _max_run_mass(-t, threshold))
+
+
+def _permutation_chunk(state, start, size, seed_seq):
+    """
+    부호 조합 size개 → (size,) 최대 군집 질량
+
+    seed_seq가 None이면 정확 열거 (조합 번호 start ... start + size - 1의 비트)
+    """
+    k = state['diff'].shape[0]
+    if seed_seq is None:
+        codes = np.arange(start, start + size, dtype=np.int64)
+        signs = ((codes[:, None] >> np.arange(k)) & 1) * 2.0 - 1.0
+    else:
+        signs = np.random.default_rng(seed_seq).choice([-1.0, 1.0], size=(size, k))
+    return _null_mass(_sign_t(signs, state), state)
+
+
+def _init_worker(state):
+    _WORKER_STATE['state'] = state
+
+
+def _permutation_chunk_in_worker(args):
+    return _permutation_chunk(_WORKER_STATE['state'], *args)
+
+
+def _as_matrix(a, b):
+    """두 조건 (참가자 × region) → 차이 행렬 + 참가자 / region 라벨 (DataFrame이면 라벨 기준 정렬)"""
+    if isinstance(a, pd.DataFrame):
+        b = b if b is not None else pd.DataFrame(0.0, index=a.index, columns=a.columns)
+        index = a.index.union(b.index)
+        columns = a.columns.union(b.columns)
+        diff = a.reindex(index=index, columns=columns) - b.reindex(index=index, columns=columns)
+        return diff.to_numpy(dtype=np.float64), index, columns
+    diff = np.asarray(a, dtype=np.float64)
+    if b is not None:
+        diff = diff - np.asarray(b, dtype=np.float64)
+    return diff, pd.RangeIndex(diff.shape[0]), pd.RangeIndex(diff.shape[1])
+
+
+def paired_t(a, b=None):
+    """
+    region별 paired t (A - B) 벡터 계산
+
+    Parameters:
+    -----------
+    a, b : DataFrame or ndarray (참가자 × region)
+        조건별 참가자 평균 (b가 없으면 a를 차이로 사용)
+
+    Returns:
+    --------
+    DataFrame : Region, Difference, SEM, t, df, p (양측, 미보정), n
+    """
+    diff, _, regions = _as_matrix(a, b)
+    state = _state(diff)
+    n = state['n']
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = np.where(n > 0, state['diff'].sum(axis=0) / n, np.nan)
+        sem = np.sqrt(np.maximum((state['ss'] - n * mean ** 2) / (n - 1), 0.0) / n)
+    t = _sign_t(np.ones((1, diff.shape[0])), state)[0]
+    return pd.DataFrame({'Region': regions, 'Difference': mean,
+                         'SEM': np.where(n > 1, sem, np.nan),
+                         't': t, 'df': n - 1, 'p': 2 * stats.t.sf(np.abs(t), n - 1),
+                         'n': n})
+
+
+def find_clusters(t, threshold, tail=0):
+    """
+    인접한 유의 region 군집 (같은 부호)
+
+    Parameters:
+    -----------
+    t : array-like (region,)
+    threshold : float or array-like (region,)
+        |t| 임계값
+    tail : int
+        0 양측, 1 양의 군집만, -1 음의 군집만
+
+    Returns:
+    --------
+    list of dict : start, stop (region 위치, 포함), sign, mass (t 합)
+    """
+    t = np.asarray(t, dtype=np.float64)
+    threshold = np.broadcast_to(threshold, t.shape)
+    clusters = []
+    for sign in ([1, -1] if tail == 0 else [tail]):
+        sig = np.concatenate([[False], sign * t > threshold, [False]])
+        edges = np.flatnonzero(np.diff(sig.astype(np.int8)))
+        for start, stop in zip(edges[::2], edges[1::2]):
+            clusters.append({'start': int(start), 'stop': int(stop - 1), 'sign': sign,
+                             'mass': float(t[start:stop].sum())})
+    return sorted(clusters, key=lambda c: c['start'])
+
+
+class ClusterPermutationTest:
+    """
+    참가자 내 두 조건 차이의 region 군집 순열 검정
+
+    Parameters:
+    -----------
+    a, b : DataFrame or ndarray (참가자 × region)
+        조건별 참가자 평균 (participant_region_means), b가 없으면 a를 차이 (예: 상호작용 대비)로 사용
+        DataFrame이면 참가자 / region 라벨로 맞춤, region 순서 = 인접 순서
+    alpha : float
+        군집 형성 임계값 (region별 양측 t 임계값, 자유도 = 참가자 수 - 1)
+    threshold : float, optional
+        |t| 임계값 직접 지정 (alpha 대신)
+    tail : int
+        0 양측, 1 (A > B) 군집만, -1 (A < B) 군집만
+    n_perm : int
+        Monte Carlo 부호 조합 수 (2^참가자 ≤ exact_limit이면 무시하고 전체 열거)
+    seed : int or np.random.SeedSequence, optional
+    processes : int
+        프로세스 수 (1이면 현재 프로세스)
+    chunk_size : int
+        난수 스트림 (또는 정확 열거 구간) 1개가 담당하는 순열 수
+    exact_limit : int
+
+    Attributes:
+    -----------
+    regions : DataFrame  paired_t 결과
+    clusters : list of dict  관측 군집 (+ p_cluster)
+    null : ndarray (순열,) 최대 군집 질량 분포
+    exact : bool
+    """
+
+    def __init__(self, a, b=None, alpha=0.05, threshold=None, tail=0, n_perm=10000, seed=None,
+                 processes=1, chunk_size=10000, exact_limit=2 ** 16):
+        if tail not in (-1, 0, 1):
+            raise ValueError(f"tail은 -1, 0, 1 중 하나여야 합니다: {tail}")
+        diff, self.participants, labels = _as_matrix(a, b)
+        state = _state(diff)
+        self.regions = paired_t(diff)
+        self.regions['Region'] = labels
+        if threshold is None:
+            q = 1 - alpha / 2 if tail == 0 else 1 - alpha
+            with np.errstate(invalid='ignore'):
+                threshold = stats.t.ppf(q, np.maximum(state['n'] - 1, 1))
+        state['threshold'] = np.broadcast_to(np.asarray(threshold, dtype=np.float64), labels.shape)
+        state['tail'] = tail
+        self.tail = tail
+
+        t_obs = self.regions['t'].to_numpy()
+        self.clusters = find_clusters(t_obs, state['threshold'], tail)
+
+        k = diff.shape[0]
+        self.exact = 2 ** k <= exact_limit
+        root = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+        total = 2 ** k if self.exact else int(n_perm)
+        starts = range(0, total, chunk_size)
+        seqs = [None] * len(starts) if self.exact else root.spawn(len(starts))
+        tasks = [(start, min(chunk_size, total - start), seq) for start, seq in zip(starts, seqs)]
+        if processes == 1 or len(tasks) <= 1:
+            parts = [_permutation_chunk(state, *task) for task in tasks]
+        else:
+            from concurrent.futures import ProcessPoolExecutor
+            with ProcessPoolExecutor(max_workers=processes, initializer=_init_worker,
+                                     initargs=(state,)) as pool:
+                parts = list(pool.map(_permutation_chunk_in_worker, tasks))
+        self.null = np.concatenate(parts) if parts else np.empty(0)
+
+        for cluster in self.clusters:
+            hits = (self.null >= abs(cluster['mass']) * (1 - 1e-12)).sum()
+            cluster['p_cluster'] = (hits / len(self.null) if self.exact
+                                    else (hits + 1) / (len(self.null) + 1))
+
+    def table(self):
+        """
+        군집별 결과
+
+        Returns:
+        --------
+        DataFrame : cluster, first, last (region 라벨), n_regions, sign, mass, p_cluster
+        """
+        labels = self.regions['Region'].to_numpy()
+        rows = [{'cluster': i + 1, 'first': labels[c['start']], 'last': labels[c['stop']],
+                 'n_regions': c['stop'] - c['start'] + 1, 'sign': c['sign'], 'mass': c['mass'],
+                 'p_cluster': c['p_cluster']} for i, c in enumerate(self.clusters)]
+        return pd.DataFrame(rows, columns=['cluster', 'first', 'last', 'n_regions', 'sign',
+                                           'mass', 'p_cluster'])
+
+    def region_table(self, alpha=0.05):
+        """
+        region별 결과 + 소속 군집의 보정 p값
+
+        Returns:
+        --------
+        DataFrame : paired_t 컬럼 + cluster (없으면 0), p_cluster (없으면 NaN),
+                    significant (p_cluster < alpha)
+        """
+        out = self.regions.copy()
+        cluster = np.zeros(len(out), dtype=np.int64)
+        p_cluster = np.full(len(out), np.nan)
+        for i, c in enumerate(self.clusters):
+            cluster[c['start']:c['stop'] + 1] = i + 1
+            p_cluster[c['start']:c['stop'] + 1] = c['p_cluster']
+        out['cluster'] = cluster
+        out['p_cluster'] = p_cluster
+        out['significant'] = p_cluster < alpha
+        return out
+
+
+def cluster_permutation_test(a, b=None, alpha=0.05, **options):
+    """ClusterPermutationTest(a, b, alpha, ...).region_table(alpha) 축약"""
+    return ClusterPermutationTest(a, b, alpha=alpha, **options).region_table(alpha)
@@ -0,0 +1,279 @@
+"""
+ExpLing_Project.xlsx 시트 캐시
+- 워크북 파일 내용의 SHA-256 해시를 키로 각 시트를 Parquet 파일로 한 번만 변환
+- 이후 로드는 캐시에서 읽음 (XLSX 파싱 생략)
+- columns 인자로 필요한 컬럼만 읽음 (column projection)
+- 시트는 처음 필요할 때 하나씩 변환 (LazyWorkbook: 접근한 시트만 read-only 스트리밍 파싱)
+- 설계 요인 컬럼 (Emotion, Plausibility, Participant_ID ...)은 범주형으로 변환 (common.factors)
+
+캐시 위치: <워크북 폴더>/.sheet_cache/<해시 앞 16자리>/
+워크북 내용이 바뀌면 해시가 달라지므로 자동으로 다시 변환됨
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from collections.abc import Mapping
+
+import pandas as pd
+
+from common.factors import encode_factors
+
+try:
+    import pyarrow  # noqa: F401  (Parquet 엔진)
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+# google-apps-script.js의 SHEET_NAMES와 동일
+SHEET_NAMES = ['SPR_Data', 'Rating_Data', 'Recall_Data', 'Manipulation_Check', 'Metadata']
+
+# 분석 스크립트가 실제로 사용하는 SPR_Data 컬럼 (Timestamp, Total_Regions 제외)
+SPR_ANALYSIS_COLUMNS = [
+    'Participant_ID', 'List_ID', 'Trial_Index', 'Item_ID', 'Base', 'Emotion',
+    'Plausibility', 'Version', 'Is_Filler', 'Sentence_Text',
+    'Total_Reading_Time_ms', 'Regions', 'Region_RTs'
+]
+
+CACHE_DIRNAME = '.sheet_cache'
+MANIFEST_NAME = 'manifest.json'
+
+_warned_no_pyarrow = False
+
+
+def file_hash(path, chunk_size=1 << 20):
+    """파일 내용의 SHA-256 해시 (워크북, server.js JSON 등 형식 무관)"""
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def workbook_hash(excel_path, chunk_size=1 << 20):
+    """워크북 파일 내용의 SHA-256 해시 (캐시 폴더 키)"""
+    return file_hash(excel_path, chunk_size)
+
+
+def _cache_root(excel_path):
+    return os.path.join(os.path.dirname(os.path.abspath(excel_path)), CACHE_DIRNAME)
+
+
+def _normalize_types(df):
+    """
+    Parquet 저장 전 타입 정리
+    - 문자열/숫자가 섞인 object 컬럼은 문자열로 통일 (결측치는 유지)
+    """
+    df = df.copy()
+    for col in df.columns:
+        if df[col].dtype == object:
+            values = df[col]
+            non_null = values.dropna()
+            if not non_null.map(lambda v: isinstance(v, str)).all():
+                df[col] = values.where(values.isna(), values.astype(str))
+    return df
+
+
+def _sheet_names(excel_path):
+    """워크북 시트 이름 (read-only 모드: 시트 내용은 읽지 않음)"""
+    from openpyxl import load_workbook
+    wb = load_workbook(excel_path, read_only=True)
+    try:
+        return list(wb.sheetnames)
+    finally:
+        wb.close()
+
+
+def _read_manifest(target):
+    manifest_path = os.path.join(target, MANIFEST_NAME)
+    if not os.path.exists(manifest_path):
+        return None
+    with open(manifest_path, encoding='utf-8') as f:
+        manifest = json.load(f)
+    # 이전 형식 (전체 시트를 한 번에 변환) 호환
+    manifest.setdefault('sheet_names', list(manifest['sheets']))
+    return manifest
+
+
+def _write_manifest(target, manifest):
+    tmp_path = os.path.join(target, MANIFEST_NAME + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, os.path.join(target, MANIFEST_NAME))
+
+
+def _open_cache(excel_path, digest):
+    """해시 폴더와 manifest 준비 (처음이면 시트 이름만 기록하고 이전 해시 폴더 정리)"""
+    root = _cache_root(excel_path)
+    target = os.path.join(root, digest[:16])
+    manifest = _read_manifest(target)
+    if manifest is not None:
+        return target, manifest
+
+    os.makedirs(target, exist_ok=True)
+    manifest = {'workbook': os.path.basename(excel_path), 'sha256': digest,
+                'sheet_names': _sheet_names(excel_path), 'sheets': {}}
+    _write_manifest(target, manifest)
+
+    # 이전 버전 워크북의 캐시 정리
+    for name in os.listdir(root):
+        path = os.path.join(root, name)
+        if name != digest[:16] and os.path.isdir(path):
+            shutil.rmtree(path, ignore_errors=True)
+
+    return target, manifest
+
+
+def _cache_sheet(excel_path, target, manifest, sheet):
+    """시트 1개만 읽어 Parquet으로 변환하고 manifest에 추가"""
+    print(f"시트 캐시 생성 중: {excel_path} [{sheet}] → {target}")
+    df = pd.read_excel(excel_path, sheet_name=sheet)
+
+    filename = f"sheet_{manifest['sheet_names'].index(sheet):02d}.parquet"
+    fd, tmp_path = tempfile.mkstemp(prefix='build-', suffix='.parquet', dir=target)
+    os.close(fd)
+    try:
+        _normalize_types(df).to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, os.path.join(target, filename))
+    except Exception:
+        os.remove(tmp_path)
+        raise
+
+    # 다른 프로세스가 그 사이 추가한 시트를 잃지 않도록 다시 읽고 갱신
+    manifest = _read_manifest(target) or manifest
+    manifest['sheets'][sheet] = {'file': filename, 'n_rows': len(df), 'columns': list(df.columns)}
+    _write_manifest(target, manifest)
+    return manifest
+
+
+def ensure_cache(excel_path):
+    """
+    워크북 전체 시트 캐시 준비 (없는 시트만 변환)
+
+    Returns:
+    --------
+    tuple : (cache_dir, manifest)
+    """
+    target, manifest = _open_cache(excel_path, workbook_hash(excel_path))
+    for sheet in manifest['sheet_names']:
+        if sheet not in manifest['sheets']:
+            manifest = _cache_sheet(excel_path, target, manifest, sheet)
+    return target, manifest
+
+
+def _columns_for(columns, sheet):
+    if columns is None:
+        return None
+    if isinstance(columns, dict):
+        return columns.get(sheet)
+    return list(columns)
+
+
+class LazyWorkbook(Mapping):
+    """
+    워크북 시트를 처음 접근할 때 읽는 dict 형태 객체 (읽은 시트는 보관)
+
+    - 캐시에 있는 시트: Parquet에서 읽음
+    - 없는 시트: 해당 시트만 read-only 모드로 스트리밍 파싱 후 캐시에 추가
+      (예: Rating_Data만 쓰는 분석은 SPR_Data를 파싱하지 않음)
+
+    Parameters:
+    -----------
+    excel_path : str
+        ExpLing_Project.xlsx 경로
+    sheets : list of str, optional
+        노출할 시트 이름 (기본값: 워크북의 모든 시트)
+    columns : list or dict, optional
+        읽을 컬럼. dict이면 {시트 이름: 컬럼 리스트}, 리스트이면 모든 시트에 적용
+    categorical : bool
+        True이면 설계 요인 컬럼을 고정 순서 범주형으로 변환 (encode_factors)
+    """
+
+    def __init__(self, excel_path, sheets=None, columns=None, categorical=True):
+        self.excel_path = excel_path
+        self.columns = columns
+        self.categorical = categorical
+        self._frames = {}
+
+        if HAS_PYARROW:
+            self._target, self._manifest = _open_cache(excel_path, workbook_hash(excel_path))
+            sheet_names = self._manifest['sheet_names']
+        else:
+            self._target, self._manifest = None, None
+            sheet_names = _sheet_names(excel_path)
+
+        if sheets is None:
+            self._names = list(sheet_names)
+        else:
+            for sheet in sheets:
+                if sheet not in sheet_names:
+                    raise KeyError(f"워크북에 '{sheet}' 시트가 없습니다: {excel_path}")
+            self._names = list(sheets)
+
+    def __getitem__(self, sheet):
+        if sheet not in self._names:
+            raise KeyError(sheet)
+        if sheet not in self._frames:
+            df = self._read(sheet)
+            self._frames[sheet] = encode_factors(df) if self.categorical else df
+        return self._frames[sheet]
+
+    def __iter__(self):
+        return iter(self._names)
+
+    def __len__(self):
+        return len(self._names)
+
+    def is_loaded(self, sheet):
+        """이미 읽은 시트인지"""
+        return sheet in self._frames
+
+    def _read(self, sheet):
+        global _warned_no_pyarrow
+        cols = _columns_for(self.columns, sheet)
+
+        if not HAS_PYARROW:
+            if not _warned_no_pyarrow:
+                print("pyarrow 미설치: Parquet 캐시 없이 XLSX를 직접 읽습니다 (pip install pyarrow)")
+                _warned_no_pyarrow = True
+            return pd.read_excel(self.excel_path, sheet_name=sheet, usecols=cols)
+
+        if sheet not in self._manifest['sheets']:
+            self._manifest = _cache_sheet(self.excel_path, self._target, self._manifest, sheet)
+        path = os.path.join(self._target, self._manifest['sheets'][sheet]['file'])
+        return pd.read_parquet(path, columns=cols)
+
+
+def open_workbook(excel_path, sheets=None, columns=None, categorical=True):
+    """워크북을 LazyWorkbook으로 열기 (시트는 접근할 때 로드)"""
+    return LazyWorkbook(excel_path, sheets=sheets, columns=columns, categorical=categorical)
+
+
+def load_sheets(excel_path, sheets=None, columns=None, categorical=True):
+    """
+    워크북 시트를 DataFrame dict로 로드 (Parquet 캐시 사용)
+
+    Parameters:
+    -----------
+    excel_path : str
+        ExpLing_Project.xlsx 경로
+    sheets : list of str, optional
+        읽을 시트 이름 (기본값: 워크북의 모든 시트)
+    columns : list or dict, optional
+        읽을 컬럼. dict이면 {시트 이름: 컬럼 리스트}, 리스트이면 모든 시트에 적용
+    categorical : bool
+        True이면 설계 요인 컬럼을 범주형으로 변환
+
+    Returns:
+    --------
+    dict : {시트 이름: DataFrame}
+    """
+    workbook = LazyWorkbook(excel_path, sheets=sheets, columns=columns, categorical=categorical)
+    return {sheet: workbook[sheet] for sheet in workbook}
+
+
+def load_sheet(excel_path, sheet, columns=None, categorical=True):
+    """단일 시트 로드 (load_sheets 참고)"""
+    return LazyWorkbook(excel_path, sheets=[sheet], columns=columns, categorical=categorical)[sheet]
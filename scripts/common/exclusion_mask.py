@@ -0,0 +1,144 @@
+"""
+trial / region별 제외 비트마스크
+- 제외 규칙마다 비트 1개: 규칙을 적용해도 행을 지우지 않고 Exclusion 컬럼 (uint32)에 비트만 기록
+- 어떤 규칙 조합이든 비트 AND 한 번으로 유지 행 계산 (다시 파싱 / 다시 필터링 없음)
+  예: IQR 단계를 빼면? → keep_mask(parsed, exclude=['practice', 'word_range'])
+- trial 비트는 explode_sentence_structure 결과 (region long table)에 그대로 전달됨
+- exclusion_audit: 규칙 × 참가자 × 조건별 제외 개수
+
+주의: 비트는 "그 규칙에 걸렸는지"만 기록. 기준값이 앞 단계 결과에 의존하는 규칙
+      (예: 연습 문장을 뺀 trial로 계산한 IQR)은 그 모집단으로 계산한 결과를 flag에 넘김
+"""
+
+import numpy as np
+import pandas as pd
+
+EXCLUSION_COLUMN = 'Exclusion'
+
+# 규칙 이름 → (비트 번호, 설명). 저장된 마스크끼리 비교할 수 있도록 기본 규칙의 비트는 고정
+EXCLUSION_RULES = {
+    'practice': (0, "연습 문장 (Sentence_Text에 '연습')"),
+    'trial_iqr': (1, "trial 전체 읽기 시간 IQR 기준 (k=2.5)"),
+    'word_range': (2, "region RT 200-3000ms 밖"),
+    'word_strict': (3, "region RT 200-1600ms 밖"),
+    'participant_sd': (4, "참가자별 ±2.5 SD 밖"),
+}
+
+
+def register_rule(name, description):
+    """새 규칙 등록 (비어 있는 가장 낮은 비트 할당, 이미 있으면 기존 비트)"""
+    if name in EXCLUSION_RULES:
+        return EXCLUSION_RULES[name][0]
+    used = {bit for bit, _ in EXCLUSION_RULES.values()}
+    bit = next(b for b in range(32) if b not in used)
+    EXCLUSION_RULES[name] = (bit, description)
+    return bit
+
+
+def rule_bits(rules):
+    """규칙 이름 목록 → 비트 합 (uint32)"""
+    bits = np.uint32(0)
+    for name in rules:
+        if name not in EXCLUSION_RULES:
+            raise KeyError(f"등록되지 않은 제외 규칙: {name}")
+        bits |= np.uint32(1 << EXCLUSION_RULES[name][0])
+    return bits
+
+
+def init_mask(df):
+    """Exclusion 컬럼이 없으면 0으로 추가 (사본 반환)"""
+    df = df.copy()
+    if EXCLUSION_COLUMN not in df.columns:
+        df[EXCLUSION_COLUMN] = np.zeros(len(df), dtype=np.uint32)
+    return df
+
+
+def flag(df, rule, excluded):
+    """
+    규칙에 걸린 행에 비트 기록 (제자리 수정, 행은 지우지 않음)
+
+    Parameters:
+    -----------
+    df : DataFrame
+        Exclusion 컬럼이 있는 테이블 (init_mask)
+    rule : str
+        EXCLUSION_RULES 이름
+    excluded : array-like of bool
+        df와 같은 길이 (True = 제외). 부분 집합에 대한 Series이면 index로 맞춤
+
+    Returns:
+    --------
+    int : 이 규칙에 걸린 행 수
+    """
+    if isinstance(excluded, pd.Series):
+        excluded = excluded.reindex(df.index, fill_value=False)
+    excluded = np.asarray(excluded, dtype=bool)
+    bit = rule_bits([rule])
+    values = df[EXCLUSION_COLUMN].to_numpy(dtype=np.uint32).copy()
+    values[excluded] |= bit
+    df[EXCLUSION_COLUMN] = values
+    return int(excluded.sum())
+
+
+def keep_mask(df, exclude=None):
+    """
+    유지 행 마스크 (exclude 규칙 중 하나라도 걸리면 False)
+
+    Parameters:
+    -----------
+    exclude : list of str, optional
+        적용할 규칙 (기본값: 등록된 모든 규칙)
+    """
+    rules = list(EXCLUSION_RULES) if exclude is None else exclude
+    return (df[EXCLUSION_COLUMN].to_numpy(dtype=np.uint32) & rule_bits(rules)) == 0
+
+
+def exclusion_audit(df, by=('Participant_ID',), rules=None):
+    """
+    그룹별 제외 개수 (규칙마다 걸린 행 수 + 하나라도 걸린 행 수)
+
+    Parameters:
+    -----------
+    by : sequence of str
+        그룹 컬럼 (예: ['Participant_ID', 'Emotion']), 빈 목록이면 전체
+    rules : list of str, optional
+        보고할 규칙 (기본값: 데이터에 한 번이라도 나온 규칙)
+
+    Returns:
+    --------
+    DataFrame : index = 그룹, columns = n, <규칙>..., any, pct_any
+    """
+    values = df[EXCLUSION_COLUMN].to_numpy(dtype=np.uint32)
+    if rules is None:
+        present = np.bitwise_or.reduce(values) if len(values) else 0
+        rules = [name for name, (bit, _) in EXCLUSION_RULES.items() if present & (1 << bit)]
+
+    counts = pd.DataFrame({'n': np.ones(len(df), dtype=np.int64)}, index=df.index)
+    for name in rules:
+        counts[name] = ((values & rule_bits([name])) != 0).astype(np.int64)
+    counts['any'] = ((values & rule_bits(rules)) != 0).astype(np.int64) if rules else 0
+
+    by = list(by)
+    if by:
+        table = counts.groupby([df[col] for col in by], observed=True, dropna=False).sum()
+    else:
+        table = counts.sum().to_frame('전체').T
+    table['pct_any'] = 100 * table['any'] / table['n']
+    return table
+
+
+def report_exclusions(df, by=('Participant_ID',), rules=None):
+    """규칙별 전체 제외 개수 + 그룹별 audit 출력, audit 표 반환"""
+    total = exclusion_audit(df, by=(), rules=rules)
+    print("\n=== 제외 규칙별 개수 (중복 포함) ===")
+    for name in total.columns.drop(['n', 'any', 'pct_any']):
+        bit, description = EXCLUSION_RULES[name]
+        n = int(total[name].iloc[0])
+        print(f"  [bit {bit:2d}] {name:<15} {n:>6}개  {description}")
+    print(f"  하나 이상 해당: {int(total['any'].iloc[0])}개 / {int(total['n'].iloc[0])}개 "
+          f"({total['pct_any'].iloc[0]:.1f}%)")
+
+    audit = exclusion_audit(df, by=by, rules=rules)
+    print(f"\n=== {' × '.join(by)}별 제외 개수 ===")
+    print(audit.round(1))
+    return audit
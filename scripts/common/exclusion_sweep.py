@@ -0,0 +1,149 @@
+"""
+RT 이상치 제거 기준 (하한, 상한) 일괄 비교
+- 조건 (예: Emotion H / N)별 RT를 한 번만 정렬하고 누적합을 만든 뒤
+  각 기준의 유지 구간을 searchsorted로 찾아 개수 / 합 / 제곱합을 계산
+- 기준 수백 개의 유지 개수, 평균, SD, t, Cohen's d를 한 번에 계산 (기준마다 DataFrame을 다시 거르지 않음)
+- participant를 주면 참가자 평균 기준 paired t-test / d_z도 계산
+
+유지 조건: lower <= RT <= upper (기존 스크립트의 마스크와 동일)
+"""
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+
+def threshold_grid(lowers, uppers):
+    """(하한, 상한) 모든 조합 → (lowers, uppers) 배열"""
+    lo, hi = np.meshgrid(np.asarray(lowers, dtype=np.float64),
+                         np.asarray(uppers, dtype=np.float64), indexing='ij')
+    return lo.ravel(), hi.ravel()
+
+
+def _cell_sums(rt, cell, n_cells, lowers, uppers):
+    """
+    셀별로 [lower, upper] 범위 안 값의 개수 / 합 / 제곱합 (n_cells, n_thresholds)
+
+    셀 코드와 값의 순위로 정수 키를 만들어 한 번 정렬 → 셀 × 기준 조회를 searchsorted 한 번으로 처리
+    """
+    values = np.unique(rt)
+    rank = np.searchsorted(values, rt)
+    stride = len(values) + 1
+    key = cell * stride + rank
+    order = np.argsort(key, kind='stable')
+    key = key[order]
+
+    # 수치 안정성: 전체 평균을 빼고 누적
+    center = rt.mean() if len(rt) else 0.0
+    x = rt[order] - center
+    csum = np.concatenate([[0.0], np.cumsum(x)])
+    csq = np.concatenate([[0.0], np.cumsum(x * x)])
+
+    r_lo = np.searchsorted(values, lowers, side='left')
+    r_hi = np.searchsorted(values, uppers, side='right')
+    base = np.arange(n_cells)[:, None] * stride
+    start = np.searchsorted(key, base + r_lo[None, :], side='left')
+    stop = np.searchsorted(key, base + r_hi[None, :], side='left')
+    stop = np.maximum(stop, start)
+
+    n = stop - start
+    s = csum[stop] - csum[start]
+    sq = csq[stop] - csq[start]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = s / n
+        var = np.where(n > 1, (sq - n * mean ** 2) / (n - 1), np.nan)
+    return n, mean + center, np.sqrt(np.maximum(var, 0.0))
+
+
+def exclusion_sweep(rt, condition, lowers, uppers, participant=None, conditions=('H', 'N')):
+    """
+    여러 (하한, 상한) 기준에서 두 조건의 RT 비교 통계를 한 번에 계산
+
+    Parameters:
+    -----------
+    rt : array-like
+        RT (trial 또는 region 단위)
+    condition : array-like
+        조건 라벨 (예: Emotion)
+    lowers, uppers : array-like
+        기준별 하한 / 상한 (같은 길이, 스칼라는 broadcast)
+    participant : array-like, optional
+        참가자 ID (주면 참가자 평균 기준 paired 통계 추가)
+    conditions : tuple
+        비교할 두 조건 (A, B), 차이는 A - B
+
+    Returns:
+    --------
+    DataFrame : 기준당 1행
+        Lower_bound, Upper_bound, N_retained, N_excluded, Pct_excluded,
+        N_<A>, N_<B>, Mean_<A>, Mean_<B>, SD_<A>, SD_<B>, Difference,
+        t_ind, p_ind, d_pooled (trial 단위 독립표본 t-test, scipy ttest_ind와 동일)
+        participant가 있으면 N_participants, PMean_<A>, PMean_<B>, PSD_<A>, PSD_<B>,
+        t_paired, p_paired, d_z (참가자 평균 기준, ttest_rel과 동일)
+    """
+    rt = np.asarray(rt, dtype=np.float64)
+    condition = np.asarray(condition, dtype=object)
+    lowers, uppers = np.broadcast_arrays(np.asarray(lowers, dtype=np.float64),
+                                         np.asarray(uppers, dtype=np.float64))
+    a, b = conditions
+
+    # 비교 대상 (두 조건, RT 결측 아님)만 사용
+    in_condition = (condition == a) | (condition == b)
+    use = in_condition & ~np.isnan(rt)
+    rt, is_b = rt[use], (condition[use] == b).astype(np.int64)
+
+    n, mean, sd = _cell_sums(rt, is_b, 2, lowers, uppers)
+    n_total = int(in_condition.sum())
+    n_retained = n.sum(axis=0)
+
+    df_ind = n[0] + n[1] - 2
+    with np.errstate(invalid='ignore', divide='ignore'):
+        pooled = np.sqrt(((n[0] - 1) * sd[0] ** 2 + (n[1] - 1) * sd[1] ** 2) / df_ind)
+        diff = mean[0] - mean[1]
+        t_ind = diff / (pooled * np.sqrt(1.0 / n[0] + 1.0 / n[1]))
+        p_ind = 2 * stats.t.sf(np.abs(t_ind), df_ind)
+
+    result = pd.DataFrame({
+        'Lower_bound': lowers, 'Upper_bound': uppers,
+        'N_retained': n_retained, 'N_excluded': n_total - n_retained,
+        'Pct_excluded': 100 * (n_total - n_retained) / n_total if n_total else np.nan,
+        f'N_{a}': n[0], f'N_{b}': n[1],
+        f'Mean_{a}': mean[0], f'Mean_{b}': mean[1],
+        f'SD_{a}': sd[0], f'SD_{b}': sd[1],
+        'Difference': diff, 't_ind': t_ind, 'p_ind': p_ind, 'd_pooled': diff / pooled,
+    })
+
+    if participant is not None:
+        p_code, p_ids = pd.factorize(np.asarray(participant, dtype=object)[use])
+        n_p = len(p_ids)
+        pn, pmean, _ = _cell_sums(rt, p_code * 2 + is_b, 2 * n_p, lowers, uppers)
+        mean_a, mean_b = pmean[0::2], pmean[1::2]
+        both = (pn[0::2] > 0) & (pn[1::2] > 0)
+        k = both.sum(axis=0)
+        d = np.where(both, mean_a - mean_b, 0.0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            d_mean = d.sum(axis=0) / k
+            d_sd = np.sqrt(np.where(both, (d - d_mean) ** 2, 0.0).sum(axis=0) / (k - 1))
+            t_paired = d_mean / (d_sd / np.sqrt(k))
+            p_paired = 2 * stats.t.sf(np.abs(t_paired), k - 1)
+
+        def _mean_sd(m):
+            m = np.where(both, m, 0.0)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                mu = m.sum(axis=0) / k
+                sd = np.sqrt(np.where(both, (m - mu) ** 2, 0.0).sum(axis=0) / (k - 1))
+            return mu, sd
+
+        pm_a, psd_a = _mean_sd(mean_a)
+        pm_b, psd_b = _mean_sd(mean_b)
+
+        result['N_participants'] = k
+        result[f'PMean_{a}'] = pm_a
+        result[f'PMean_{b}'] = pm_b
+        result[f'PSD_{a}'] = psd_a
+        result[f'PSD_{b}'] = psd_b
+        result['t_paired'] = t_paired
+        result['p_paired'] = p_paired
+        result['d_z'] = d_mean / d_sd
+
+    return result
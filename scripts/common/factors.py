@@ -0,0 +1,121 @@
+"""
+실험 설계 요인 범주형 인코딩 + 조건 셀 집계
+- Emotion, Plausibility, Region_Type: 고정된 범주 순서 (H/N, I/P/P_filler, Subject/Modifier/Spillover/Fact)
+- Participant_ID, List_ID, Item_ID, Base: 데이터에 나온 값을 정렬한 순서
+- 범주형 컬럼의 .cat.codes (int8/int16)를 NumPy에서 바로 사용
+- cell_summary: groupby(...).agg(['mean', 'std', 'count', 'sem'])와 같은 표를 코드 + bincount로 계산
+
+주의: mixedlm 등 formula의 기준 수준은 범주 순서의 첫 값
+      → Emotion / Plausibility는 문자열 컬럼과 같은 알파벳 순 (기준 수준 H, I 유지)
+"""
+
+import numpy as np
+import pandas as pd
+
+from common.spr_regions import REGION_TYPES
+
+# 고정 범주 순서 (데이터에 있는 값만 사용, 목록에 없는 값은 뒤에 정렬해서 추가)
+FACTOR_LEVELS = {
+    'Emotion': ['H', 'N'],
+    'Plausibility': ['I', 'P', 'P_filler'],
+    'Region_Type': REGION_TYPES,
+}
+
+# 데이터 값 정렬 순서를 쓰는 식별자 요인
+ID_FACTORS = ['Participant_ID', 'List_ID', 'Item_ID', 'Base']
+
+FACTOR_COLUMNS = list(FACTOR_LEVELS) + ID_FACTORS
+
+
+def _levels(values, fixed=None):
+    observed = pd.unique(values.dropna())
+    if fixed is None:
+        return sorted(observed)
+    present = set(observed)
+    return [v for v in fixed if v in present] + sorted(present - set(fixed))
+
+
+def encode_factors(df, columns=None):
+    """
+    설계 요인 컬럼을 범주형 (pandas Categorical)으로 변환
+
+    Parameters:
+    -----------
+    df : DataFrame
+    columns : list of str, optional
+        변환할 컬럼 (기본값: FACTOR_COLUMNS 중 df에 있는 컬럼)
+
+    Returns:
+    --------
+    DataFrame : 변환된 사본 (이미 범주형인 컬럼은 그대로)
+    """
+    columns = FACTOR_COLUMNS if columns is None else columns
+    df = df.copy()
+    for col in columns:
+        if col not in df.columns or isinstance(df[col].dtype, pd.CategoricalDtype):
+            continue
+        levels = _levels(df[col], FACTOR_LEVELS.get(col))
+        df[col] = pd.Categorical(df[col], categories=levels)
+    return df
+
+
+def factor_codes(column):
+    """
+    요인 컬럼 → (정수 코드, 범주) (결측치는 -1)
+
+    범주형이 아닌 컬럼은 정렬된 값 순서로 코드화 (groupby와 같은 순서)
+    """
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        return column.cat.codes.to_numpy().astype(np.int64), column.cat.categories
+    codes, uniques = pd.factorize(column, sort=True)
+    return codes.astype(np.int64), pd.Index(uniques)
+
+
+def cell_summary(df, value, by, stats=('mean', 'std', 'count')):
+    """
+    조건 셀별 요약 통계 (bincount 집계)
+
+    df.groupby(by)[value].agg(list(stats))와 같은 표 (관측된 셀만, 범주 순서)
+
+    Parameters:
+    -----------
+    df : DataFrame
+    value : str
+        집계할 컬럼 (예: 'RT', 'Rating')
+    by : str or list of str
+        요인 컬럼
+    stats : sequence of str
+        'mean', 'std', 'count', 'sem', 'sum' 중 선택
+
+    Returns:
+    --------
+    DataFrame : index = 요인 (MultiIndex), columns = stats
+    """
+    by = [by] if isinstance(by, str) else list(by)
+    values = df[value].to_numpy(dtype=np.float64)
+
+    codes, levels = zip(*(factor_codes(df[col]) for col in by))
+    shape = tuple(len(lv) for lv in levels)
+    keep = ~np.isnan(values)
+    for c in codes:
+        keep &= c >= 0
+    cell = np.ravel_multi_index([c[keep] for c in codes], shape)
+    x = values[keep]
+    n_cells = int(np.prod(shape))
+
+    count = np.bincount(cell, minlength=n_cells)
+    total = np.bincount(cell, weights=x, minlength=n_cells)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = total / count
+        sq = np.bincount(cell, weights=(x - mean[cell]) ** 2, minlength=n_cells)
+        std = np.where(count > 1, np.sqrt(sq / (count - 1)), np.nan)
+        sem = std / np.sqrt(count)
+    columns = {'mean': mean, 'std': std, 'count': count, 'sem': sem, 'sum': total}
+
+    observed = np.flatnonzero(count > 0)
+    if len(by) == 1:
+        index = pd.Index(levels[0][observed], name=by[0])
+    else:
+        positions = np.unravel_index(observed, shape)
+        index = pd.MultiIndex.from_arrays([lv[p] for lv, p in zip(levels, positions)], names=by)
+    return pd.DataFrame({s: columns[s][observed] for s in stats}, index=index)
@@ -0,0 +1,121 @@
+"""
+혼합모형 warm start 재적합 세션
+- 같은 모형 (formula, 그룹, random effect 구조)을 조금씩 다른 부분집합에 반복 적합할 때
+  (제거 기준 sweep, 참가자 추가 후 재분석 등) 직전 해를 다음 적합의 시작값으로 사용
+- mixedlm: 직전 결과의 공분산 (cov_re_unscaled, vcomp) → start_params
+- crossed_lmm: 직전 θ → theta0
+- 적합마다 반복 수 / 목적함수 평가 수 기록 → report()로 cold / warm 비교
+
+사용 예:
+    session = FitSession()
+    for upper in uppers:
+        subset = modifier_df[modifier_df['RT'].between(200, upper)]
+        result = session.fit("RT ~ Emotion", subset)
+    session.report()
+"""
+
+import pandas as pd
+from statsmodels.formula.api import mixedlm
+from statsmodels.regression.mixed_linear_model import MixedLMParams
+
+from common.crossed_lmm import CrossedLMM
+
+
+class FitSession:
+    """
+    모형별 마지막 해를 보관하는 적합 세션
+
+    Parameters:
+    -----------
+    warm_start : bool
+        False이면 항상 기본 시작값 (비교용)
+    """
+
+    def __init__(self, warm_start=True):
+        self.warm_start = warm_start
+        self.history = []
+        self._starts = {}
+
+    def reset(self, key=None):
+        """보관한 시작값 삭제 (key가 없으면 전체)"""
+        if key is None:
+            self._starts.clear()
+        else:
+            self._starts.pop(key, None)
+
+    @property
+    def last(self):
+        """마지막 적합 기록 (dict)"""
+        return self.history[-1] if self.history else None
+
+    def fit(self, formula, data, groups='Participant_ID', re_formula=None, crossed=None,
+            reml=False, key=None):
+        """
+        모형 적합 (같은 key의 직전 해로 warm start)
+
+        Parameters:
+        -----------
+        formula : str
+        data : DataFrame
+        groups : str
+            참가자 등 그룹 컬럼
+        re_formula : str, optional
+            random slope formula (예: "~Emotion")
+        crossed : str, optional
+            교차 무선효과 요인 (예: 'Item_ID') → common.crossed_lmm 사용
+        reml : bool
+            기본값 False (기존 스크립트와 동일)
+        key : hashable, optional
+            시작값을 공유할 모형 이름 (기본값: 모형 구조 전체)
+
+        Returns:
+        --------
+        mixedlm 결과 또는 CrossedLMMResult
+        """
+        key = key if key is not None else (formula, groups, re_formula, crossed, reml)
+        start = self._starts.get(key) if self.warm_start else None
+
+        if crossed:
+            model = CrossedLMM(formula, data, groups=(groups, crossed),
+                               re_formulas={groups: re_formula} if re_formula else None)
+            order = [f.name for f in model.factors]
+            theta0 = start[1] if start is not None and start[0] == order else None
+            result = model.fit(reml=reml, theta0=theta0)
+            iterations, evaluations = result.n_iter, result.n_fev
+            warm = theta0 is not None and len(theta0) == len(result.theta)
+            self._starts[key] = (order, result.theta)
+        else:
+            model = mixedlm(formula, data, groups=data[groups], re_formula=re_formula)
+            params = start if start is not None and _matches(start, model) else None
+            result = model.fit(reml=reml, start_params=params, full_output=True)
+            iterations = sum(max(len(h.get('allvecs', [])) - 1, 0) for h in result.hist)
+            evaluations = sum(h.get('fcalls', 0) for h in result.hist)
+            warm = params is not None
+            self._starts[key] = MixedLMParams.from_components(
+                result.fe_params.to_numpy(), cov_re=result.cov_re_unscaled, vcomp=result.vcomp)
+
+        self.history.append({'model': str(key[0]) if isinstance(key, tuple) else str(key),
+                             'n_obs': int(result.nobs), 'warm_start': warm,
+                             'iterations': int(iterations), 'evaluations': int(evaluations),
+                             'converged': bool(result.converged)})
+        return result
+
+    def summary(self):
+        """모형별 적합 수 / warm start 수 / 반복 수 / 평가 수 합계"""
+        history = pd.DataFrame(self.history, columns=['model', 'n_obs', 'warm_start', 'iterations',
+                                                      'evaluations', 'converged'])
+        return history.groupby('model', sort=False).agg(
+            fits=('n_obs', 'size'), warm_starts=('warm_start', 'sum'),
+            iterations=('iterations', 'sum'), evaluations=('evaluations', 'sum'),
+            converged=('converged', 'all'))
+
+    def report(self):
+        """summary() 출력"""
+        print("\n=== 모형 적합 세션 (warm start) ===")
+        print(self.summary())
+
+
+def _matches(params, model):
+    """보관한 시작값의 차원이 새 모형과 같은지"""
+    return (len(params.fe_params) == model.k_fe and params.cov_re.shape == (model.k_re, model.k_re)
+            and len(params.vcomp) == model.k_vc)
@@ -0,0 +1,214 @@
+"""
+리스트 문자열 셀 (Regions, Region_RTs) 일괄 파서
+- google-apps-script.js의 saveSPRData가 저장한 '[650,433,544]', '["탈렌족은","저급한"]' 형태
+- 컬럼 전체를 한 번에 파싱 (eval 사용하지 않음)
+  - 숫자: 정수만 있으면 바이트 배열 연산, 아니면 하나의 JSON 문서로 이어 붙여 파싱
+  - 텍스트: 고유한 셀만 파싱 (같은 문장은 한 번만)
+- 형식이 잘못된 셀은 빈 리스트로 처리하고 행 번호를 돌려줌 (중간에 멈추지 않음)
+  JSON이 아닌 Python 리스트 표기 (작은따옴표 등)는 ast.literal_eval로 안전하게 처리
+
+offset 표현:
+    행 i의 값 = values[offsets[i]:offsets[i+1]]
+"""
+
+import ast
+import json
+from itertools import chain
+
+import numpy as np
+import pandas as pd
+
+_BRACKETS = str.maketrans('', '', '[]')
+
+# float64로 정확히 표현되는 정수 자릿수 범위
+_POWERS_OF_10 = 10.0 ** np.arange(16)
+
+
+def parse_cell(cell):
+    """
+    리스트 문자열 셀 1개 파싱 (결측치는 빈 리스트)
+
+    Raises:
+    -------
+    ValueError : 리스트 표기가 아닌 경우
+    """
+    if cell is None or (isinstance(cell, float) and np.isnan(cell)):
+        return []
+    if not isinstance(cell, str):
+        raise ValueError(f"문자열이 아님: {cell!r}")
+    try:
+        value = json.loads(cell)
+    except ValueError:
+        try:
+            value = ast.literal_eval(cell)
+        except (ValueError, SyntaxError, MemoryError, RecursionError):
+            raise ValueError(f"리스트 형식이 아님: {cell[:40]!r}") from None
+    if not isinstance(value, (list, tuple)):
+        raise ValueError(f"리스트 형식이 아님: {cell[:40]!r}")
+    return list(value)
+
+
+def parse_cells(cells, numeric=False):
+    """
+    셀별 파싱 (잘못된 셀은 빈 리스트 + 행 번호 기록)
+
+    Returns:
+    --------
+    tuple : (lists, bad_rows)
+    """
+    lists, bad_rows = [], []
+    for row, cell in enumerate(cells):
+        try:
+            value = parse_cell(cell)
+            if numeric and not all(isinstance(v, (int, float)) and not isinstance(v, bool)
+                                   for v in value):
+                raise ValueError("숫자가 아닌 값 포함")
+        except ValueError:
+            value = []
+            bad_rows.append(row)
+        lists.append(value)
+    return lists, np.asarray(bad_rows, dtype=np.int64)
+
+
+def _offsets(lengths):
+    offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    return offsets
+
+
+def _parse_integer_tokens(buf):
+    """
+    '[', ']', ',' 와 숫자로만 이루어진 바이트 배열에서 정수 토큰을 순서대로 추출
+
+    Returns:
+    --------
+    ndarray (n_tokens,) float64 (자릿수가 너무 많으면 None)
+    """
+    digits = np.flatnonzero((buf >= ord('0')) & (buf <= ord('9')))
+    if len(digits) == 0:
+        return np.zeros(0)
+    token_start = np.ones(len(digits), dtype=bool)
+    token_start[1:] = np.diff(digits) > 1
+    token_id = np.cumsum(token_start) - 1
+    token_end = np.append(np.flatnonzero(token_start)[1:], len(digits)) - 1
+    power = digits[token_end][token_id] - digits
+    if power.max() >= len(_POWERS_OF_10):
+        return None
+    weights = (buf[digits] - ord('0')) * _POWERS_OF_10[power]
+    return np.bincount(token_id, weights=weights)
+
+
+def _parse_numbers_bulk(cells):
+    """컬럼 전체 일괄 파싱 (형식이 예상과 다르면 None)"""
+    try:
+        buf = np.frombuffer(''.join(cells).encode('ascii'), dtype=np.uint8)
+    except (TypeError, UnicodeEncodeError):
+        return None
+
+    opens = np.flatnonzero(buf == ord('['))
+    closes = np.flatnonzero(buf == ord(']'))
+    if len(opens) != len(cells) or len(closes) != len(cells):
+        return None
+    # 셀마다 '['로 시작하고 ']'로 끝나야 함 (전체 개수만 맞고 셀 경계가 어긋난 입력 방지)
+    cell_lengths = np.fromiter(map(len, cells), dtype=np.int64, count=len(cells))
+    ends = np.cumsum(cell_lengths)
+    starts = ends - cell_lengths
+    if not (np.array_equal(opens, starts) and np.array_equal(closes, ends - 1)):
+        return None
+
+    # 행별 개수: 괄호 사이 쉼표 개수
+    commas = np.flatnonzero(buf == ord(','))
+    lengths = np.searchsorted(commas, closes) - np.searchsorted(commas, opens) + 1
+    lengths[closes - opens == 1] = 0
+
+    values = None
+    is_digit = (buf >= ord('0')) & (buf <= ord('9'))
+    if len(opens) + len(closes) + len(commas) + is_digit.sum() == len(buf):
+        values = _parse_integer_tokens(buf)
+    if values is None:
+        body = ','.join(c for c in cells if c != '[]').translate(_BRACKETS)
+        try:
+            values = np.asarray(json.loads('[' + body + ']'), dtype=np.float64)
+        except (ValueError, TypeError):
+            return None
+    if len(values) != lengths.sum():
+        return None
+    return lengths, values
+
+
+def parse_number_column(column):
+    """
+    숫자 리스트 컬럼 (예: Region_RTs) 전체 파싱
+
+    Parameters:
+    -----------
+    column : Series
+        리스트 문자열 컬럼
+
+    Returns:
+    --------
+    tuple : (offsets, values, bad_rows)
+        offsets : ndarray int64 (n_rows + 1,)
+        values : ndarray float64 평면 배열
+        bad_rows : ndarray int64 형식이 잘못된 행 번호 (0부터, 위치 기준)
+    """
+    cells = column.to_numpy(dtype=object, na_value='[]')
+    bulk = _parse_numbers_bulk(cells)
+    if bulk is not None:
+        lengths, values = bulk
+        return _offsets(lengths), values, np.zeros(0, dtype=np.int64)
+
+    lists, bad_rows = parse_cells(cells, numeric=True)
+    lengths = np.fromiter(map(len, lists), dtype=np.int64, count=len(lists))
+    values = np.asarray(list(chain.from_iterable(lists)), dtype=np.float64)
+    return _offsets(lengths), values, bad_rows
+
+
+def parse_unique_lists(column):
+    """
+    리스트 컬럼의 고유한 셀만 파싱 (예: Regions - 같은 문장은 한 번만)
+
+    Returns:
+    --------
+    tuple : (codes, lists, bad_rows)
+        codes : ndarray (n_rows,) 행별 lists 인덱스 (결측치는 len(lists) - 1의 빈 리스트)
+        lists : list of list 고유 셀 파싱 결과 (마지막은 결측치용 빈 리스트)
+        bad_rows : ndarray int64 형식이 잘못된 행 번호 (0부터, 위치 기준)
+    """
+    codes, uniques = pd.factorize(column)
+    lists, bad_uniques = parse_cells(np.asarray(uniques, dtype=object))
+    lists.append([])
+    codes = np.where(codes < 0, len(lists) - 1, codes)
+    bad_rows = np.flatnonzero(np.isin(codes, bad_uniques))
+    return codes, lists, bad_rows
+
+
+def parse_list_column(column):
+    """
+    리스트 컬럼 전체 파싱 → offset + 평면 값 배열 (텍스트 등 임의 값)
+
+    Returns:
+    --------
+    tuple : (offsets, values, bad_rows)
+        values : ndarray of object 평면 배열
+    """
+    codes, lists, bad_rows = parse_unique_lists(column)
+    sizes = np.fromiter(map(len, lists), dtype=np.int64, count=len(lists))
+    flat = np.empty(int(sizes.sum()), dtype=object)
+    flat[:] = list(chain.from_iterable(lists))
+
+    lengths = sizes[codes]
+    offsets = _offsets(lengths)
+    starts = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+    positions = np.arange(offsets[-1]) - np.repeat(offsets[:-1], lengths)
+    return offsets, flat[np.repeat(starts[codes], lengths) + positions], bad_rows
+
+
+def report_malformed(name, bad_rows, index=None, limit=10):
+    """형식이 잘못된 행 출력 (index가 있으면 DataFrame 행 라벨로 표시)"""
+    if len(bad_rows) == 0:
+        return
+    labels = list(index[bad_rows]) if index is not None else list(bad_rows)
+    shown = ', '.join(str(label) for label in labels[:limit])
+    more = f" 외 {len(labels) - limit}개" if len(labels) > limit else ''
+    print(f"경고: {name} 형식 오류 {len(labels)}행 (빈 리스트로 처리): {shown}{more}")
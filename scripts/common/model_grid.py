@@ -0,0 +1,254 @@
+"""
+혼합효과 모형 (mixedlm) 일괄 적합 - 프로세스 풀
+- 모형 명세 (formula, 데이터 부분집합, 그룹 컬럼) 목록을 받아 여러 프로세스에서 동시에 적합
+- 데이터는 공유 메모리 (multiprocessing.shared_memory)에 한 번만 올림
+  → 작업마다 DataFrame을 pickle하지 않고, 각 작업은 부분집합 조건 (dict)만 전달
+- 결과: 모형 × 고정효과 항 tidy 표 (계수, SE, z, p, 95% CI, 수렴 여부, 경고 / 오류)
+
+모형 명세 (dict):
+    name      : 결과 표의 model 이름
+    formula   : 예: "RT ~ Emotion * Plausibility"
+    data      : 데이터 이름 (fit_model_grid의 datasets 키, 기본값 첫 번째)
+    subset    : {컬럼: 값 또는 값 목록} (선택)
+    groups    : 그룹 (random intercept) 컬럼 (기본값 'Participant_ID')
+    re_formula: random slope formula (선택, 예: "~Emotion")
+    crossed   : 교차 무선효과 요인 (선택, 예: 'Item_ID') → common.crossed_lmm으로 groups × crossed 적합
+    reml      : 기본값 False (기존 스크립트와 동일)
+
+사용 예:
+    specs = grid_specs({'H1': "RT ~ Emotion", 'H2': "RT ~ Emotion * Plausibility"},
+                       'Region_Type', REGION_TYPES)
+    table = fit_model_grid({'spr': parsed_df}, specs)
+"""
+
+import os
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from common.crossed_lmm import fit_crossed_lmm
+
+RESULT_COLUMNS = ['model', 'data', 'term', 'coef', 'se', 'z', 'p', 'ci_low', 'ci_high',
+                  'n_obs', 'n_groups', 'llf', 'converged', 'warning', 'error']
+
+# 작업 프로세스에서 공유 메모리로 복원한 데이터 (프로세스마다 1회)
+_WORKER_DATA = {}
+_WORKER_BLOCKS = []
+
+
+class SharedFrames:
+    """
+    DataFrame 여러 개를 컬럼별 공유 메모리 블록으로 보관
+
+    - 수치 / bool 컬럼: 값 그대로
+    - 범주형 컬럼: 코드 배열 + 범주 목록 (범주 순서 = formula 기준 수준 유지)
+    - 그 외 (문자열 등): factorize 코드 + 고유값 목록
+
+    meta (블록 이름, dtype, 범주)만 pickle되어 작업 프로세스로 전달됨
+    """
+
+    def __init__(self, datasets):
+        self.blocks = []
+        self.meta = {}
+        try:
+            for name, df in datasets.items():
+                self.meta[name] = [self._share(col, df[col]) for col in df.columns]
+        except Exception:
+            self.close()
+            raise
+
+    def _share(self, col, series):
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            kind, values, labels = 'category', series.cat.codes.to_numpy(), list(series.cat.categories)
+        elif series.dtype.kind in 'biuf':
+            kind, values, labels = 'values', series.to_numpy(), None
+        else:
+            codes, uniques = pd.factorize(series)
+            kind, values, labels = 'object', codes, list(uniques)
+
+        values = np.ascontiguousarray(values)
+        block = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1))
+        self.blocks.append(block)
+        np.ndarray(values.shape, dtype=values.dtype, buffer=block.buf)[:] = values
+        return (col, block.name, values.dtype.str, len(values), kind, labels)
+
+    def close(self):
+        for block in self.blocks:
+            block.close()
+            block.unlink()
+        self.blocks = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _attach(meta):
+    """공유 메모리 meta → DataFrame dict (값 배열은 공유 메모리 view)"""
+    datasets = {}
+    for name, columns in meta.items():
+        data = {}
+        for col, block_name, dtype, n, kind, labels in columns:
+            block = shared_memory.SharedMemory(name=block_name)
+            _WORKER_BLOCKS.append(block)
+            values = np.ndarray((n,), dtype=np.dtype(dtype), buffer=block.buf)
+            if kind == 'category':
+                data[col] = pd.Categorical.from_codes(values, labels)
+            elif kind == 'object':
+                uniques = np.array(labels + [np.nan], dtype=object)
+                data[col] = uniques[values]
+            else:
+                data[col] = values
+        datasets[name] = pd.DataFrame(data, copy=False)
+    return datasets
+
+
+def _init_worker(meta):
+    _WORKER_DATA.update(_attach(meta))
+
+
+def _subset(df, subset):
+    if not subset:
+        return df
+    mask = np.ones(len(df), dtype=bool)
+    for col, value in subset.items():
+        values = value if isinstance(value, (list, tuple, set)) else [value]
+        mask &= df[col].isin(values).to_numpy()
+    df = df[mask]
+    # 부분집합에 없는 범주 제거 (design matrix full rank 유지)
+    for col in df.columns:
+        if isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].cat.remove_unused_categories()
+    return df
+
+
+def fit_spec(spec, datasets):
+    """
+    모형 명세 1개 적합 → tidy 행 목록 (실패 시 error 행 1개)
+
+    Parameters:
+    -----------
+    spec : dict
+        모듈 docstring의 모형 명세
+    datasets : dict of DataFrame
+    """
+    from statsmodels.formula.api import mixedlm
+
+    data_name = spec.get('data', next(iter(datasets)))
+    base = {'model': spec.get('name', spec['formula']), 'data': data_name}
+    try:
+        df = _subset(datasets[data_name], spec.get('subset'))
+        groups = spec.get('groups', 'Participant_ID')
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter('always')
+            if spec.get('crossed'):
+                re_formulas = {groups: spec['re_formula']} if spec.get('re_formula') else None
+                result = fit_crossed_lmm(spec['formula'], df, groups=(groups, spec['crossed']),
+                                         re_formulas=re_formulas, reml=spec.get('reml', False))
+            else:
+                model = mixedlm(spec['formula'], df, groups=groups,
+                                re_formula=spec.get('re_formula'), missing='drop')
+                result = model.fit(reml=spec.get('reml', False))
+    except Exception as e:
+        return [dict(base, converged=False, error=f"{type(e).__name__}: {e}")]
+
+    if spec.get('crossed'):
+        ci = result.conf_int()
+        messages = sorted({str(w.message).split('\n')[0] for w in caught})
+        shared = dict(base, n_obs=result.nobs, n_groups=result.n_groups[groups], llf=result.llf,
+                      converged=result.converged, warning='; '.join(messages) or None, error=None)
+        return [dict(shared, term=term, coef=result.params[term], se=result.bse[term],
+                     z=result.tvalues[term], p=result.pvalues[term],
+                     ci_low=ci.loc[term, 0], ci_high=ci.loc[term, 1])
+                for term in result.params.index]
+
+    terms = result.fe_params.index
+    ci = result.conf_int().loc[terms]
+    messages = sorted({str(w.message).split('\n')[0] for w in caught})
+    shared = dict(base, n_obs=int(result.nobs), n_groups=len(result.model.group_labels),
+                  llf=float(result.llf), converged=bool(result.converged),
+                  warning='; '.join(messages) or None, error=None)
+    return [dict(shared, term=term, coef=result.fe_params[term], se=result.bse_fe[term],
+                 z=result.tvalues[term], p=result.pvalues[term],
+                 ci_low=ci.loc[term, 0], ci_high=ci.loc[term, 1])
+            for term in terms]
+
+
+def _fit_in_worker(spec):
+    return fit_spec(spec, _WORKER_DATA)
+
+
+def fit_model_grid(datasets, specs, processes=None):
+    """
+    모형 명세 목록을 프로세스 풀에서 적합
+
+    Parameters:
+    -----------
+    datasets : dict of DataFrame
+        데이터 이름 → DataFrame (예: {'spr': parsed_df, 'rating': rating_data})
+    specs : list of dict
+        모형 명세
+    processes : int, optional
+        프로세스 수 (기본값: CPU 수, 1이면 현재 프로세스에서 순서대로)
+
+    Returns:
+    --------
+    DataFrame : RESULT_COLUMNS (모형 × 고정효과 항, specs 순서)
+    """
+    specs = list(specs)
+    processes = min(processes or os.cpu_count() or 1, max(len(specs), 1))
+
+    if processes == 1:
+        rows = [fit_spec(spec, datasets) for spec in specs]
+    else:
+        with SharedFrames(datasets) as shared:
+            with ProcessPoolExecutor(max_workers=processes, initializer=_init_worker,
+                                     initargs=(shared.meta,)) as pool:
+                rows = list(pool.map(_fit_in_worker, specs))
+
+    return pd.DataFrame([row for model_rows in rows for row in model_rows],
+                        columns=RESULT_COLUMNS)
+
+
+def grid_specs(formulas, by=None, levels=None, data=None, **options):
+    """
+    formula × 부분집합 수준 조합의 모형 명세 생성
+
+    Parameters:
+    -----------
+    formulas : dict
+        이름 → formula
+    by : str, optional
+        부분집합 컬럼 (예: 'Region_Type')
+    levels : list or dict, optional
+        by의 수준 (각 수준마다 모형 1개), dict이면 이름 → 수준 (값 목록이면 묶어서 1개)
+    data : str, optional
+        데이터 이름
+    **options
+        groups, re_formula, reml 등 모든 명세에 공통
+
+    Returns:
+    --------
+    list of dict
+    """
+    if by is None:
+        levels = {None: None}
+    elif not isinstance(levels, dict):
+        levels = {level: level for level in levels}
+
+    specs = []
+    for name, formula in formulas.items():
+        for label, level in levels.items():
+            spec = dict(options, name=name if by is None else f"{name} | {label}",
+                        formula=formula)
+            if by is not None:
+                spec['subset'] = {by: level}
+            if data is not None:
+                spec['data'] = data
+            specs.append(spec)
+    return specs
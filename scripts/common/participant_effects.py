@@ -0,0 +1,155 @@
+"""
+참가자별 효과 (H1 / H2 / H3 지표)
+- 참가자마다 DataFrame 전체를 다시 필터링하는 반복문 (참가자 × 행) 대신
+  groupby 한 번으로 참가자 × 조건 셀의 합 / 개수 / 제곱합 pivot을 만들고 모든 참가자 지표를 열 연산으로 계산
+- 여러 셀을 합친 평균 (예: Emotion='H' 전체)은 셀 합 / 셀 개수의 합 → trial 가중 (기존 p_data[...].mean()과 같음)
+- 참가자 순서는 자료에 처음 나온 순서 (기존 unique() 반복과 같은 출력 순서)
+
+사용 예:
+    h3_df = h3_effects(rating_clean)
+    effects_df = h1_effects(mod_df).sort_values('Difference', ascending=False)
+"""
+
+import numpy as np
+import pandas as pd
+
+
+class ParticipantCells:
+    """
+    참가자 × 조건 셀 충분통계량 (합, 개수, 제곱합)
+
+    Parameters:
+    -----------
+    data : DataFrame
+    value : str
+        종속변수 컬럼 (예: 'RT', 'Rating'), 결측치는 제외
+    factors : tuple
+        조건 요인 컬럼
+    cluster : str
+        참가자 컬럼
+
+    Attributes:
+    -----------
+    sums, counts, sumsq : DataFrame (참가자 × 셀), 자료가 없는 셀은 0
+    """
+
+    def __init__(self, data, value, factors=('Emotion', 'Plausibility'), cluster='Participant_ID'):
+        self.factors = list(factors)
+        self.cluster = cluster
+        df = data[data[value].notna()]
+        x = df[value].to_numpy(dtype=np.float64)
+        keys = {col: df[col].to_numpy() for col in [cluster] + self.factors}
+        table = (pd.DataFrame({**keys, 'sum': x, 'count': np.ones(len(x), dtype=np.int64), 'sumsq': x * x})
+                 .groupby([cluster] + self.factors, sort=True).sum())
+        wide = table.unstack(self.factors, fill_value=0) if len(table) else table
+        wide = wide.reindex(pd.unique(keys[cluster])).rename_axis(cluster)
+        self.sums, self.counts, self.sumsq = wide['sum'], wide['count'], wide['sumsq']
+
+    @property
+    def participants(self):
+        return self.sums.index
+
+    def _columns(self, levels):
+        unknown = set(levels) - set(self.factors)
+        if unknown:
+            raise ValueError(f"요인이 아닌 컬럼: {sorted(unknown)}")
+        keep = np.ones(self.sums.shape[1], dtype=bool)
+        for factor, level in levels.items():
+            keep &= np.asarray(self.sums.columns.get_level_values(factor) == level)
+        return keep
+
+    def _pooled(self, levels):
+        keep = self._columns(levels)
+        return (self.sums.loc[:, keep].sum(axis=1), self.counts.loc[:, keep].sum(axis=1),
+                self.sumsq.loc[:, keep].sum(axis=1))
+
+    def count(self, **levels):
+        """참가자별 자료 수 (levels에 맞는 셀 합계)"""
+        return self._pooled(levels)[1]
+
+    def mean(self, **levels):
+        """
+        참가자별 평균 (levels에 맞는 셀을 합친 trial 가중 평균, 자료가 없으면 NaN)
+
+        예: mean(Emotion='H'), mean(Emotion='H', Plausibility='P')
+        """
+        total, n, _ = self._pooled(levels)
+        return total / n.where(n > 0)
+
+    def std(self, **levels):
+        """참가자별 표준편차 (ddof=1, 자료가 2개 미만이면 NaN)"""
+        total, n, sq = self._pooled(levels)
+        n = n.where(n > 1)
+        return np.sqrt(((sq - total ** 2 / n) / (n - 1)).clip(lower=0))
+
+    def difference(self, factor, first, second, **levels):
+        """참가자별 mean(factor=first) - mean(factor=second) (나머지 levels 고정)"""
+        return self.mean(**{factor: first}, **levels) - self.mean(**{factor: second}, **levels)
+
+
+def h1_effects(data, value='RT', cluster='Participant_ID'):
+    """
+    참가자별 H1 효과 (혐오 - 중립)
+
+    Returns:
+    --------
+    DataFrame : Participant_ID, Hate_RT, Neutral_RT, Difference,
+                Cohens_d (차이 / 혐오 조건 SD, SD가 없으면 0), Direction
+    """
+    cells = ParticipantCells(data, value, factors=('Emotion',), cluster=cluster)
+    hate, neutral = cells.mean(Emotion='H'), cells.mean(Emotion='N')
+    hate_std = cells.std(Emotion='H')
+    diff = hate - neutral
+    return pd.DataFrame({
+        cluster: cells.participants,
+        'Hate_RT': hate.to_numpy(),
+        'Neutral_RT': neutral.to_numpy(),
+        'Difference': diff.to_numpy(),
+        'Cohens_d': np.where(hate_std > 0, diff / hate_std, 0.0),
+        'Direction': np.where(diff > 0, 'H>N', 'N>H'),
+    })
+
+
+def h2_effects(data, value='RT', cluster='Participant_ID'):
+    """
+    참가자별 H2 그럴듯함 효과 (읽기 시간: 비그럴듯 - 그럴듯)
+
+    Returns:
+    --------
+    DataFrame : Participant_ID, Hate_Plaus_Effect, Neutral_Plaus_Effect,
+                Interaction (혐오 - 중립 그럴듯함 효과)
+    """
+    cells = ParticipantCells(data, value, cluster=cluster)
+    hate = cells.difference('Plausibility', 'I', 'P', Emotion='H')
+    neutral = cells.difference('Plausibility', 'I', 'P', Emotion='N')
+    return pd.DataFrame({
+        cluster: cells.participants,
+        'Hate_Plaus_Effect': hate.to_numpy(),
+        'Neutral_Plaus_Effect': neutral.to_numpy(),
+        'Interaction': (hate - neutral).to_numpy(),
+    })
+
+
+def h3_effects(data, value='Rating', cluster='Participant_ID'):
+    """
+    참가자별 H3 기억 왜곡 지표 (평정: 그럴듯 - 비그럴듯)
+
+    Returns:
+    --------
+    DataFrame : Participant_ID, Hate_Plaus_Effect, Neutral_Plaus_Effect,
+                Distortion (혐오 - 중립 그럴듯함 효과, 음수 = 혐오에서 구별 손상),
+                Hate_Mean_Rating, Neutral_Mean_Rating, Hate_Bias (혐오 - 중립 평균 평정)
+    """
+    cells = ParticipantCells(data, value, cluster=cluster)
+    hate = cells.difference('Plausibility', 'P', 'I', Emotion='H')
+    neutral = cells.difference('Plausibility', 'P', 'I', Emotion='N')
+    hate_mean, neutral_mean = cells.mean(Emotion='H'), cells.mean(Emotion='N')
+    return pd.DataFrame({
+        cluster: cells.participants,
+        'Hate_Plaus_Effect': hate.to_numpy(),
+        'Neutral_Plaus_Effect': neutral.to_numpy(),
+        'Distortion': (hate - neutral).to_numpy(),
+        'Hate_Mean_Rating': hate_mean.to_numpy(),
+        'Neutral_Mean_Rating': neutral_mean.to_numpy(),
+        'Hate_Bias': (hate_mean - neutral_mean).to_numpy(),
+    })
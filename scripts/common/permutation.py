@@ -0,0 +1,258 @@
+"""
+참가자 내 순열 검정 (2 × 2 반복측정: 주효과 + 상호작용)
+- 참가자 6-7명에서 mixedlm / ttest_rel의 근사 p값 대신 순열 분포 기준 p값
+- trial 순열: 교환 단위 (strata, 예: 참가자 × Base) 안에서만 조건 라벨 재배치
+  → Latin square 배정 (참가자마다 Base별로 네 조건이 한 번씩) 유지
+  - 검정할 효과를 뺀 참가자별 축소 모형의 잔차를 재배치 (Freedman-Lane)
+    → 상호작용 검정 시 주효과는 그대로 두고 상호작용만 귀무가설
+  - 참가자별 조건 평균 대비는 trial 가중치 벡터 (대비 계수 / 셀 크기)를 곱한 뒤
+    참가자 구간별 np.add.reduceat 합 (순열 × trial 연산, 참가자 수와 무관)
+    (조건 코드 배열은 고정, 값만 재배치하므로 셀 크기 / 가중치 불변)
+  - 순열은 chunk_size 단위로 나누고 chunk마다 SeedSequence.spawn 독립 난수 스트림
+    → 프로세스 풀로 병렬화, processes 수와 무관하게 같은 seed면 같은 결과
+- 참가자 부호 뒤집기: 참가자별 대비의 부호 2^참가자 조합 전체 (exact_limit 이하이면 정확 p값)
+
+통계량: 참가자별 대비 (셀 평균 기준)의 one-sample t
+    A          : (A1 - A2) 평균 (B 수준 평균)
+    B          : (B1 - B2) 평균
+    A × B      : (A1B1 - A1B2) - (A2B1 - A2B2)
+
+사용 예:
+    test = WithinPermutationTest(critical_df, 'RT', strata=['Participant_ID', 'Base'],
+                                 unit='Trial_Index', n_perm=20000, seed=42)
+    print(test.table())
+"""
+
+import numpy as np
+import pandas as pd
+
+# 블록당 최대 (순열 × trial) 원소 수
+DEFAULT_BLOCK_ELEMENTS = 2 ** 22
+
+# 셀 순서 (A1B1, A1B2, A2B1, A2B2)별 대비 계수
+CONTRASTS = np.array([[0.5, 0.5, -0.5, -0.5],
+                      [0.5, -0.5, 0.5, -0.5],
+                      [1.0, -1.0, -1.0, 1.0]])
+
+# 축소 모형 설계 (절편, A, B, A × B)
+_DESIGN = np.array([[1, 0.5, 0.5, 0.25],
+                    [1, 0.5, -0.5, -0.25],
+                    [1, -0.5, 0.5, -0.25],
+                    [1, -0.5, -0.5, 0.25]])
+
+# 작업 프로세스의 잔차 / 가중치 (프로세스마다 1회 전달)
+_WORKER_STATE = {}
+
+
+def _t_stat(contrasts):
+    """참가자별 대비 (..., 참가자) → one-sample t"""
+    k = contrasts.shape[-1]
+    mean = contrasts.mean(axis=-1)
+    sd = contrasts.std(axis=-1, ddof=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return mean / (sd / np.sqrt(k))
+
+
+def _permutation_chunk(state, n_perm, seed_seq, block_elements):
+    """
+    독립 난수 스트림 1개로 n_perm개 순열 → (n_perm, 효과) t 값
+
+    strata 코드 순으로 정렬된 trial에 (난수 + strata 코드)를 argsort → strata 안 순열 인덱스
+    """
+    rng = np.random.default_rng(seed_seq)
+    strata, residuals, fixed, weights = (state['strata'], state['residuals'],
+                                         state['fixed'], state['weights'])
+    by_cluster, bounds = state['by_cluster'], state['bounds']
+    n = len(strata)
+    out = np.empty((n_perm, len(weights)))
+    rows = max(1, block_elements // max(n, 1))
+    for start in range(0, n_perm, rows):
+        stop = min(start + rows, n_perm)
+        order = np.argsort(rng.random((stop - start, n)) + strata, axis=1)[:, by_cluster]
+        for e, w in enumerate(weights):
+            sums = np.add.reduceat(residuals[order, e] * w, bounds, axis=1)
+            out[start:stop, e] = _t_stat(fixed[e] + sums)
+    return out
+
+
+def _init_worker(state):
+    _WORKER_STATE['state'] = state
+
+
+def _permutation_chunk_in_worker(args):
+    n_perm, seed_seq, block_elements = args
+    return _permutation_chunk(_WORKER_STATE['state'], n_perm, seed_seq, block_elements)
+
+
+def sign_flip_p(contrasts, exact_limit=2 ** 16, n_flip=100000, seed=None):
+    """
+    참가자별 대비의 부호 뒤집기 순열 p값 (양측, t 기준)
+
+    Parameters:
+    -----------
+    contrasts : array-like (참가자,)
+    exact_limit : int
+        2^참가자가 이 값 이하이면 모든 부호 조합 (정확 p값)
+    n_flip : int
+        그보다 많으면 무작위 부호 조합 수 (Monte Carlo)
+
+    Returns:
+    --------
+    tuple : (p값, 정확 여부)
+    """
+    c = np.asarray(contrasts, dtype=np.float64)
+    k = len(c)
+    observed = abs(_t_stat(c))
+    exact = 2 ** k <= exact_limit
+    if exact:
+        signs = ((np.arange(2 ** k)[:, None] >> np.arange(k)) & 1) * 2 - 1
+    else:
+        signs = np.random.default_rng(seed).choice([-1, 1], size=(n_flip, k))
+    # 부호만 바뀌므로 제곱합은 고정: 평균만 행렬 곱
+    mean = signs @ c / k
+    sd = np.sqrt(np.maximum((c @ c - k * mean ** 2) / (k - 1), 0.0))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        t = np.abs(mean / (sd / np.sqrt(k)))
+    hits = (t >= observed * (1 - 1e-12)).sum()
+    p = hits / len(signs) if exact else (hits + 1) / (len(signs) + 1)
+    return float(p), exact
+
+
+class WithinPermutationTest:
+    """
+    2 × 2 참가자 내 설계의 순열 검정
+
+    Parameters:
+    -----------
+    data : DataFrame
+    value : str
+        종속변수 컬럼 (예: 'RT')
+    factors : tuple
+        두 요인 컬럼 (A, B)
+    levels : tuple
+        요인별 (수준1, 수준2), 대비 방향은 수준1 - 수준2
+    cluster : str
+        참가자 컬럼
+    strata : list of str, optional
+        라벨을 교환할 단위 (기본값: cluster)
+        예: ['Participant_ID', 'Base'] → 참가자 × Base 안에서만 교환 (Latin square 유지)
+    unit : str, optional
+        trial 식별 컬럼 (예: 'Trial_Index'), 주어지면 region 행을 trial 평균으로 묶어서 교환
+    n_perm : int
+    seed : int or np.random.SeedSequence, optional
+    processes : int
+        프로세스 수 (1이면 현재 프로세스)
+    chunk_size : int
+        난수 스트림 1개가 담당하는 순열 수
+    exact_limit : int
+        부호 뒤집기 정확 p값 한도 (2^참가자)
+
+    Attributes:
+    -----------
+    contrasts : DataFrame (참가자 × 효과)
+    null : ndarray (n_perm, 효과) trial 순열 t 분포
+    n_clusters : int
+    """
+
+    def __init__(self, data, value, factors=('Emotion', 'Plausibility'),
+                 levels=(('H', 'N'), ('I', 'P')), cluster='Participant_ID', strata=None, unit=None,
+                 n_perm=10000, seed=None, processes=1, chunk_size=10000, exact_limit=2 ** 16,
+                 block_elements=DEFAULT_BLOCK_ELEMENTS):
+        (a, b), ((a1, a2), (b1, b2)) = factors, levels
+        strata = list(strata) if strata is not None else [cluster]
+        self.effects = [a, b, f'{a} × {b}']
+        self.n_perm = int(n_perm)
+        self.exact_limit = exact_limit
+
+        df = data[data[value].notna() & data[a].isin([a1, a2]) & data[b].isin([b1, b2])]
+        cell = ((df[a] == a2).to_numpy().astype(np.int64) * 2 + (df[b] == b2).to_numpy())
+        df = pd.DataFrame({'value': df[value].to_numpy(dtype=np.float64), 'cell': cell,
+                           'cluster': df[cluster].to_numpy(),
+                           'strata': df[strata].astype(str).agg('|'.join, axis=1).to_numpy(),
+                           'unit': df[unit].to_numpy() if unit else np.arange(len(df))})
+        # region 행 → trial 평균 (같은 trial의 행은 함께 이동)
+        df = df.groupby(['cluster', 'strata', 'unit', 'cell'], sort=True, observed=True)['value'].mean().reset_index()
+        if df.duplicated(['cluster', 'unit']).any():
+            raise ValueError(f"같은 {unit}에 여러 조건이 있습니다")
+
+        # 네 셀이 모두 있는 참가자만
+        cells = df.groupby('cluster')['cell'].nunique()
+        complete = cells.index[cells == 4]
+        self.dropped = [c for c in cells.index if c not in set(complete)]
+        df = df[df['cluster'].isin(complete)].sort_values(['strata', 'unit'], kind='stable')
+
+        cluster_codes, self.clusters = pd.factorize(df['cluster'], sort=True)
+        self.n_clusters = n_p = len(self.clusters)
+        strata_codes = pd.factorize(df['strata'])[0].astype(np.float64)
+        y = df['value'].to_numpy()
+        cell = df['cell'].to_numpy()
+
+        # 참가자 × 셀 크기 → trial별 대비 가중치 (효과 × trial), 참가자 대비 = 참가자별 가중 합
+        counts = np.bincount(cluster_codes * 4 + cell, minlength=4 * n_p).reshape(n_p, 4)
+        weights = CONTRASTS[:, cell] / counts[cluster_codes, cell]
+        by_cluster = np.argsort(cluster_codes, kind='stable')
+        bounds = np.searchsorted(cluster_codes[by_cluster], np.arange(n_p))
+        observed = [np.bincount(cluster_codes, weights=y * w, minlength=n_p) for w in weights]
+        self.contrasts = pd.DataFrame(np.column_stack(observed),
+                                      index=pd.Index(self.clusters, name=cluster), columns=self.effects)
+        self.t_obs = _t_stat(self.contrasts.to_numpy().T)
+
+        # 효과별 축소 모형 (참가자마다 절편 + 나머지 두 항) 적합값 / 잔차
+        residuals = np.empty((len(y), len(CONTRASTS)))
+        fixed = np.empty((len(CONTRASTS), n_p))
+        for e in range(len(CONTRASTS)):
+            X = _DESIGN[cell][:, [0] + [j + 1 for j in range(3) if j != e]]
+            fitted = np.empty_like(y)
+            for p in range(n_p):
+                rows = cluster_codes == p
+                beta = np.linalg.lstsq(X[rows], y[rows], rcond=None)[0]
+                fitted[rows] = X[rows] @ beta
+            residuals[:, e] = y - fitted
+            fixed[e] = np.bincount(cluster_codes, weights=fitted * weights[e], minlength=n_p)
+
+        # 순열 합은 참가자 순으로 모은 trial 위치에서 참가자 구간별 reduceat
+        state = {'strata': strata_codes, 'residuals': residuals, 'fixed': fixed,
+                 'weights': weights[:, by_cluster], 'by_cluster': by_cluster, 'bounds': bounds}
+        root = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+        flip_seq, chunk_root = root.spawn(2)
+        self._flip_seeds = flip_seq.spawn(len(CONTRASTS))
+
+        sizes = [min(chunk_size, self.n_perm - start) for start in range(0, self.n_perm, chunk_size)]
+        tasks = [(size, seq, block_elements) for size, seq in zip(sizes, chunk_root.spawn(len(sizes)))]
+        if processes == 1 or len(tasks) <= 1:
+            parts = [_permutation_chunk(state, *task) for task in tasks]
+        else:
+            from concurrent.futures import ProcessPoolExecutor
+            with ProcessPoolExecutor(max_workers=processes, initializer=_init_worker,
+                                     initargs=(state,)) as pool:
+                parts = list(pool.map(_permutation_chunk_in_worker, tasks))
+        self.null = np.concatenate(parts) if parts else np.empty((0, len(CONTRASTS)))
+
+    def p_values(self):
+        """trial 순열 Monte Carlo p값 (양측, (적중 + 1) / (순열 + 1))"""
+        hits = (np.abs(self.null) >= np.abs(self.t_obs) * (1 - 1e-12)).sum(axis=0)
+        return (hits + 1) / (len(self.null) + 1)
+
+    def table(self):
+        """
+        효과별 결과 표
+
+        Returns:
+        --------
+        DataFrame : effect, estimate (참가자 대비 평균), t, p_perm (trial 순열),
+                    p_sign (참가자 부호 뒤집기), sign_exact, n_participants, n_perm
+        """
+        rows = []
+        for e, (effect, p_perm) in enumerate(zip(self.effects, self.p_values())):
+            p_sign, exact = sign_flip_p(self.contrasts.iloc[:, e], self.exact_limit,
+                                        seed=self._flip_seeds[e])
+            rows.append({'effect': effect, 'estimate': self.contrasts.iloc[:, e].mean(),
+                         't': self.t_obs[e], 'p_perm': p_perm, 'p_sign': p_sign,
+                         'sign_exact': exact, 'n_participants': self.n_clusters,
+                         'n_perm': len(self.null)})
+        return pd.DataFrame(rows)
+
+
+def permutation_test(data, value, n_perm=10000, seed=None, **options):
+    """WithinPermutationTest(...).table() 축약"""
+    return WithinPermutationTest(data, value, n_perm=n_perm, seed=seed, **options).table()
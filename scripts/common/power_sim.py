@@ -0,0 +1,348 @@
+"""
+시뮬레이션 기반 검정력 분석 (SPR 2 × 2 Latin square 설계)
+- 설계: stimuli/List1-4.csv (stimuli/make_list.py 출력)의 실험 문장 구조 그대로
+  참가자 i → List (i mod 4) + 1, 리스트마다 Base × 조건 32문장 (item_id는 조건 / 버전별)
+- 모형: RT = 절편 + 고정효과 (±0.5 대비) + 참가자 intercept + 아이템 intercept + 잔차
+  분산 성분은 pilot 자료 (trial 평균)에 교차 무선효과 모형 적합 (estimate_components)
+- trial 제외: pilot 제외 비율만큼 trial을 무작위 제외
+- 가설별 모형 (H1: RT ~ Emotion, H2: RT ~ Emotion * Plausibility)을 참가자 × 아이템 교차
+  무선효과로 적합 (common.crossed_lmm), 검정 항 p < alpha 비율 = 검정력
+- 반복은 batch 단위 작업, 작업마다 SeedSequence.spawn 독립 난수 스트림 → 프로세스 풀 병렬화
+  (라운드마다 참가자 수별 batch 수 고정 → processes 수와 무관하게 같은 seed면 같은 결과)
+- 조기 종료: 참가자 수별로 모든 가설의 검정력 Wilson 신뢰구간 폭 ≤ ci_width이면 중단
+- nested (기본값): 반복마다 최대 N명 참가자 pool 1개를 만들고 N = 8, 16, ...은 pool의 앞쪽 N명
+  → 참가자별 충분통계량 누적합에서 잘라 적합 (CrossedLMM.prefix), N을 늘려도 추가 참가자 몫만 더함
+  - θ 최적화는 큰 N부터 N이 refit_ratio배 줄어들 때마다만 (기본값 4: 200 → 50 → 10)
+    나머지 N은 직전 최적화 θ에서 GLS 1회 (CrossedLMM.profile, _pvalue_at)
+  - 적합 1회 비용은 N과 거의 무관 (θ 평가마다 아이템 쪽 Schur complement가 대부분)
+    → 20개 점 곡선 (N = 10-200) ≈ N = 200 단독 적합의 약 2배 (N마다 최적화하면 약 10배)
+      refit_ratio=inf이면 최대 N 1번만 최적화 (약 1.5배)
+
+효과 이름 (ms, common.permutation과 같은 방향):
+    Emotion                : H - N
+    Plausibility           : I - P
+    Emotion × Plausibility : (HI - HP) - (NI - NP)
+
+사용 예:
+    design = load_list_structure('stimuli')
+    sim = PowerSimulation(design, {'H1': dict(HYPOTHESES['H1'], components=comp, effects={'Emotion': 30})})
+    curve = sim.run(range(8, 81, 8), seed=42)
+"""
+
+import os
+import warnings
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+from common.crossed_lmm import CrossedLMM, fit_crossed_lmm
+from common.factors import encode_factors
+
+# 가설별 모형 formula / 검정 항 / pilot region
+HYPOTHESES = {
+    'H1': {'formula': "RT ~ Emotion", 'term': 'Emotion[T.N]', 'regions': ['Modifier']},
+    'H2': {'formula': "RT ~ Emotion * Plausibility", 'term': 'Emotion[T.N]:Plausibility[T.P]',
+           'regions': ['Spillover', 'Fact']},
+}
+
+# 조건별 대비 코드 (Emotion, Plausibility, 상호작용)
+_CODES = {('H', 'P'): (0.5, -0.5, -0.25), ('H', 'I'): (0.5, 0.5, 0.25),
+          ('N', 'P'): (-0.5, -0.5, 0.25), ('N', 'I'): (-0.5, 0.5, -0.25)}
+EFFECTS = ('Emotion', 'Plausibility', 'Emotion × Plausibility')
+
+# 작업 프로세스의 시뮬레이션 객체 (프로세스마다 1회 전달)
+_WORKER_STATE = {}
+
+
+def load_list_structure(stimuli_dir='stimuli'):
+    """
+    make_list.py가 만든 List{1-4}.csv의 실험 문장 (필러 제외)
+
+    Returns:
+    --------
+    DataFrame : List_ID, Item_ID, Base, Emotion, Plausibility
+    """
+    lists = []
+    for list_id in range(1, 5):
+        df = pd.read_csv(os.path.join(stimuli_dir, f'List{list_id}.csv'), encoding='utf-8-sig')
+        df = df[df['is_filler'] == 0]
+        lists.append(pd.DataFrame({'List_ID': list_id, 'Item_ID': df['item_id'].to_numpy(),
+                                   'Base': df['base'].to_numpy(), 'Emotion': df['emotion'].to_numpy(),
+                                   'Plausibility': df['plausibility'].to_numpy()}))
+    return pd.concat(lists, ignore_index=True)
+
+
+def estimate_components(data, formula, value='RT', unit='Trial_Index',
+                        groups=('Participant_ID', 'Item_ID')):
+    """
+    pilot 자료 → 분산 성분 (region 행은 trial 평균으로 묶음)
+
+    Parameters:
+    -----------
+    data : DataFrame
+        region long table (해당 region만)
+    formula : str
+        고정효과 formula (예: "RT ~ Emotion")
+
+    Returns:
+    --------
+    dict : intercept, sd_participant, sd_item, sd_residual, n_participants
+    """
+    keys = [groups[0], unit]
+    trials = data.groupby(keys, observed=True).agg(
+        **{value: (value, 'mean')}, **{c: (c, 'first') for c in ['Emotion', 'Plausibility', groups[1]]}
+    ).reset_index()
+    result = fit_crossed_lmm(formula, trials, groups=groups, reml=True)
+    sd = result.variance_components.set_index('Group')['Std.Dev.']
+    return {'intercept': float(trials[value].mean()), 'sd_participant': float(sd[groups[0]]),
+            'sd_item': float(sd[groups[1]]), 'sd_residual': float(sd['Residual']),
+            'n_participants': int(trials[groups[0]].nunique())}
+
+
+def wilson_interval(successes, n, confidence=0.95):
+    """이항 비율 Wilson 신뢰구간"""
+    if n == 0:
+        return 0.0, 1.0
+    z = stats.norm.ppf(1 - (1 - confidence) / 2)
+    p = successes / n
+    center = (p + z ** 2 / (2 * n)) / (1 + z ** 2 / n)
+    half = z * np.sqrt(p * (1 - p) / n + z ** 2 / (4 * n ** 2)) / (1 + z ** 2 / n)
+    return float(center - half), float(center + half)
+
+
+class PowerSimulation:
+    """
+    Latin square 리스트 구조 기반 검정력 시뮬레이터
+
+    Parameters:
+    -----------
+    design : DataFrame
+        load_list_structure() 결과
+    hypotheses : dict
+        가설 이름 → dict(formula, term, components, effects)
+        components : estimate_components() 결과
+        effects : {효과 이름: ms} (EFFECTS 중, 없는 효과는 0)
+    exclusion_rate : float
+        trial 무작위 제외 비율
+    alpha : float
+    reml : bool
+        적합 방식 (기본값 False, 기존 분석 스크립트와 동일)
+    refit_ratio : float or None
+        nested 평가에서 θ를 다시 최적화하는 간격: N ≤ 직전 최적화 N / refit_ratio이면 최적화,
+        아니면 직전 θ로 평가 (None이면 모든 N 최적화)
+    """
+
+    def __init__(self, design, hypotheses, exclusion_rate=0.0, alpha=0.05, reml=False,
+                 refit_ratio=4.0):
+        self.hypotheses = hypotheses
+        self.exclusion_rate = exclusion_rate
+        self.alpha = alpha
+        self.reml = reml
+        self.refit_ratio = refit_ratio
+
+        design = design.sort_values(['List_ID', 'Item_ID'], kind='stable')
+        self.list_ids = sorted(design['List_ID'].unique())
+        per_list = design.groupby('List_ID').size()
+        if per_list.nunique() != 1:
+            raise ValueError("리스트마다 실험 문장 수가 같아야 합니다")
+        # (리스트 × 문장) 행 인덱스
+        self._rows = np.arange(len(design)).reshape(len(self.list_ids), -1)
+        self._design = design.reset_index(drop=True)
+        self._item_codes, self._items = pd.factorize(self._design['Item_ID'])
+        codes = np.array([_CODES[(e, p)] for e, p in zip(design['Emotion'], design['Plausibility'])])
+        # 가설별 고정효과 평균 (문장 행마다)
+        self._fixed = {name: spec['components']['intercept']
+                       + codes @ np.array([spec.get('effects', {}).get(e, 0.0) for e in EFFECTS])
+                       for name, spec in hypotheses.items()}
+
+    def simulate(self, n_participants, rng):
+        """
+        참가자 n명 자료 1세트
+
+        Returns:
+        --------
+        DataFrame : Participant_ID, List_ID, Item_ID, Emotion, Plausibility + 가설별 RT 컬럼
+        """
+        lists = np.arange(n_participants) % len(self.list_ids)
+        rows = self._rows[lists].ravel()
+        participant = np.repeat(np.arange(n_participants), self._rows.shape[1])
+        keep = rng.random(len(rows)) >= self.exclusion_rate
+        rows, participant = rows[keep], participant[keep]
+
+        df = self._design.iloc[rows].reset_index(drop=True)
+        df.insert(0, 'Participant_ID', participant)
+        items = self._item_codes[rows]
+        for name, spec in self.hypotheses.items():
+            comp = spec['components']
+            u = rng.normal(0, comp['sd_participant'], n_participants)
+            w = rng.normal(0, comp['sd_item'], len(self._items))
+            df[f'RT_{name}'] = (self._fixed[name][rows] + u[participant] + w[items]
+                                + rng.normal(0, comp['sd_residual'], len(rows)))
+        return encode_factors(df, ['Emotion', 'Plausibility'])
+
+    def fit_pvalues(self, df, sample_sizes=None):
+        """
+        가설별 검정 항 p값 (적합 실패 시 NaN)
+
+        sample_sizes가 주어지면 참가자 pool의 앞쪽 n명씩 (큰 n부터) 적합
+        → 모형 (충분통계량)은 가설마다 1번, 각 n은 누적 통계량에서 잘라냄 (CrossedLMM.prefix)
+          θ는 refit_ratio 간격의 n에서만 최적화 (시작값은 직전 θ), 나머지 n은 직전 θ로 평가
+
+        Returns:
+        --------
+        ndarray : (참가자 수, 가설)
+        """
+        n_pool = int(df['Participant_ID'].max()) + 1 if len(df) else 0
+        sample_sizes = sorted(sample_sizes) if sample_sizes is not None else [n_pool]
+        out = np.full((len(sample_sizes), len(self.hypotheses)), np.nan)
+        for h, (name, spec) in enumerate(self.hypotheses.items()):
+            try:
+                formula = spec['formula'].replace('RT ~', f'RT_{name} ~', 1)
+                model = CrossedLMM(formula, df, groups=('Participant_ID', 'Item_ID'))
+            except (ValueError, np.linalg.LinAlgError):
+                continue
+            # 첫 시작값: 생성에 쓴 상대 SD (θ)
+            comp = spec['components']
+            ratio = {'Participant_ID': comp['sd_participant'], 'Item_ID': comp['sd_item']}
+            theta0 = [ratio[f.name] / comp['sd_residual'] for f in model.factors]
+            refit_at = None
+            for i in reversed(range(len(sample_sizes))):
+                n = sample_sizes[i]
+                sub = model.prefix(n, 'Participant_ID')
+                reuse = (refit_at is not None and self.refit_ratio is not None
+                         and n * self.refit_ratio > refit_at)
+                if reuse:
+                    try:
+                        out[i, h] = _pvalue_at(sub, theta0, self.reml, spec['term'])
+                        continue
+                    except (ValueError, np.linalg.LinAlgError):
+                        pass
+                try:
+                    # 일부 θ 탐색 지점의 deviance = inf → 수치 미분 경고 (적합 결과에는 영향 없음)
+                    with warnings.catch_warnings():
+                        warnings.simplefilter('ignore', RuntimeWarning)
+                        result = sub.fit(reml=self.reml, theta0=theta0)
+                except (ValueError, np.linalg.LinAlgError):
+                    continue
+                refit_at, theta0 = n, result.theta
+                out[i, h] = result.pvalues[spec['term']]
+        return out
+
+    def simulate_batch(self, sample_sizes, n_reps, seed_seq):
+        """
+        독립 난수 스트림 1개로 n_reps번 시뮬레이션 → (n_reps, 참가자 수, 가설) p값
+
+        반복마다 max(sample_sizes)명 pool 1개를 만들고 앞쪽 n명씩 평가 (nested prefix)
+        """
+        sample_sizes = sorted(sample_sizes)
+        rng = np.random.default_rng(seed_seq)
+        return np.array([self.fit_pvalues(self.simulate(sample_sizes[-1], rng), sample_sizes)
+                         for _ in range(n_reps)])
+
+    def run(self, sample_sizes, max_sims=1000, batch_size=25, batches_per_round=4, ci_width=0.05,
+            confidence=0.95, seed=None, processes=1, nested=True, report=True):
+        """
+        참가자 수별 검정력 곡선
+
+        Parameters:
+        -----------
+        sample_sizes : iterable of int
+        max_sims : int
+            참가자 수별 최대 시뮬레이션 수
+        batch_size : int
+            작업 1개 (난수 스트림 1개)의 시뮬레이션 수
+        batches_per_round : int
+            라운드마다 참가자 수별 작업 수 (조기 종료 판단 단위)
+        ci_width : float
+            모든 가설의 검정력 신뢰구간 폭이 이 값 이하이면 해당 참가자 수 중단
+        seed : int or np.random.SeedSequence, optional
+        processes : int
+            프로세스 수 (1이면 현재 프로세스)
+        nested : bool
+            True: 반복마다 참가자 pool 1개 (아직 진행 중인 최대 N명)를 만들고 모든 N을 앞쪽 N명으로 평가
+                  (자료 생성 / 충분통계량 계산은 최대 N 1번, N 사이 비교는 같은 난수 → 곡선이 매끄러움)
+            False: N마다 독립 자료
+
+        Returns:
+        --------
+        DataFrame : n_participants, hypothesis, term, power, ci_low, ci_high, n_sims, n_failed, stopped_early
+        """
+        sample_sizes = list(sample_sizes)
+        root = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+        pool_stream, *size_streams = root.spawn(len(sample_sizes) + 1)
+        streams = dict(zip(sample_sizes, size_streams))
+        pvalues = {n: [] for n in sample_sizes}
+        active = list(sample_sizes)
+
+        pool = None
+        if processes != 1:
+            from concurrent.futures import ProcessPoolExecutor
+            pool = ProcessPoolExecutor(max_workers=processes, initializer=_init_worker, initargs=(self,))
+        try:
+            while active:
+                # nested: 진행 중인 N 전체가 같은 반복을 공유 (반복 수도 같음)
+                tasks = []
+                for group in ([tuple(active)] if nested else [(n,) for n in active]):
+                    stream = pool_stream if nested else streams[group[0]]
+                    remaining = max_sims - sum(len(p) for p in pvalues[group[0]])
+                    sizes = [min(batch_size, remaining - i * batch_size) for i in range(batches_per_round)]
+                    sizes = [size for size in sizes if size > 0]
+                    tasks += [(group, size, seq) for size, seq in zip(sizes, stream.spawn(len(sizes)))]
+                if pool is None:
+                    parts = [self.simulate_batch(*task) for task in tasks]
+                else:
+                    parts = list(pool.map(_simulate_batch_in_worker, tasks))
+                for (group, _, _), part in zip(tasks, parts):
+                    for j, n in enumerate(sorted(group)):
+                        pvalues[n].append(part[:, j])
+
+                still = []
+                for n in active:
+                    p = np.concatenate(pvalues[n])
+                    intervals = [wilson_interval(*_hits(p[:, h], self.alpha), confidence)
+                                 for h in range(p.shape[1])]
+                    if len(p) < max_sims and max(high - low for low, high in intervals) > ci_width:
+                        still.append(n)
+                    elif report:
+                        power = ', '.join(f"{name} {np.nanmean(p[:, h] < self.alpha):.3f}"
+                                          for h, name in enumerate(self.hypotheses))
+                        print(f"  N={n}: 시뮬레이션 {len(p)}회, 검정력 {power}")
+                active = still
+        finally:
+            if pool is not None:
+                pool.shutdown()
+
+        rows = []
+        for n in sample_sizes:
+            p = np.concatenate(pvalues[n])
+            for h, (name, spec) in enumerate(self.hypotheses.items()):
+                hits, valid = _hits(p[:, h], self.alpha)
+                low, high = wilson_interval(hits, valid, confidence)
+                rows.append({'n_participants': n, 'hypothesis': name, 'term': spec['term'],
+                             'power': hits / valid if valid else np.nan, 'ci_low': low, 'ci_high': high,
+                             'n_sims': valid, 'n_failed': int(len(p) - valid),
+                             'stopped_early': len(p) < max_sims})
+        return pd.DataFrame(rows)
+
+
+def _pvalue_at(model, theta, reml, term):
+    """θ 고정 (최적화 없이 deviance 1회)에서 검정 항의 정규 근사 p값 (CrossedLMMResult.pvalues와 같은 식)"""
+    _, beta, sigma2, cov_unscaled = model.profile(theta, reml)
+    if beta is None:
+        raise np.linalg.LinAlgError("고정효과 교차곱 행렬이 양의 정부호가 아닙니다")
+    j = model.exog_names.index(term)
+    return float(2 * stats.norm.sf(abs(beta[j]) / np.sqrt(sigma2 * cov_unscaled[j, j])))
+
+
+def _hits(pvalues, alpha):
+    valid = ~np.isnan(pvalues)
+    return int((pvalues[valid] < alpha).sum()), int(valid.sum())
+
+
+def _init_worker(simulation):
+    _WORKER_STATE['simulation'] = simulation
+
+
+def _simulate_batch_in_worker(args):
+    return _WORKER_STATE['simulation'].simulate_batch(*args)
@@ -0,0 +1,177 @@
+"""
+병합 가능한 스트리밍 분위수 sketch (KLL)
+- 청크 / 참가자 파일마다 update → 작업 프로세스끼리 merge → 분위수 / IQR 기준을 한 번의 스트리밍으로 계산
+- 메모리: 값 개수와 무관하게 약 3k개 (k = 정확도 파라미터)
+- 압축 (compaction)이 한 번도 일어나지 않았으면 np.percentile과 같은 정확한 값
+- error_bound: 분위수의 순위(rank) 오차 상한 (정규화, 약 99% 신뢰)
+  예: k=200 → 약 ±1.1%p → Q1 추정값의 실제 순위는 0.239-0.261 사이
+
+사용 예:
+    sketch = QuantileSketch()
+    for chunk in iter_sheet_chunks(excel_path, columns=['Total_Reading_Time_ms']):
+        sketch.update(chunk['Total_Reading_Time_ms'])
+    lower, upper = iqr_bounds(sketch, k=2.5)
+
+pickle 가능 → multiprocessing 작업 결과로 반환 후 merge_sketches로 병합
+"""
+
+import numpy as np
+
+DEFAULT_K = 200
+
+# 위 level로 갈수록 compactor 용량을 줄이는 비율 (KLL 논문의 c)
+_CAPACITY_DECAY = 2 / 3
+_MIN_CAPACITY = 8
+
+
+class QuantileSketch:
+    """
+    KLL sketch: level h의 값은 가중치 2^h
+
+    level이 용량을 넘으면 정렬 후 홀수 / 짝수 번째 (무작위) 값만 다음 level로 올림
+
+    Parameters:
+    -----------
+    k : int
+        정확도 파라미터 (클수록 정확, 메모리 증가)
+    seed : int, optional
+        compaction 무작위 선택 seed
+    """
+
+    def __init__(self, k=DEFAULT_K, seed=None):
+        if k < _MIN_CAPACITY:
+            raise ValueError(f"k는 {_MIN_CAPACITY} 이상이어야 합니다: {k}")
+        self.k = int(k)
+        self.n = 0
+        self.min = np.nan
+        self.max = np.nan
+        self.exact = True
+        self._levels = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    @property
+    def size(self):
+        """보관 중인 값 개수"""
+        return sum(len(level) for level in self._levels)
+
+    @property
+    def error_bound(self):
+        """정규화 순위 오차 상한 (정확한 상태이면 0, Apache DataSketches KLL 경험식)"""
+        return 0.0 if self.exact else 1.854 / self.k ** 0.9657
+
+    def _capacity(self, h):
+        depth = len(self._levels) - 1 - h
+        return max(_MIN_CAPACITY, int(np.ceil(self.k * _CAPACITY_DECAY ** depth)))
+
+    def _compress(self):
+        while self.size > sum(self._capacity(h) for h in range(len(self._levels))):
+            h = next(h for h, level in enumerate(self._levels) if len(level) > self._capacity(h))
+            items = np.sort(self._levels[h])
+            # 홀수 개이면 가장 작은 값 1개는 현재 level에 남김
+            keep, items = items[:len(items) % 2], items[len(items) % 2:]
+            promoted = items[self._rng.integers(2)::2]
+            if h + 1 == len(self._levels):
+                self._levels.append(np.empty(0))
+            self._levels[h] = keep
+            self._levels[h + 1] = np.concatenate([self._levels[h + 1], promoted])
+            self.exact = False
+
+    def update(self, values):
+        """
+        값 추가 (결측치 무시)
+
+        Parameters:
+        -----------
+        values : scalar or array-like
+            청크의 RT 컬럼 등
+        """
+        values = np.asarray(values, dtype=np.float64).ravel()
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return self
+        self.n += len(values)
+        self.min = np.fmin(self.min, values.min())
+        self.max = np.fmax(self.max, values.max())
+        self._levels[0] = np.concatenate([self._levels[0], values])
+        self._compress()
+        return self
+
+    def merge(self, other):
+        """다른 sketch를 이 sketch에 병합 (k는 둘 중 작은 값)"""
+        if other.n == 0:
+            return self
+        self.k = min(self.k, other.k)
+        while len(self._levels) < len(other._levels):
+            self._levels.append(np.empty(0))
+        for h, level in enumerate(other._levels):
+            self._levels[h] = np.concatenate([self._levels[h], level])
+        self.n += other.n
+        self.min = np.fmin(self.min, other.min)
+        self.max = np.fmax(self.max, other.max)
+        self.exact = self.exact and other.exact
+        self._compress()
+        return self
+
+    def _weighted(self):
+        items = np.concatenate(self._levels)
+        weights = np.concatenate([np.full(len(level), 2.0 ** h) for h, level in enumerate(self._levels)])
+        order = np.argsort(items, kind='stable')
+        return items[order], np.cumsum(weights[order])
+
+    def quantile(self, q):
+        """
+        분위수 추정 (q: 0-1, 스칼라 또는 배열)
+
+        정확한 상태이면 np.percentile (linear)과 동일
+        """
+        q = np.asarray(q, dtype=np.float64)
+        if self.n == 0:
+            return np.full(q.shape, np.nan) if q.ndim else np.nan
+        if self.exact:
+            return np.percentile(self._levels[0], q * 100)
+
+        items, cum = self._weighted()
+        idx = np.minimum(np.searchsorted(cum, q * cum[-1], side='left'), len(items) - 1)
+        out = np.where(q <= 0, self.min, np.where(q >= 1, self.max, items[idx]))
+        return out if q.ndim else float(out)
+
+    def quantile_interval(self, q):
+        """error_bound를 반영한 분위수의 (하한, 상한) 값 범위"""
+        eps = self.error_bound
+        return self.quantile(max(q - eps, 0.0)), self.quantile(min(q + eps, 1.0))
+
+    def rank(self, x):
+        """x 이하 값의 비율 추정"""
+        if self.n == 0:
+            return np.nan
+        items, cum = self._weighted()
+        pos = np.searchsorted(items, np.asarray(x, dtype=np.float64), side='right')
+        return np.where(pos > 0, cum[np.maximum(pos - 1, 0)], 0.0) / cum[-1]
+
+
+def merge_sketches(sketches):
+    """sketch 여러 개를 새 sketch 하나로 병합 (원본은 바꾸지 않음)"""
+    sketches = list(sketches)
+    merged = QuantileSketch(k=min((s.k for s in sketches), default=DEFAULT_K))
+    for sketch in sketches:
+        merged.merge(sketch)
+    return merged
+
+
+def sketch_by(df, value, by, k=DEFAULT_K):
+    """그룹 (예: 참가자)별 sketch dict {그룹 키: QuantileSketch}"""
+    return {key: QuantileSketch(k=k).update(group[value])
+            for key, group in df.groupby(by, sort=False, observed=True)}
+
+
+def iqr_bounds(sketch, k=2.5):
+    """
+    IQR 기준 (Q1 - k·IQR, Q3 + k·IQR)
+
+    Returns:
+    --------
+    tuple : (lower, upper)
+    """
+    q1, q3 = sketch.quantile([0.25, 0.75])
+    iqr = q3 - q1
+    return float(q1 - k * iqr), float(q3 + k * iqr)
@@ -0,0 +1,169 @@
+"""
+trial × region 읽기 시간 ragged 저장소
+- trial 메타데이터 (Participant_ID, Item_ID, Emotion ...)는 trial당 한 번만 저장
+- region RT는 int32 평면 배열 + trial별 offset
+- region 텍스트는 사전(vocabulary) 인코딩: region마다 int32 코드만 저장
+- long DataFrame (region당 1행)은 to_frame() 호출 시에만 생성
+
+long table 대비 메모리: 메타데이터 컬럼 × region 수 만큼의 복사가 사라짐
+"""
+
+import numpy as np
+import pandas as pd
+
+from common.spr_regions import parse_regions
+
+STORE_TRIAL_COLUMNS = ['Participant_ID', 'List_ID', 'Trial_Index', 'Item_ID', 'Base',
+                       'Emotion', 'Plausibility', 'Version', 'Is_Filler',
+                       'Total_Reading_Time_ms']
+
+
+class RegionStore:
+    """
+    trial × region RT ragged 저장소
+
+    Attributes:
+    -----------
+    trials : DataFrame (n_trials,)
+        trial 메타데이터 (trial당 1행)
+    offsets : ndarray int64 (n_trials + 1,)
+        trial i의 region = [offsets[i], offsets[i+1])
+    rts : ndarray int32 (n_regions_total,)
+        region RT (ms)
+    text_codes : ndarray int32 (n_regions_total,)
+        region 텍스트 코드 (vocabulary 인덱스)
+    vocabulary : ndarray of object
+        고유 region 텍스트
+    """
+
+    def __init__(self, trials, offsets, rts, text_codes, vocabulary):
+        self.trials = trials.reset_index(drop=True)
+        self.offsets = offsets
+        self.rts = rts
+        self.text_codes = text_codes
+        self.vocabulary = vocabulary
+
+    @classmethod
+    def from_spr(cls, df, trial_columns=None):
+        """
+        SPR_Data에서 저장소 생성
+
+        Parameters:
+        -----------
+        df : DataFrame
+            SPR_Data (Regions, Region_RTs 컬럼 포함)
+        trial_columns : list of str, optional
+            보관할 trial 메타데이터 컬럼 (기본값: STORE_TRIAL_COLUMNS 중 df에 있는 것)
+
+        Returns:
+        --------
+        RegionStore
+        """
+        if trial_columns is None:
+            trial_columns = [c for c in STORE_TRIAL_COLUMNS if c in df.columns]
+
+        arrays = parse_regions(df)
+        rts = np.rint(arrays.rts)
+        if not np.array_equal(rts, arrays.rts):
+            raise ValueError("Region_RTs에 정수가 아닌 값이 있습니다 (int32 저장 불가)")
+
+        # 문장별 단어 → 전체 vocabulary 코드
+        sizes = np.array([len(words) for words in arrays.sentences] + [0], dtype=np.int64)
+        starts = np.concatenate([[0], np.cumsum(sizes)])
+        words = np.empty(starts[-1], dtype=object)
+        words[:] = [w for sentence in arrays.sentences for w in sentence]
+        word_codes, vocabulary = pd.factorize(words)
+
+        region_idx = np.repeat(starts[arrays.text_codes], arrays.lengths) + arrays.positions()
+        return cls(df[trial_columns], arrays.offsets, rts.astype(np.int32),
+                   word_codes[region_idx].astype(np.int32), np.asarray(vocabulary, dtype=object))
+
+    @property
+    def n_trials(self):
+        return len(self.offsets) - 1
+
+    @property
+    def n_regions(self):
+        return len(self.rts)
+
+    @property
+    def lengths(self):
+        return np.diff(self.offsets)
+
+    def region_index(self):
+        """각 region의 trial 내 위치 (0부터)"""
+        return np.arange(self.n_regions) - np.repeat(self.offsets[:-1], self.lengths)
+
+    def trial_of_region(self):
+        """각 region이 속한 trial 번호"""
+        return np.repeat(np.arange(self.n_trials), self.lengths)
+
+    def region_texts(self):
+        """region 텍스트 (디코딩)"""
+        return self.vocabulary[self.text_codes]
+
+    def rt_at(self, position):
+        """trial별 position 번째 region RT (region 수가 부족하면 NaN)"""
+        out = np.full(self.n_trials, np.nan)
+        has = self.lengths > position
+        out[has] = self.rts[self.offsets[:-1][has] + position]
+        return out
+
+    def select(self, mask):
+        """
+        trial 단위 부분 저장소 (mask: trial별 bool)
+
+        Returns:
+        --------
+        RegionStore
+        """
+        trials = np.flatnonzero(np.asarray(mask, dtype=bool))
+        lengths = self.lengths[trials]
+        offsets = np.zeros(len(trials) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        idx = np.repeat(self.offsets[trials], lengths) + \
+            (np.arange(offsets[-1]) - np.repeat(offsets[:-1], lengths))
+        return RegionStore(self.trials.iloc[trials], offsets, self.rts[idx],
+                           self.text_codes[idx], self.vocabulary)
+
+    def to_frame(self, trial_columns=None, with_text=True, regions=None, trials=None):
+        """
+        long DataFrame 생성 (region당 1행)
+
+        Parameters:
+        -----------
+        trial_columns : list of str, optional
+            반복할 trial 메타데이터 컬럼 (기본값: 전체)
+        with_text : bool
+            Region_Text 컬럼 포함 여부
+        regions : iterable of int, optional
+            만들 region 위치 (trial 내 0부터, 기본값: 전체)
+        trials : array-like bool (n_trials,), optional
+            만들 trial (예: 필러 제외)
+
+        Returns:
+        --------
+        DataFrame : trial 컬럼 + Region_Index (+ Region_Text) + RT
+        """
+        columns = list(self.trials.columns) if trial_columns is None else list(trial_columns)
+        trial_of_region = self.trial_of_region()
+        region_index = self.region_index()
+        rows = np.ones(self.n_regions, dtype=bool)
+        if trials is not None:
+            rows &= np.asarray(trials, dtype=bool)[trial_of_region]
+        if regions is not None:
+            rows &= np.isin(region_index, np.fromiter(regions, dtype=np.int64))
+        rows = np.flatnonzero(rows)
+
+        frame = self.trials[columns].iloc[trial_of_region[rows]].reset_index(drop=True)
+        frame['Region_Index'] = region_index[rows]
+        if with_text:
+            frame['Region_Text'] = self.vocabulary[self.text_codes[rows]]
+        frame['RT'] = self.rts[rows]
+        return frame
+
+    def nbytes(self):
+        """저장소 메모리 사용량 (bytes, trial 메타데이터 포함)"""
+        arrays = self.offsets.nbytes + self.rts.nbytes + self.text_codes.nbytes
+        vocabulary = sum(len(t.encode('utf-8')) for t in self.vocabulary) + self.vocabulary.nbytes
+        return arrays + vocabulary + int(self.trials.memory_usage(deep=True).sum())
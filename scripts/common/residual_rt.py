@@ -0,0 +1,134 @@
+"""
+길이 보정 읽기 시간 (Residual RT)
+- 참가자별 회귀 RT ~ 1 + region 길이 (한글 음절 수), 잔차를 Residual_RT 컬럼으로 추가
+- 모든 참가자를 한 번에: 참가자별 XᵀX, Xᵀy를 bincount로 쌓고 (참가자, p, p) 배치 pinv로 풀이
+  → 참가자 반복문 없음, 행 수에 선형
+- Fact 행의 RT는 단어별 RT 평균이므로 길이도 단어당 평균 음절 수 사용
+
+사용 예:
+    parsed_df = add_residual_rt(parsed_df)
+    parsed_df.groupby('Emotion')['Residual_RT'].mean()
+"""
+
+import numpy as np
+import pandas as pd
+
+RESIDUAL_COLUMN = 'Residual_RT'
+LENGTH_COLUMN = 'Region_Length'
+
+# 완성형 한글 음절 (가-힣)
+_HANGUL_PATTERN = '[가-힣]'
+
+
+def syllable_count(texts, per_word=False):
+    """
+    텍스트별 한글 음절 수 (고유 텍스트만 한 번씩 계산)
+
+    Parameters:
+    -----------
+    texts : array-like of str
+    per_word : bool or array-like of bool
+        True인 행은 공백 단위 단어당 평균 음절 수
+
+    Returns:
+    --------
+    ndarray (float64)
+    """
+    texts = pd.Series(np.asarray(texts, dtype=object)).fillna('')
+    codes, uniques = pd.factorize(texts)
+    uniques = pd.Series(uniques, dtype=object)
+    syllables = uniques.str.count(_HANGUL_PATTERN).to_numpy(dtype=np.float64)
+    words = uniques.str.split().str.len().clip(lower=1).to_numpy(dtype=np.float64)
+
+    per_word = np.broadcast_to(np.asarray(per_word, dtype=bool), (len(texts),))
+    out = syllables[codes]
+    out[per_word] /= words[codes][per_word]
+    return out
+
+
+def fit_length_models(rt, length, participant):
+    """
+    참가자별 RT ~ 1 + length 최소제곱 (배치 풀이)
+
+    Parameters:
+    -----------
+    rt, length : array-like
+        같은 길이 (결측 행은 적합에서 제외)
+    participant : array-like
+        참가자 ID
+
+    Returns:
+    --------
+    DataFrame : index = 참가자, columns = Intercept, Slope, n
+        (관찰치 2개 미만 또는 길이가 모두 같은 참가자는 Slope 0, Intercept = RT 평균)
+    """
+    rt = np.asarray(rt, dtype=np.float64)
+    length = np.asarray(length, dtype=np.float64)
+    code, ids = pd.factorize(np.asarray(participant, dtype=object))
+    use = (code >= 0) & ~np.isnan(rt) & ~np.isnan(length)
+
+    n_p = len(ids)
+    X = np.column_stack([np.ones(use.sum()), length[use]])
+    y, c = rt[use], code[use]
+    p = X.shape[1]
+
+    # 수치 안정성: 길이를 전체 평균 기준으로 중심화한 뒤 적합
+    shift = X[:, 1].mean() if len(X) else 0.0
+    X[:, 1] -= shift
+
+    xtx = np.empty((n_p, p, p))
+    xty = np.empty((n_p, p))
+    for i in range(p):
+        xty[:, i] = np.bincount(c, weights=X[:, i] * y, minlength=n_p)
+        for j in range(i, p):
+            xtx[:, i, j] = xtx[:, j, i] = np.bincount(c, weights=X[:, i] * X[:, j], minlength=n_p)
+
+    beta = np.einsum('kij,kj->ki', np.linalg.pinv(xtx), xty)
+    intercept, slope = beta[:, 0] - beta[:, 1] * shift, beta[:, 1]
+
+    # 기울기를 정할 수 없는 참가자 (n < 2, 길이 분산 0): 중심화 후 pinv 해는 Slope ≠ 0일 수 있음
+    n = xtx[:, 0, 0]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        sxx = xtx[:, 1, 1] - xtx[:, 0, 1] ** 2 / n
+        mean = xty[:, 0] / n
+    flat = (n < 2) | (sxx <= 1e-12 * np.maximum(xtx[:, 1, 1], 1.0))
+    slope = np.where(flat, 0.0, slope)
+    intercept = np.where(flat, mean, intercept)
+    return pd.DataFrame({
+        'Intercept': intercept,
+        'Slope': slope,
+        'n': np.bincount(c, minlength=n_p),
+    }, index=pd.Index(ids, name='Participant_ID'))
+
+
+def add_residual_rt(df, rt_col='RT', text_col='Region_Text', by='Participant_ID', report=True):
+    """
+    parsed table에 Region_Length, Residual_RT 컬럼 추가 (사본 반환)
+
+    Parameters:
+    -----------
+    df : DataFrame
+        문장 구조 long table (Region_Type, Region_Text, RT)
+    rt_col, text_col, by : str
+        RT / region 텍스트 / 참가자 컬럼
+    report : bool
+        참가자별 기울기 요약 출력
+
+    Returns:
+    --------
+    DataFrame
+    """
+    df = df.copy()
+    per_word = (df['Region_Type'] == 'Fact').to_numpy() if 'Region_Type' in df.columns else False
+    df[LENGTH_COLUMN] = syllable_count(df[text_col], per_word=per_word)
+
+    models = fit_length_models(df[rt_col], df[LENGTH_COLUMN], df[by])
+    coef = models.reindex(df[by].to_numpy())
+    fitted = coef['Intercept'].to_numpy() + coef['Slope'].to_numpy() * df[LENGTH_COLUMN].to_numpy()
+    df[RESIDUAL_COLUMN] = df[rt_col].to_numpy(dtype=np.float64) - fitted
+
+    if report:
+        slopes = models['Slope']
+        print(f"\n길이 보정 (RT ~ 음절 수, 참가자 {len(models)}명): "
+              f"기울기 평균 {slopes.mean():.1f} ms/음절 (SD {slopes.std():.1f})")
+    return df
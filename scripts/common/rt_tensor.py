@@ -0,0 +1,286 @@
+"""
+참가자 × trial × region RT 텐서 (디스크 memmap)
+- long table (region당 1행)을 NaN으로 채운 float32 텐서로 변환해 .npy 파일로 저장
+- trial 정보 (Emotion, Plausibility, Item_ID ...)는 (참가자 × trial) sidecar 배열로 따로 저장
+- 같은 값을 두 가지 배치로 저장 (디스크 2배, 조회마다 연속된 조각만 읽음)
+  - 참가자 우선 (C order): 참가자 chunk 단위 전체 region 집계 (region_means)
+  - region 우선 사본: region 하나에 대한 평균 / SE / paired test는 해당 region 조각만 읽음
+
+저장 형식 (out_dir):
+    rt.npy              float32 (n_participants, max_trials, max_regions), 없는 값은 NaN
+    rt_by_region.npy    float32 (max_regions, n_participants, max_trials), rt.npy의 region 우선 사본
+    participants.npy    참가자 ID (문자열)
+    trial_<컬럼>.npy    trial 정보 (n_participants, max_trials)
+    valid.npy           trial 존재 여부 (n_participants, max_trials)
+    meta.json           region 컬럼, trial 컬럼 목록
+"""
+
+import json
+import os
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+TENSOR_NAME = 'rt.npy'
+REGION_TENSOR_NAME = 'rt_by_region.npy'
+META_NAME = 'meta.json'
+
+
+def build_rt_tensor(parsed, out_dir, region_col='Region_Index',
+                    trial_cols=('Item_ID', 'Base', 'Emotion', 'Plausibility', 'Is_Filler'),
+                    trial_key='Trial_Index', chunk_participants=256):
+    """
+    long table → 디스크 텐서 + sidecar 배열
+
+    Parameters:
+    -----------
+    parsed : DataFrame
+        Participant_ID, trial_key, region_col, RT 컬럼을 가진 long table
+    out_dir : str
+        저장 폴더
+    region_col : str
+        region 축으로 쓸 정수 컬럼 (0부터)
+    trial_cols : sequence of str
+        sidecar로 저장할 trial 정보 컬럼 (parsed에 없는 컬럼은 무시)
+    trial_key : str
+        참가자 내 trial 구분 컬럼
+    chunk_participants : int
+        한 번에 채워 쓰는 참가자 수 (메모리 사용량 제한)
+
+    Returns:
+    --------
+    RTTensor : 읽기 전용으로 다시 연 텐서
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    trial_cols = [c for c in trial_cols if c in parsed.columns]
+
+    participant_code, participants = pd.factorize(parsed['Participant_ID'], sort=True)
+
+    # trial 번호 (처음 나온 순서) → 참가자 내 slot
+    keys = pd.DataFrame({'p': participant_code, 'trial': parsed[trial_key].to_numpy()})
+    trial_id = keys.groupby(['p', 'trial'], sort=False, dropna=False).ngroup().to_numpy()
+    first_rows = np.flatnonzero(~pd.Series(trial_id).duplicated().to_numpy())
+    p_first = participant_code[first_rows]
+    s_first = pd.Series(p_first).groupby(p_first).cumcount().to_numpy()
+    slot = s_first[trial_id]
+
+    n_participants = len(participants)
+    n_trials = int(slot.max()) + 1 if len(slot) else 0
+    region = parsed[region_col].to_numpy().astype(np.int64)
+    n_regions = int(region.max()) + 1 if len(region) else 0
+    rt = parsed['RT'].to_numpy(dtype=np.float32)
+
+    tensor = np.lib.format.open_memmap(os.path.join(out_dir, TENSOR_NAME), mode='w+',
+                                       dtype=np.float32, shape=(n_participants, n_trials, n_regions))
+    by_region = np.lib.format.open_memmap(os.path.join(out_dir, REGION_TENSOR_NAME), mode='w+',
+                                          dtype=np.float32, shape=(n_regions, n_participants, n_trials))
+    order = np.argsort(participant_code, kind='stable')
+    bounds = np.searchsorted(participant_code[order], np.arange(n_participants + 1))
+    for start in range(0, n_participants, chunk_participants):
+        stop = min(start + chunk_participants, n_participants)
+        rows = order[bounds[start]:bounds[stop]]
+        block = np.full((stop - start, n_trials, n_regions), np.nan, dtype=np.float32)
+        block[participant_code[rows] - start, slot[rows], region[rows]] = rt[rows]
+        tensor[start:stop] = block
+        by_region[:, start:stop] = block.transpose(2, 0, 1)
+    tensor.flush()
+    by_region.flush()
+    del tensor, by_region
+
+    # trial sidecar 배열
+    first = parsed.iloc[first_rows]
+    valid = np.zeros((n_participants, n_trials), dtype=bool)
+    valid[p_first, s_first] = True
+    np.save(os.path.join(out_dir, 'valid.npy'), valid)
+    np.save(os.path.join(out_dir, 'participants.npy'), np.asarray(participants).astype(str))
+    for col in [trial_key] + trial_cols:
+        values = first[col]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            values = pd.Series(np.asarray(values, dtype=object)).infer_objects()
+        if pd.api.types.is_numeric_dtype(values):
+            arr = np.full((n_participants, n_trials), np.nan)
+            arr[p_first, s_first] = values.to_numpy(dtype=np.float64)
+        else:
+            arr = np.full((n_participants, n_trials), '', dtype=object)
+            arr[p_first, s_first] = values.fillna('').astype(str).to_numpy()
+            arr = arr.astype(str)
+        np.save(os.path.join(out_dir, f'trial_{col}.npy'), arr)
+
+    with open(os.path.join(out_dir, META_NAME), 'w', encoding='utf-8') as f:
+        json.dump({'region_col': region_col, 'trial_key': trial_key,
+                   'trial_cols': [trial_key] + trial_cols,
+                   'shape': [n_participants, n_trials, n_regions]}, f, ensure_ascii=False)
+
+    return RTTensor(out_dir)
+
+
+class RTTensor:
+    """
+    build_rt_tensor로 만든 텐서를 읽기 전용 memmap으로 열어 조회
+
+    Attributes:
+    -----------
+    rt : memmap float32 (n_participants, max_trials, max_regions)
+    rt_by_region : memmap float32 (max_regions, n_participants, max_trials)
+    participants : ndarray of str
+    valid : ndarray bool (n_participants, max_trials)
+    trial_info : dict {컬럼: ndarray (n_participants, max_trials)}
+    """
+
+    def __init__(self, out_dir):
+        with open(os.path.join(out_dir, META_NAME), encoding='utf-8') as f:
+            self.meta = json.load(f)
+        self.rt = np.load(os.path.join(out_dir, TENSOR_NAME), mmap_mode='r')
+        self.rt_by_region = np.load(os.path.join(out_dir, REGION_TENSOR_NAME), mmap_mode='r')
+        self.participants = np.load(os.path.join(out_dir, 'participants.npy'))
+        self.valid = np.load(os.path.join(out_dir, 'valid.npy'))
+        self.trial_info = {col: np.load(os.path.join(out_dir, f'trial_{col}.npy'))
+                           for col in self.meta['trial_cols']}
+
+    @property
+    def n_regions(self):
+        return self.rt.shape[2]
+
+    def trial_mask(self, **conditions):
+        """
+        조건에 맞는 trial (n_participants, max_trials) bool 마스크
+
+        예: trial_mask(Emotion='H', Plausibility=['P', 'I'], Is_Filler=0)
+        """
+        mask = self.valid.copy()
+        for col, value in conditions.items():
+            values = value if isinstance(value, (list, tuple, set)) else [value]
+            mask &= np.isin(self.trial_info[col], list(values))
+        return mask
+
+    def region_slice(self, region, participants=None):
+        """region 하나의 (참가자 × trial) RT (디스크에서 해당 조각만 읽음, float64)"""
+        if participants is None:
+            return np.asarray(self.rt_by_region[region], dtype=np.float64)
+        return np.asarray(self.rt_by_region[region][participants], dtype=np.float64)
+
+    def _masked(self, region, mask, rt_range, participants=None):
+        values = self.region_slice(region, participants)
+        keep = ~np.isnan(values)
+        if mask is not None:
+            keep &= mask if participants is None else mask[participants]
+        if rt_range is not None:
+            keep &= (values >= rt_range[0]) & (values <= rt_range[1])
+        return values, keep
+
+    def participant_means(self, region, mask=None, rt_range=None, participants=None):
+        """
+        참가자별 평균 RT (해당 trial이 없으면 NaN)
+
+        Parameters:
+        -----------
+        region : int
+            region 위치
+        mask : ndarray bool (n_participants, max_trials), optional
+            trial_mask() 결과
+        rt_range : tuple, optional
+            (하한, 상한) 범위 밖 RT 제외
+        participants : array-like, optional
+            참가자 인덱스 (기본값: 전체)
+
+        Returns:
+        --------
+        ndarray (n_participants,)
+        """
+        values, keep = self._masked(region, mask, rt_range, participants)
+        n = keep.sum(axis=1)
+        total = np.where(keep, values, 0.0).sum(axis=1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(n > 0, total / n, np.nan)
+
+    def region_means(self, mask=None, rt_range=None, chunk_participants=256):
+        """
+        참가자 × region 평균 RT (전체 region, 해당 trial이 없으면 NaN)
+
+        참가자 우선 텐서를 chunk_participants명씩 (연속된 조각) 읽어 합 / 개수를 누적
+        (메모리는 chunk 크기만큼, 파일 전체를 한 번만 읽음)
+
+        Parameters:
+        -----------
+        mask : ndarray bool (n_participants, max_trials) or dict {이름: mask}, optional
+            dict이면 여러 조건 마스크를 텐서 한 번 읽기로 계산
+        rt_range : tuple, optional
+        chunk_participants : int
+
+        Returns:
+        --------
+        ndarray (n_participants, n_regions) 또는 dict {이름: ndarray}
+        """
+        masks = mask if isinstance(mask, dict) else {None: mask}
+        n_participants = self.rt.shape[0]
+        totals = {key: np.zeros((n_participants, self.n_regions)) for key in masks}
+        counts = {key: np.zeros((n_participants, self.n_regions), dtype=np.int64) for key in masks}
+        for start in range(0, n_participants, chunk_participants):
+            stop = min(start + chunk_participants, n_participants)
+            values = np.asarray(self.rt[start:stop], dtype=np.float64)
+            present = ~np.isnan(values)
+            if rt_range is not None:
+                present &= (values >= rt_range[0]) & (values <= rt_range[1])
+            values = np.where(present, values, 0.0)
+            for key, m in masks.items():
+                keep = present if m is None else present & m[start:stop, :, None]
+                counts[key][start:stop] = keep.sum(axis=1)
+                totals[key][start:stop] = np.where(keep, values, 0.0).sum(axis=1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            means = {key: np.where(counts[key] > 0, totals[key] / counts[key], np.nan)
+                     for key in masks}
+        return means if isinstance(mask, dict) else means[None]
+
+    def region_summary(self, mask=None, rt_range=None, regions=None, level='participant'):
+        """
+        region별 평균 / SE
+
+        Parameters:
+        -----------
+        level : str
+            'participant': 참가자 평균의 평균과 SE (참가자 내 집계 후)
+            'trial': 모든 trial RT의 평균과 SE
+
+        Returns:
+        --------
+        DataFrame : Region, mean, sem, n
+        """
+        regions = range(self.n_regions) if regions is None else regions
+        rows = []
+        for region in regions:
+            if level == 'participant':
+                values = self.participant_means(region, mask, rt_range)
+                values = values[~np.isnan(values)]
+            else:
+                values, keep = self._masked(region, mask, rt_range)
+                values = values[keep]
+            n = len(values)
+            rows.append({'Region': region,
+                         'mean': values.mean() if n else np.nan,
+                         'sem': values.std(ddof=1) / np.sqrt(n) if n > 1 else np.nan,
+                         'n': n})
+        return pd.DataFrame(rows)
+
+    def paired_test(self, region, mask_a, mask_b, rt_range=None):
+        """
+        참가자 평균 기준 paired t-test (A - B), 두 조건 모두 자료가 있는 참가자만
+
+        Returns:
+        --------
+        dict : Difference, SEM, t, p, n (공통 참가자가 없으면 None)
+        """
+        a = self.participant_means(region, mask_a, rt_range)
+        b = self.participant_means(region, mask_b, rt_range)
+        both = ~np.isnan(a) & ~np.isnan(b)
+        n = int(both.sum())
+        if n == 0:
+            return None
+        diff = a[both] - b[both]
+        if n > 1:
+            t_stat, p_val = stats.ttest_rel(a[both], b[both])
+            sem = diff.std(ddof=1) / np.sqrt(n)
+        else:
+            t_stat, p_val, sem = np.nan, np.nan, np.nan
+        return {'Difference': a[both].mean() - b[both].mean(),
+                'SEM': sem, 't': t_stat, 'p': p_val, 'n': n}
@@ -0,0 +1,307 @@
+"""
+experiment/server.js 참가자 JSON 파일 증분 적재
+- server.js가 data/ 폴더에 참가자당 1개씩 저장하는 JSON 파일
+  ({participant_id, list_id, timestamp, data: jsPsych JSON 문자열})을 읽어
+  SPR / Rating / Recall / Manipulation_Check / Metadata 테이블로 변환
+- 파일별 Parquet 파티션으로 저장: <store>/<테이블>/<파일 이름>.parquet
+- manifest (파일 이름 + mtime + 크기 + SHA-256)로 이미 적재한 파일은 건너뜀
+  → 새 참가자 10명 추가 시 그 10개 파일만 처리
+- data/에서 삭제된 파일은 manifest 항목과 파티션도 삭제
+
+컬럼 구성은 google-apps-script.js의 시트 컬럼과 동일 (load_sheets 결과와 같은 형태)
+"""
+
+import json
+import os
+
+import pandas as pd
+
+from common.data_cache import file_hash
+
+MANIFEST_NAME = 'manifest.json'
+
+# google-apps-script.js 시트 컬럼
+TABLE_COLUMNS = {
+    'SPR_Data': ['Timestamp', 'Participant_ID', 'List_ID', 'Trial_Index', 'Item_ID', 'Base',
+                 'Emotion', 'Plausibility', 'Version', 'Is_Filler', 'Sentence_Text',
+                 'Total_Regions', 'Total_Reading_Time_ms', 'Regions', 'Region_RTs'],
+    'Rating_Data': ['Timestamp', 'Participant_ID', 'List_ID', 'Item_ID', 'Base', 'Emotion',
+                    'Plausibility', 'Stimulus_Text', 'Rating', 'RT_ms'],
+    'Recall_Data': ['Timestamp', 'Participant_ID', 'List_ID', 'Recall_Text'],
+    'Manipulation_Check': ['Timestamp', 'Participant_ID', 'List_ID', 'Modifier_Text',
+                           'Modifier_Category', 'Negativity_Rating', 'RT_ms'],
+    'Metadata': ['Timestamp', 'Participant_ID', 'List_ID', 'Background_Reading_Time_ms',
+                 'Total_Experiment_Duration_ms', 'Browser', 'Screen_Width', 'Screen_Height']
+}
+
+# 파티션 간 타입을 맞추기 위해 문자열로 저장할 컬럼 (나머지는 숫자, Timestamp는 datetime)
+STRING_COLUMNS = {'Item_ID', 'Base', 'Emotion', 'Plausibility', 'Sentence_Text', 'Regions',
+                  'Region_RTs', 'Stimulus_Text', 'Recall_Text', 'Modifier_Text',
+                  'Modifier_Category', 'Browser'}
+ID_COLUMNS = {'Participant_ID', 'List_ID'}
+
+
+def _response_q0(trial):
+    response = trial.get('response')
+    return response.get('Q0') if isinstance(response, dict) else None
+
+
+def extract_tables(payload):
+    """
+    server.js 저장 파일 1개 → 테이블별 DataFrame
+
+    trial 분류는 experiment.js의 saveDataToGoogleSheets와 동일
+    - SPR: trial_type 'spr_main' 또는 'spr'
+    - Rating: 'plausibility_rating' / 'survey-likert' 중 item_id가 있고 modifier_text가 없는 trial
+    - Recall: 첫 'free_recall' / 'survey-text' trial
+    - Manipulation_Check: 'manipulation_check' 또는 modifier_text가 있는 'survey-likert'
+
+    Parameters:
+    -----------
+    payload : dict
+        {participant_id, list_id, timestamp, data}
+
+    Returns:
+    --------
+    dict : {테이블 이름: DataFrame}
+    """
+    trials = payload['data']
+    if isinstance(trials, str):
+        trials = json.loads(trials)
+
+    base = {'Timestamp': payload.get('timestamp'),
+            'Participant_ID': payload['participant_id'],
+            'List_ID': payload['list_id']}
+
+    spr, rating, mc = [], [], []
+    recall = None
+    background = None
+    for trial in trials:
+        trial_type = trial.get('trial_type')
+        if trial_type in ('spr_main', 'spr'):
+            spr.append({**base,
+                        'Trial_Index': trial.get('trial_index'),
+                        'Item_ID': trial.get('item_id'),
+                        'Base': trial.get('base'),
+                        'Emotion': trial.get('emotion'),
+                        'Plausibility': trial.get('plausibility'),
+                        'Version': trial.get('version'),
+                        'Is_Filler': trial.get('is_filler') or 0,
+                        'Sentence_Text': trial.get('sentence_text'),
+                        'Total_Regions': trial.get('total_regions'),
+                        'Total_Reading_Time_ms': trial.get('total_reading_time'),
+                        'Regions': trial.get('regions'),
+                        'Region_RTs': trial.get('region_rts')})
+        elif trial_type in ('plausibility_rating', 'survey-likert') and \
+                trial.get('item_id') and not trial.get('modifier_text'):
+            rating.append({**base,
+                           'Item_ID': trial.get('item_id'),
+                           'Base': trial.get('base'),
+                           'Emotion': trial.get('emotion'),
+                           'Plausibility': trial.get('plausibility'),
+                           'Stimulus_Text': trial.get('stimulus_text'),
+                           'Rating': _response_q0(trial),
+                           'RT_ms': trial.get('rt')})
+        elif trial_type in ('free_recall', 'survey-text'):
+            if recall is None:
+                recall = {**base, 'Recall_Text': _response_q0(trial) or ''}
+        elif trial_type == 'background_passage':
+            if background is None:
+                background = trial
+
+        if trial_type == 'manipulation_check' or \
+                (trial_type == 'survey-likert' and trial.get('modifier_text')):
+            mc.append({**base,
+                       'Modifier_Text': trial.get('modifier_text'),
+                       'Modifier_Category': trial.get('modifier_category'),
+                       'Negativity_Rating': _response_q0(trial),
+                       'RT_ms': trial.get('rt')})
+
+    # server.js 저장본에는 브라우저/화면 정보가 없음 → 결측
+    elapsed = [t['time_elapsed'] for t in trials if t.get('time_elapsed') is not None]
+    metadata = {**base,
+                'Background_Reading_Time_ms': background.get('rt') if background else None,
+                'Total_Experiment_Duration_ms': max(elapsed) if elapsed else None,
+                'Browser': None, 'Screen_Width': None, 'Screen_Height': None}
+
+    rows = {'SPR_Data': spr, 'Rating_Data': rating,
+            'Recall_Data': [recall] if recall is not None else [],
+            'Manipulation_Check': mc, 'Metadata': [metadata]}
+    return {table: _to_frame(table, rows[table]) for table in TABLE_COLUMNS}
+
+
+def _to_frame(table, rows):
+    """시트와 같은 타입으로 정리 (Timestamp는 UTC 기준 naive datetime)"""
+    df = pd.DataFrame(rows, columns=TABLE_COLUMNS[table])
+    for col in df.columns:
+        if col == 'Timestamp':
+            df[col] = pd.to_datetime(df[col], utc=True).dt.tz_localize(None)
+        elif col in STRING_COLUMNS:
+            df[col] = df[col].astype(object).where(df[col].isna(), df[col].astype(str))
+        elif col in ID_COLUMNS:
+            # 숫자 ID는 숫자로 (시트와 동일), 아니면 문자열 그대로
+            try:
+                df[col] = pd.to_numeric(df[col])
+            except (ValueError, TypeError):
+                df[col] = df[col].astype(str)
+        else:
+            df[col] = pd.to_numeric(df[col], errors='coerce').astype('float64')
+    return df
+
+
+def _read_manifest(store_dir):
+    path = os.path.join(store_dir, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return {'files': {}}
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _write_manifest(store_dir, manifest):
+    path = os.path.join(store_dir, MANIFEST_NAME)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+def _part_path(store_dir, table, filename):
+    return os.path.join(store_dir, table, os.path.splitext(filename)[0] + '.parquet')
+
+
+def ingest(data_dir, store_dir):
+    """
+    data_dir의 새 / 변경된 JSON 파일만 적재
+
+    - mtime과 크기가 manifest와 같으면 해시 계산 없이 건너뜀
+    - mtime이 바뀌었어도 SHA-256이 같으면 manifest만 갱신
+    - 내용이 바뀐 파일은 해당 파일의 파티션만 다시 씀
+    - 읽을 수 없는 파일은 경고 후 manifest에 기록하지 않음 (다음 실행 때 재시도)
+    - data_dir에 더 이상 없는 파일은 manifest 항목과 파티션을 삭제
+
+    Parameters:
+    -----------
+    data_dir : str
+        server.js의 data/ 폴더
+    store_dir : str
+        Parquet 파티션 및 manifest 저장 폴더
+
+    Returns:
+    --------
+    dict : {'new': [...], 'updated': [...], 'skipped': int, 'failed': [...], 'removed': [...]}
+    """
+    for table in TABLE_COLUMNS:
+        os.makedirs(os.path.join(store_dir, table), exist_ok=True)
+
+    manifest = _read_manifest(store_dir)
+    files = manifest['files']
+    summary = {'new': [], 'updated': [], 'skipped': 0, 'failed': [], 'removed': []}
+
+    present = sorted(f for f in os.listdir(data_dir) if f.endswith('.json'))
+    for filename in present:
+        path = os.path.join(data_dir, filename)
+        stat = os.stat(path)
+        entry = files.get(filename)
+        if entry and entry['mtime'] == stat.st_mtime and entry['size'] == stat.st_size:
+            summary['skipped'] += 1
+            continue
+
+        digest = file_hash(path)
+        if entry and entry['sha256'] == digest:
+            entry['mtime'] = stat.st_mtime
+            summary['skipped'] += 1
+            continue
+
+        try:
+            with open(path, encoding='utf-8') as f:
+                payload = json.load(f)
+            tables = extract_tables(payload)
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            print(f"경고: {filename} 적재 실패 ({type(e).__name__}: {e})")
+            summary['failed'].append(filename)
+            continue
+
+        rows = {}
+        for table, df in tables.items():
+            part = _part_path(store_dir, table, filename)
+            if len(df) > 0:
+                df.to_parquet(part, index=False)
+            elif os.path.exists(part):
+                os.remove(part)
+            rows[table] = len(df)
+
+        summary['updated' if entry else 'new'].append(filename)
+        files[filename] = {'mtime': stat.st_mtime, 'size': stat.st_size, 'sha256': digest,
+                           'participant_id': str(payload['participant_id']),
+                           'list_id': str(payload['list_id']), 'rows': rows}
+
+    # data_dir에서 삭제된 파일: 파티션과 manifest 항목 제거
+    for filename in sorted(set(files) - set(present)):
+        for table in TABLE_COLUMNS:
+            part = _part_path(store_dir, table, filename)
+            if os.path.exists(part):
+                os.remove(part)
+        del files[filename]
+        summary['removed'].append(filename)
+
+    _write_manifest(store_dir, manifest)
+    return summary
+
+
+def ingested_counts(store_dir, filenames=None):
+    """
+    테이블별 행 수 / 참가자 수 (manifest만 읽음, 파티션은 읽지 않음)
+
+    Parameters:
+    -----------
+    store_dir : str
+        ingest()의 store_dir
+    filenames : list of str, optional
+        집계할 원본 파일 이름 (기본값: 적재된 전체 파일)
+
+    Returns:
+    --------
+    dict : {테이블 이름: (행 수, 참가자 수)}
+    """
+    files = _read_manifest(store_dir)['files']
+    names = files if filenames is None else [f for f in filenames if f in files]
+
+    counts = {}
+    for table in TABLE_COLUMNS:
+        rows = {f: files[f]['rows'].get(table, 0) for f in names}
+        participants = {files[f]['participant_id'] for f, n in rows.items() if n}
+        counts[table] = (sum(rows.values()), len(participants))
+    return counts
+
+
+def load_ingested(store_dir, tables=None, columns=None):
+    """
+    적재된 테이블을 DataFrame dict로 로드 (load_sheets와 같은 형태)
+
+    Parameters:
+    -----------
+    store_dir : str
+        ingest()의 store_dir
+    tables : list of str, optional
+        읽을 테이블 (기본값: 전체)
+    columns : dict, optional
+        {테이블 이름: 컬럼 리스트}
+
+    Returns:
+    --------
+    dict : {테이블 이름: DataFrame}
+    """
+    manifest = _read_manifest(store_dir)
+    names = tables if tables is not None else list(TABLE_COLUMNS)
+
+    data = {}
+    for table in names:
+        if table not in TABLE_COLUMNS:
+            raise KeyError(f"알 수 없는 테이블: '{table}'")
+        cols = (columns or {}).get(table)
+        parts = [_part_path(store_dir, table, filename)
+                 for filename, entry in manifest['files'].items() if entry['rows'].get(table)]
+        frames = [pd.read_parquet(part, columns=cols) for part in parts]
+        data[table] = (pd.concat(frames, ignore_index=True) if frames
+                       else pd.DataFrame(columns=cols or TABLE_COLUMNS[table]))
+    return data
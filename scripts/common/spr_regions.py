@@ -0,0 +1,219 @@
+"""
+SPR region 파싱 엔진 (벡터화)
+- Regions / Region_RTs 컬럼 전체를 한 번에 파싱하여 평면(flat) NumPy 배열 + trial별 offset으로 변환
+- 문장 구조 (Subject - Modifier - Spillover - Fact(avg)) long table을 배열 연산으로 생성
+- eval() 사용하지 않음 (common.list_parser 일괄 파싱, 형식 오류 행은 경고 후 빈 리스트)
+
+offset 표현:
+    trial i의 region 값 = values[offsets[i]:offsets[i+1]]
+"""
+
+from itertools import chain
+
+import numpy as np
+import pandas as pd
+
+from common.exclusion_mask import EXCLUSION_COLUMN
+from common.list_parser import parse_number_column, parse_unique_lists, report_malformed
+
+REGION_TYPES = ['Subject', 'Modifier', 'Spillover', 'Fact']
+
+TRIAL_INFO_COLUMNS = ['Participant_ID', 'List_ID', 'Trial_Index', 'Item_ID', 'Base',
+                      'Emotion', 'Plausibility', 'Version']
+
+class RegionArrays:
+    """
+    SPR_Data의 Regions / Region_RTs를 평면 배열로 보관
+
+    Region 텍스트는 문장(아이템)마다 같으므로 고유한 Regions 값만 한 번씩 파싱하고
+    trial은 해당 문장 번호(text_codes)만 가짐
+
+    Attributes:
+    -----------
+    offsets : ndarray (n_trials + 1,)
+        trial별 시작 위치
+    rts : ndarray (n_regions_total,)
+        region RT (float64)
+    text_codes : ndarray (n_trials,)
+        trial별 문장 번호 (sentences 인덱스)
+    sentences : list of list
+        고유한 문장별 region 텍스트 리스트
+    """
+
+    def __init__(self, offsets, rts, text_codes, sentences):
+        self.offsets = offsets
+        self.rts = rts
+        self.text_codes = text_codes
+        self.sentences = sentences
+
+    @property
+    def n_trials(self):
+        return len(self.offsets) - 1
+
+    @property
+    def lengths(self):
+        return np.diff(self.offsets)
+
+    @property
+    def texts(self):
+        """region 텍스트 평면 배열 (n_regions_total,)"""
+        flat, starts = self._sentence_flat()
+        idx = np.repeat(starts[self.text_codes], self.lengths) + self.positions()
+        return flat[idx]
+
+    def _sentence_flat(self):
+        sizes = np.fromiter(map(len, self.sentences), dtype=np.int64, count=len(self.sentences))
+        flat = np.empty(int(sizes.sum()), dtype=object)
+        flat[:] = list(chain.from_iterable(self.sentences))
+        # 마지막 원소: 결측 Regions (빈 문장)
+        return flat, np.concatenate([[0], np.cumsum(sizes)]).astype(np.int64)
+
+    def trial_ids(self):
+        """각 region이 속한 trial 번호 (n_regions_total,)"""
+        return np.repeat(np.arange(self.n_trials), self.lengths)
+
+    def positions(self):
+        """각 region의 trial 내 위치 (0부터)"""
+        return np.arange(len(self.rts)) - np.repeat(self.offsets[:-1], self.lengths)
+
+    def value_at(self, position):
+        """trial별 position 번째 region RT (region 수가 부족하면 NaN)"""
+        out = np.full(self.n_trials, np.nan)
+        has = self.lengths > position
+        out[has] = self.rts[self.offsets[:-1][has] + position]
+        return out
+
+    def text_at(self, position):
+        """trial별 position 번째 region 텍스트 (region 수가 부족하면 None)"""
+        by_sentence = np.array([words[position] if len(words) > position else None
+                                for words in self.sentences] + [None], dtype=object)
+        out = by_sentence[self.text_codes]
+        out[self.lengths <= position] = None
+        return out
+
+    def joined_text(self, start, trials=None):
+        """
+        trial별 start 번째 region부터 끝까지 텍스트를 공백으로 연결 (예: Fact 영역)
+
+        Parameters:
+        -----------
+        start : int
+            시작 위치
+        trials : array-like, optional
+            대상 trial 번호 (기본값: 전체)
+        """
+        trials = np.arange(self.n_trials) if trials is None else np.asarray(trials)
+        by_sentence = np.array([' '.join(words[start:]) for words in self.sentences] + [''],
+                               dtype=object)
+        codes = self.text_codes[trials]
+        out = by_sentence[codes]
+
+        # Region_RTs가 더 짧아 잘린 trial만 따로 처리
+        sizes = np.array([len(words) for words in self.sentences] + [0], dtype=np.int64)
+        lengths = self.lengths[trials]
+        for i in np.flatnonzero(lengths < sizes[codes]):
+            out[i] = ' '.join(self.sentences[codes[i]][start:lengths[i]])
+        return out
+
+
+def parse_regions(df):
+    """
+    Regions / Region_RTs 컬럼을 RegionArrays로 변환
+
+    Regions와 Region_RTs 길이가 다른 trial은 짧은 쪽에 맞춤
+
+    Parameters:
+    -----------
+    df : DataFrame
+        SPR_Data (Regions, Region_RTs 컬럼 포함)
+
+    Returns:
+    --------
+    RegionArrays
+    """
+    # 텍스트: 고유 문장만 파싱 (결측치는 마지막 빈 문장으로)
+    codes, sentences, bad_regions = parse_unique_lists(df['Regions'])
+    sentences = sentences[:-1]
+    sentence_sizes = np.array([len(words) for words in sentences] + [0], dtype=np.int64)
+
+    rt_offsets, rts, bad_rts = parse_number_column(df['Region_RTs'])
+    report_malformed('Regions', bad_regions, df.index)
+    report_malformed('Region_RTs', bad_rts, df.index)
+
+    len_rts = np.diff(rt_offsets)
+    len_regions = sentence_sizes[codes]
+    lengths = np.minimum(len_regions, len_rts)
+
+    offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+
+    if (len_rts != lengths).any():
+        positions = np.arange(offsets[-1]) - np.repeat(offsets[:-1], lengths)
+        rts = rts[np.repeat(rt_offsets[:-1], lengths) + positions]
+
+    return RegionArrays(offsets, rts, codes, sentences)
+
+
+def explode_sentence_structure(df, fact_lower=200, fact_upper=3000, with_position=False):
+    """
+    문장 구조 파싱: Subject - Modifier - Spillover - Fact(avg)
+
+    기존 parse_sentence_structure (iterrows + eval)와 같은 결과를 배열 연산으로 생성
+    - 필러(Is_Filler == 1)와 region이 4개 미만인 trial은 제외
+    - Fact = 4번째 region부터의 평균 RT (fact_lower-fact_upper 범위 밖 region 제외)
+    - 유효한 Fact region이 없으면 Fact 행 생략
+
+    Parameters:
+    -----------
+    df : DataFrame
+        SPR_Data
+    fact_lower, fact_upper : float
+        Fact 평균에 포함할 word-level RT 범위
+    with_position : bool
+        True이면 Region_Position 컬럼 (0-3) 추가
+
+    Returns:
+    --------
+    DataFrame : trial × region type long table
+    """
+    arrays = parse_regions(df)
+    lengths = arrays.lengths
+    starts = arrays.offsets[:-1]
+
+    keep = (df['Is_Filler'].to_numpy() != 1) & (lengths >= 4)
+    trials = np.flatnonzero(keep)
+
+    # Fact: trial 내 위치 3 이상 + 범위 내 RT
+    trial_ids = arrays.trial_ids()
+    fact_mask = (arrays.positions() >= 3) & (arrays.rts >= fact_lower) & (arrays.rts <= fact_upper)
+    fact_sum = np.bincount(trial_ids[fact_mask], weights=arrays.rts[fact_mask],
+                           minlength=arrays.n_trials)
+    fact_n = np.bincount(trial_ids[fact_mask], minlength=arrays.n_trials)
+    fact_trials = trials[fact_n[trials] > 0]
+
+    # 블록별 (trial, region type, RT, text) 구성 후 trial 순서로 정렬
+    fixed_idx = [starts[trials] + k for k in range(3)]
+    row_trial = np.concatenate([trials, trials, trials, fact_trials])
+    row_type = np.repeat(np.arange(4), [len(trials)] * 3 + [len(fact_trials)])
+    row_rt = np.concatenate([arrays.rts[idx] for idx in fixed_idx]
+                            + [fact_sum[fact_trials] / fact_n[fact_trials]])
+
+    row_text = np.concatenate([arrays.text_at(k)[trials] for k in range(3)]
+                              + [arrays.joined_text(3, fact_trials)])
+
+    order = np.lexsort((row_type, row_trial))
+    row_trial, row_type = row_trial[order], row_type[order]
+
+    # trial 제외 비트마스크 (common.exclusion_mask)가 있으면 region 행에 그대로 전달
+    info_cols = [c for c in TRIAL_INFO_COLUMNS + [EXCLUSION_COLUMN] if c in df.columns]
+    parsed = df[info_cols].iloc[row_trial].reset_index(drop=True)
+    for col in parsed.columns:
+        # 필러 제외로 쓰이지 않게 된 범주 (예: P_filler) 제거 → formula의 design matrix가 full rank
+        if isinstance(parsed[col].dtype, pd.CategoricalDtype):
+            parsed[col] = parsed[col].cat.remove_unused_categories()
+    parsed['Region_Type'] = pd.Categorical.from_codes(row_type, REGION_TYPES)
+    parsed['Region_Text'] = row_text[order]
+    parsed['RT'] = row_rt[order]
+    if with_position:
+        parsed['Region_Position'] = row_type
+    return parsed
@@ -0,0 +1,166 @@
+"""
+SPR_Data 청크 단위 스트리밍 파싱
+- 시트를 고정 크기 청크로 읽고 (Parquet 캐시가 있으면 iter_batches, 없으면 openpyxl read-only 스트리밍)
+- 청크마다 region long table을 만들어 Parquet 파일에 이어 쓰거나 callback으로 전달
+- 한 번에 메모리에 있는 것은 청크 1개 분량 → 참가자 수와 무관하게 최대 메모리가 거의 일정
+- stream_quantiles: 같은 한 번의 읽기로 분위수 sketch 갱신 (IQR 기준 등)
+"""
+
+import os
+
+import pandas as pd
+
+from common.data_cache import HAS_PYARROW, _cache_root, _normalize_types, _read_manifest, workbook_hash
+from common.quantile_sketch import DEFAULT_K, QuantileSketch, sketch_by
+
+DEFAULT_CHUNK_ROWS = 5000
+
+# pd.read_excel이 결측치로 읽는 문자열 (openpyxl 경로도 같은 결과가 되도록)
+_NA_STRINGS = {'', '#N/A', 'N/A', 'NA', 'NULL', 'NaN', 'nan', 'null', 'None'}
+
+
+def _cached_sheet_path(excel_path, sheet):
+    """Parquet 캐시에 시트가 이미 있으면 파일 경로, 없으면 None (캐시를 새로 만들지 않음)"""
+    target = os.path.join(_cache_root(excel_path), workbook_hash(excel_path)[:16])
+    manifest = _read_manifest(target)
+    entry = manifest['sheets'].get(sheet) if manifest else None
+    return os.path.join(target, entry['file']) if entry else None
+
+
+def _rows_to_frame(buffer, names, start):
+    buffer = [[None if isinstance(v, str) and v in _NA_STRINGS else v for v in row] for row in buffer]
+    chunk = pd.DataFrame(buffer, columns=names, index=pd.RangeIndex(start, start + len(buffer)))
+    return _normalize_types(chunk)
+
+
+def iter_sheet_chunks(excel_path, sheet='SPR_Data', chunk_rows=DEFAULT_CHUNK_ROWS, columns=None):
+    """
+    시트를 chunk_rows행씩 DataFrame으로 읽는 generator
+
+    Parameters:
+    -----------
+    excel_path : str
+        ExpLing_Project.xlsx 경로
+    sheet : str
+        시트 이름
+    chunk_rows : int
+        청크당 행 수
+    columns : list of str, optional
+        읽을 컬럼
+
+    Yields:
+    -------
+    DataFrame : 청크 (index는 시트 전체 기준 행 번호)
+    """
+    cached = _cached_sheet_path(excel_path, sheet) if HAS_PYARROW else None
+    start = 0
+
+    if cached is not None:
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(cached).iter_batches(batch_size=chunk_rows, columns=columns):
+            chunk = batch.to_pandas()
+            chunk.index = pd.RangeIndex(start, start + len(chunk))
+            start += len(chunk)
+            yield chunk
+        return
+
+    from openpyxl import load_workbook
+    wb = load_workbook(excel_path, read_only=True, data_only=True)
+    try:
+        rows = wb[sheet].iter_rows(values_only=True)
+        header = list(next(rows, ()))
+        usecols = [header.index(c) for c in columns] if columns else list(range(len(header)))
+        names = [header[i] for i in usecols]
+
+        buffer = []
+        for row in rows:
+            if all(v is None for v in row):
+                continue
+            buffer.append([row[i] if i < len(row) else None for i in usecols])
+            if len(buffer) == chunk_rows:
+                yield _rows_to_frame(buffer, names, start)
+                start += len(buffer)
+                buffer = []
+        if buffer:
+            yield _rows_to_frame(buffer, names, start)
+    finally:
+        wb.close()
+
+
+def stream_regions(chunks, explode, out_path=None, callback=None):
+    """
+    청크별 region long table 생성 후 Parquet 파일에 이어 쓰기 / callback 호출
+
+    Parameters:
+    -----------
+    chunks : iterable of DataFrame
+        iter_sheet_chunks() 등
+    explode : callable
+        SPR 청크 DataFrame → region long table DataFrame (예: parse_spr_regions)
+    out_path : str, optional
+        결과 Parquet 파일 경로 (청크마다 row group 1개)
+    callback : callable, optional
+        callback(long_table_chunk) 호출
+
+    Returns:
+    --------
+    dict : {'n_trials': 읽은 trial 수, 'n_rows': 생성한 region 행 수, 'n_chunks': 청크 수}
+    """
+    if out_path is None and callback is None:
+        raise ValueError("out_path 또는 callback 중 하나는 지정해야 합니다")
+
+    writer = None
+    schema = None
+    summary = {'n_trials': 0, 'n_rows': 0, 'n_chunks': 0}
+    try:
+        for chunk in chunks:
+            parsed = explode(chunk)
+            summary['n_trials'] += len(chunk)
+            summary['n_rows'] += len(parsed)
+            summary['n_chunks'] += 1
+
+            if callback is not None:
+                callback(parsed)
+            if out_path is not None and len(parsed) > 0:
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+                if writer is None:
+                    table = pa.Table.from_pandas(parsed, preserve_index=False)
+                    schema = table.schema
+                    writer = pq.ParquetWriter(out_path, schema)
+                else:
+                    table = pa.Table.from_pandas(parsed, schema=schema, preserve_index=False)
+                writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
+    return summary
+
+
+def stream_quantiles(chunks, value, by=None, k=DEFAULT_K):
+    """
+    청크를 한 번 읽으면서 value 컬럼의 분위수 sketch 갱신 (common.quantile_sketch)
+
+    Parameters:
+    -----------
+    chunks : iterable of DataFrame
+        iter_sheet_chunks() 등
+    value : str
+        RT 컬럼 (예: 'Total_Reading_Time_ms')
+    by : str, optional
+        그룹 컬럼 (예: 'Participant_ID') → 그룹별 sketch도 함께 반환
+    k : int
+        sketch 정확도 파라미터
+
+    Returns:
+    --------
+    QuantileSketch (by가 없을 때) 또는 (전체 sketch, {그룹: sketch})
+    """
+    total = QuantileSketch(k=k)
+    groups = {}
+    for chunk in chunks:
+        total.update(chunk[value])
+        if by is not None:
+            for key, sketch in sketch_by(chunk, value, by, k=k).items():
+                groups[key] = groups[key].merge(sketch) if key in groups else sketch
+    return total if by is None else (total, groups)
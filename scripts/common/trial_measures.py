@@ -0,0 +1,200 @@
+"""
+trial별 파생 측정치 테이블 (wide, trial당 1행)
+- SPR_Data의 Regions / Region_RTs를 한 번만 파싱해 subject_RT, modifier_RT, spillover_RT, fact_RT 계산
+- 측정치마다 유효 여부 플래그 (<측정치>_valid: 해당 region이 있는지)
+- 컬럼별 출처 / 계산식 (provenance)을 JSON으로 함께 저장
+- 워크북 내용 (SHA-256)이나 계산 설정이 바뀐 경우에만 다시 생성
+
+저장 위치: <워크북 폴더>/.derived/
+    trial_measures.parquet   wide 테이블
+    trial_measures.json      provenance (워크북 해시, 설정, 컬럼별 출처)
+
+사용법:
+    from common.trial_measures import load_trial_measures
+    measures = load_trial_measures('result_1201/ExpLing_Project.xlsx')
+"""
+
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from common.data_cache import HAS_PYARROW, SPR_ANALYSIS_COLUMNS, load_sheet, workbook_hash
+from common.spr_regions import TRIAL_INFO_COLUMNS, parse_regions
+
+DERIVED_DIRNAME = '.derived'
+TABLE_NAME = 'trial_measures.parquet'
+PROVENANCE_NAME = 'trial_measures.json'
+
+# 계산 방식이 바뀌면 올려서 기존 테이블을 다시 생성
+BUILD_VERSION = 1
+
+# Fact 평균에 포함할 word-level RT 범위 (explode_sentence_structure 기본값과 동일)
+FACT_RT_RANGE = (200, 3000)
+
+# 측정치: (region 위치, 설명)
+REGION_MEASURES = {
+    'subject_RT': (0, "Region_RTs[0] (주어)"),
+    'modifier_RT': (1, "Region_RTs[1] (수식어)"),
+    'spillover_RT': (2, "Region_RTs[2] (명사 / spillover)"),
+}
+
+# trial 정보 외에 그대로 옮기는 SPR_Data 컬럼
+SOURCE_COLUMNS = ['Is_Filler', 'Total_Reading_Time_ms']
+
+# 옛 CSV (spr_data_parsed_1201.csv) 컬럼 이름
+LEGACY_COLUMNS = {
+    'Participant_ID': 'participant_id', 'List_ID': 'list_id', 'Trial_Index': 'trial_index',
+    'Item_ID': 'item_id', 'Base': 'base', 'Emotion': 'emotion', 'Plausibility': 'plausibility',
+    'Version': 'version', 'Is_Filler': 'is_filler', 'Total_Reading_Time_ms': 'total_RT',
+}
+
+
+def _provenance_columns(info_cols):
+    low, high = FACT_RT_RANGE
+    columns = {col: {'source': f'SPR_Data.{col}', 'formula': '원본 값'} for col in info_cols}
+    columns['n_regions'] = {'source': 'SPR_Data.Regions, SPR_Data.Region_RTs',
+                            'formula': 'min(len(Regions), len(Region_RTs))'}
+    for name, (pos, desc) in REGION_MEASURES.items():
+        columns[name] = {'source': 'SPR_Data.Region_RTs', 'formula': desc}
+        columns[name.replace('_RT', '_valid')] = {'source': 'SPR_Data.Region_RTs',
+                                                  'formula': f'n_regions > {pos}'}
+    columns['fact_RT'] = {'source': 'SPR_Data.Region_RTs',
+                          'formula': f'mean(Region_RTs[3:]), {low}-{high}ms 범위 region만'}
+    columns['fact_n'] = {'source': 'SPR_Data.Region_RTs',
+                         'formula': f'Region_RTs[3:] 중 {low}-{high}ms 범위 region 수'}
+    columns['fact_valid'] = {'source': 'SPR_Data.Region_RTs', 'formula': 'fact_n > 0'}
+    return columns
+
+
+def build_trial_measures(spr):
+    """
+    SPR_Data → trial별 파생 측정치 wide 테이블 (모든 trial 유지, 필러 / 연습 포함)
+
+    Parameters:
+    -----------
+    spr : DataFrame
+        SPR_Data
+
+    Returns:
+    --------
+    DataFrame : trial 정보 + Is_Filler, Total_Reading_Time_ms + n_regions
+                + subject/modifier/spillover/fact_RT + <측정치>_valid + fact_n
+    """
+    arrays = parse_regions(spr)
+    info_cols = [c for c in TRIAL_INFO_COLUMNS if c in spr.columns]
+    extra = [c for c in SOURCE_COLUMNS if c in spr.columns]
+    table = spr[info_cols + extra].reset_index(drop=True)
+    table['n_regions'] = arrays.lengths
+
+    for name, (pos, _) in REGION_MEASURES.items():
+        table[name] = arrays.value_at(pos)
+        table[name.replace('_RT', '_valid')] = arrays.lengths > pos
+
+    low, high = FACT_RT_RANGE
+    trial_ids = arrays.trial_ids()
+    fact_mask = (arrays.positions() >= 3) & (arrays.rts >= low) & (arrays.rts <= high)
+    fact_n = np.bincount(trial_ids[fact_mask], minlength=arrays.n_trials)
+    fact_sum = np.bincount(trial_ids[fact_mask], weights=arrays.rts[fact_mask],
+                           minlength=arrays.n_trials)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        table['fact_RT'] = np.where(fact_n > 0, fact_sum / fact_n, np.nan)
+    table['fact_n'] = fact_n
+    table['fact_valid'] = fact_n > 0
+    return table
+
+
+def _derived_paths(excel_path):
+    root = os.path.join(os.path.dirname(os.path.abspath(excel_path)), DERIVED_DIRNAME)
+    return root, os.path.join(root, TABLE_NAME), os.path.join(root, PROVENANCE_NAME)
+
+
+def _is_current(provenance_path, table_path, digest):
+    if not (os.path.exists(provenance_path) and os.path.exists(table_path)):
+        return False
+    with open(provenance_path, encoding='utf-8') as f:
+        provenance = json.load(f)
+    return (provenance.get('sha256') == digest
+            and provenance.get('build_version') == BUILD_VERSION
+            and provenance.get('fact_rt_range') == list(FACT_RT_RANGE))
+
+
+def materialize_trial_measures(excel_path, force=False):
+    """
+    파생 측정치 테이블 생성 (워크북이 바뀌지 않았으면 건너뜀)
+
+    Returns:
+    --------
+    tuple : (table_path, rebuilt)
+    """
+    root, table_path, provenance_path = _derived_paths(excel_path)
+    digest = workbook_hash(excel_path)
+    if not force and _is_current(provenance_path, table_path, digest):
+        return table_path, False
+
+    print(f"파생 측정치 테이블 생성 중: {excel_path} → {table_path}")
+    spr = load_sheet(excel_path, 'SPR_Data', columns=SPR_ANALYSIS_COLUMNS)
+    table = build_trial_measures(spr)
+
+    os.makedirs(root, exist_ok=True)
+    tmp_path = table_path + '.tmp'
+    if HAS_PYARROW:
+        table.to_parquet(tmp_path, index=False)
+    else:
+        table.to_pickle(tmp_path)
+    os.replace(tmp_path, table_path)
+
+    provenance = {
+        'workbook': os.path.basename(excel_path),
+        'sha256': digest,
+        'build_version': BUILD_VERSION,
+        'fact_rt_range': list(FACT_RT_RANGE),
+        'built_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'n_trials': len(table),
+        'columns': _provenance_columns([c for c in TRIAL_INFO_COLUMNS + SOURCE_COLUMNS
+                                        if c in table.columns]),
+    }
+    with open(provenance_path, 'w', encoding='utf-8') as f:
+        json.dump(provenance, f, ensure_ascii=False, indent=2)
+    return table_path, True
+
+
+def load_trial_measures(excel_path, columns=None):
+    """
+    파생 측정치 테이블 로드 (없거나 오래됐으면 먼저 생성)
+
+    Parameters:
+    -----------
+    excel_path : str
+        ExpLing_Project.xlsx 경로
+    columns : list of str, optional
+        읽을 컬럼
+
+    Returns:
+    --------
+    DataFrame : trial당 1행 (build_trial_measures 참고)
+    """
+    table_path, _ = materialize_trial_measures(excel_path)
+    if HAS_PYARROW:
+        return pd.read_parquet(table_path, columns=columns)
+    table = pd.read_pickle(table_path)
+    return table if columns is None else table[columns]
+
+
+def load_provenance(excel_path):
+    """컬럼별 출처 / 계산식 (trial_measures.json) 로드"""
+    materialize_trial_measures(excel_path)
+    with open(_derived_paths(excel_path)[2], encoding='utf-8') as f:
+        return json.load(f)
+
+
+def export_legacy_csv(table, csv_path):
+    """
+    spr_data_parsed_<날짜>.csv 형식으로 저장
+    (apply_outlier_exclusion_1201.py가 읽는 is_filler, emotion, modifier_RT 등 소문자 컬럼)
+    """
+    legacy = table.rename(columns=LEGACY_COLUMNS)
+    legacy.to_csv(csv_path, index=False)
+    return legacy
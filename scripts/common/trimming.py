@@ -0,0 +1,120 @@
+"""
+그룹별 RT 이상치 trimming (참가자별, 참가자 × 조건별 등)
+- groupby().transform() 커널로 그룹별 기준값을 행마다 계산 → 그룹 반복문 없음
+- 규칙: IQR, SD, MAD, percentile
+- trial 단위 (예: Total_Reading_Time_ms) / region 단위 (long table의 RT, by에 region 컬럼 포함) 모두 사용
+
+결과는 df와 같은 index의 bool 마스크 (True = 유지)
+    - 값이 결측이거나 그룹 키가 결측인 행은 False (groupby 반복문에서 빠지는 것과 동일)
+    - 그룹의 퍼짐 (SD, IQR, MAD)이 0이거나 계산 불가 (n=1)이면 그룹 전체 유지
+
+사용 예:
+    keep = trim_mask(spr, 'Total_Reading_Time_ms', by='Participant_ID', rule='sd', k=2.5)
+    keep = trim_mask(parsed, 'RT', by=['Participant_ID', 'Emotion', 'Region_Type'], rule='mad', k=3)
+"""
+
+import numpy as np
+import pandas as pd
+
+TRIM_RULES = ('iqr', 'sd', 'mad', 'percentile')
+
+# 정규분포에서 MAD → SD 환산 계수
+MAD_SCALE = 1.4826
+
+
+def _grouped(series, keys):
+    if keys is None:
+        return None
+    return series.groupby(keys, sort=False, observed=True, dropna=True)
+
+
+def _transform(series, keys, func, **kwargs):
+    """그룹별 통계를 행마다 (keys가 없으면 전체 통계를 broadcast)"""
+    grouped = _grouped(series, keys)
+    if grouped is None:
+        value = getattr(series, func)(**kwargs)
+        return pd.Series(value, index=series.index, dtype=np.float64)
+    return grouped.transform(func, **kwargs).astype(np.float64)
+
+
+def trim_bounds(df, value, by=None, rule='sd', k=2.5, quantiles=(0.025, 0.975), ddof=1):
+    """
+    행별 (하한, 상한)과 퍼짐 계산
+
+    Parameters:
+    -----------
+    df : DataFrame
+    value : str
+        RT 컬럼
+    by : str or list of str, optional
+        그룹 컬럼 (None이면 전체 하나의 그룹)
+    rule : str
+        'sd': 평균 ± k·SD
+        'iqr': Q1 - k·IQR, Q3 + k·IQR
+        'mad': 중앙값 ± k·1.4826·MAD
+        'percentile': quantiles 범위 (k 사용 안 함)
+    k : float
+        기준 배수
+    quantiles : tuple
+        percentile 규칙의 (하위, 상위) 분위수
+    ddof : int
+        SD 자유도 (pandas std 기본값 1, np.std 기본값 0)
+
+    Returns:
+    --------
+    tuple : (lower, upper, spread) 각각 df와 같은 index의 Series
+    """
+    if rule not in TRIM_RULES:
+        raise ValueError(f"알 수 없는 trimming 규칙: {rule} (가능: {', '.join(TRIM_RULES)})")
+
+    series = df[value].astype(np.float64)
+    keys = None
+    if by is not None:
+        by = [by] if isinstance(by, str) else list(by)
+        keys = [df[col] for col in by]
+
+    if rule == 'sd':
+        center = _transform(series, keys, 'mean')
+        spread = _transform(series, keys, 'std', ddof=ddof)
+        return center - k * spread, center + k * spread, spread
+
+    if rule == 'iqr':
+        q1 = _transform(series, keys, 'quantile', q=0.25)
+        q3 = _transform(series, keys, 'quantile', q=0.75)
+        spread = q3 - q1
+        return q1 - k * spread, q3 + k * spread, spread
+
+    if rule == 'mad':
+        median = _transform(series, keys, 'median')
+        spread = MAD_SCALE * _transform((series - median).abs(), keys, 'median')
+        return median - k * spread, median + k * spread, spread
+
+    lower = _transform(series, keys, 'quantile', q=quantiles[0])
+    upper = _transform(series, keys, 'quantile', q=quantiles[1])
+    return lower, upper, upper - lower
+
+
+def trim_mask(df, value, by=None, rule='sd', k=2.5, quantiles=(0.025, 0.975), ddof=1):
+    """
+    그룹별 trimming 마스크 (True = 유지, 인자는 trim_bounds 참고)
+
+    Returns:
+    --------
+    Series of bool : df와 같은 index
+    """
+    lower, upper, spread = trim_bounds(df, value, by=by, rule=rule, k=k,
+                                       quantiles=quantiles, ddof=ddof)
+    x = df[value].astype(np.float64)
+    if by is None:
+        in_group = pd.Series(True, index=df.index)
+    else:
+        in_group = df[[by] if isinstance(by, str) else list(by)].notna().all(axis=1)
+    no_spread = spread.isna() | (spread == 0)
+    keep = ((x >= lower) & (x <= upper)) | no_spread
+    return keep & in_group & x.notna()
+
+
+def report_trimming(name, keep):
+    """trimming 결과 출력"""
+    removed = int((~keep).sum())
+    print(f"{name}: 제거 {removed}개 / {len(keep)}개 ({removed / len(keep) * 100:.1f}%)")
@@ -10,6 +10,12 @@ import matplotlib.pyplot as plt
 import seaborn as sns
 from scipy import stats
 import warnings
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.participant_effects import h3_effects
+
 warnings.filterwarnings('ignore')
 
 plt.rcParams['font.family'] = 'DejaVu Sans'
@@ -34,43 +40,10 @@ def analyze_h3_h4_integration():
     print("1. H3 분석: 참가자별 기억 왜곡 정도")
     print("="*80)
 
-    participant_h3 = []
-
-    for pid in rating_clean['Participant_ID'].unique():
-        p_data = rating_clean[rating_clean['Participant_ID'] == pid]
-
-        # Hate condition: Plausibility effect
-        h_data = p_data[p_data['Emotion'] == 'H']
-        h_p = h_data[h_data['Plausibility'] == 'P']['Rating'].mean()
-        h_i = h_data[h_data['Plausibility'] == 'I']['Rating'].mean()
-        hate_plaus_effect = h_p - h_i
-
-        # Neutral condition: Plausibility effect
-        n_data = p_data[p_data['Emotion'] == 'N']
-        n_p = n_data[n_data['Plausibility'] == 'P']['Rating'].mean()
-        n_i = n_data[n_data['Plausibility'] == 'I']['Rating'].mean()
-        neutral_plaus_effect = n_p - n_i
-
-        # H3 핵심: Hate에서 plausibility 구별 능력 손상 정도
-        # 음수일수록 더 큰 왜곡 (중립에서는 정상, 혐오에서는 손상)
-        distortion = hate_plaus_effect - neutral_plaus_effect
-
-        # Overall bias: Hate context에서 전반적으로 낮게 평가하는 정도
-        h_mean = h_data['Rating'].mean()
-        n_mean = n_data['Rating'].mean()
-        hate_bias = h_mean - n_mean
-
-        participant_h3.append({
-            'Participant_ID': pid,
-            'Hate_Plaus_Effect': hate_plaus_effect,
-            'Neutral_Plaus_Effect': neutral_plaus_effect,
-            'Distortion': distortion,
-            'Hate_Mean_Rating': h_mean,
-            'Neutral_Mean_Rating': n_mean,
-            'Hate_Bias': hate_bias
-        })
-
-    h3_df = pd.DataFrame(participant_h3)
+    # 참가자 × 조건 셀 pivot 한 번으로 전체 참가자 지표 계산
+    # Distortion: 음수일수록 더 큰 왜곡 (중립에서는 정상, 혐오에서는 손상)
+    # Hate_Bias: Hate context에서 전반적으로 낮게 평가하는 정도
+    h3_df = h3_effects(rating_clean)
 
     print("\n참가자별 H3 지표:")
     print(h3_df.to_string(index=False))
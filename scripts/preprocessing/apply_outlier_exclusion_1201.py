@@ -10,6 +10,11 @@ import matplotlib.pyplot as plt
 import seaborn as sns
 from scipy import stats
 import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.exclusion_sweep import exclusion_sweep
+from common.bootstrap import ClusterBootstrap
 
 # Create output directory if needed
 os.makedirs('result_1201', exist_ok=True)
@@ -39,6 +44,10 @@ criteria = {
     'Stricter (200-1600ms)': (200, 1600)
 }
 
+# All criteria in one pass (sorted RTs + prefix sums)
+sweep = exclusion_sweep(df_exp['modifier_RT'], df_exp['emotion'],
+                        [lo for lo, _ in criteria.values()], [hi for _, hi in criteria.values()])
+
 # Store results
 results = []
 
@@ -46,7 +55,7 @@ print("\n" + "="*60)
 print("APPLYING EXCLUSION CRITERIA")
 print("="*60)
 
-for criterion_name, (lower, upper) in criteria.items():
+for (criterion_name, (lower, upper)), (_, row) in zip(criteria.items(), sweep.iterrows()):
     print(f"\n{criterion_name}:")
     print(f"  Lower bound: {lower}ms")
     print(f"  Upper bound: {upper}ms")
@@ -61,22 +70,12 @@ for criterion_name, (lower, upper) in criteria.items():
     print(f"  Excluded: {n_excluded} trials ({pct_excluded:.1f}%)")
     print(f"  Retained: {len(df_filtered)} trials")
 
-    # Calculate statistics by emotion condition
-    hate_rts = df_filtered[df_filtered['emotion'] == 'H']['modifier_RT']
-    neutral_rts = df_filtered[df_filtered['emotion'] == 'N']['modifier_RT']
-
-    mean_hate = hate_rts.mean()
-    mean_neutral = neutral_rts.mean()
-    diff = mean_hate - mean_neutral
-
-    # Statistical test
-    t_stat, p_value = stats.ttest_ind(hate_rts, neutral_rts)
-
-    # Cohen's d
-    pooled_std = np.sqrt(((len(hate_rts)-1)*hate_rts.std()**2 +
-                          (len(neutral_rts)-1)*neutral_rts.std()**2) /
-                         (len(hate_rts) + len(neutral_rts) - 2))
-    cohens_d = diff / pooled_std
+    # Statistics by emotion condition (t-test, Cohen's d) from the one-pass sweep
+    mean_hate = row['Mean_H']
+    mean_neutral = row['Mean_N']
+    diff = row['Difference']
+    t_stat, p_value = row['t_ind'], row['p_ind']
+    cohens_d = row['d_pooled']
 
     print(f"  Mean Hate RT: {mean_hate:.2f}ms")
     print(f"  Mean Neutral RT: {mean_neutral:.2f}ms")
@@ -85,6 +84,17 @@ for criterion_name, (lower, upper) in criteria.items():
     print(f"  p-value: {p_value:.4f}")
     print(f"  Cohen's d: {cohens_d:.4f}")
 
+    # Trials are repeated measures: resample participants, not trials
+    boot_d = ClusterBootstrap(df_filtered['modifier_RT'], df_filtered['emotion'],
+                              df_filtered['participant_id'], statistic='cohens_d', seed=42)
+    boot_diff = ClusterBootstrap(df_filtered['modifier_RT'], df_filtered['emotion'],
+                                 df_filtered['participant_id'], statistic='paired_diff', seed=42)
+    d_ci = boot_d.ci('percentile')
+    diff_ci = boot_diff.ci('percentile')
+    print(f"  Participant bootstrap 95% CI (N={boot_d.n_clusters}): "
+          f"d [{d_ci[0]:.4f}, {d_ci[1]:.4f}], "
+          f"paired difference {boot_diff.estimate:.2f}ms [{diff_ci[0]:.2f}, {diff_ci[1]:.2f}]")
+
     results.append({
         'Criterion': criterion_name,
         'Lower_bound': lower,
@@ -98,8 +108,14 @@ for criterion_name, (lower, upper) in criteria.items():
         't_stat': t_stat,
         'p_value': p_value,
         'cohens_d': cohens_d,
-        'N_hate': len(hate_rts),
-        'N_neutral': len(neutral_rts)
+        'd_ci_lower': d_ci[0],
+        'd_ci_upper': d_ci[1],
+        'Paired_diff': boot_diff.estimate,
+        'Paired_diff_ci_lower': diff_ci[0],
+        'Paired_diff_ci_upper': diff_ci[1],
+        'N_participants': boot_d.n_clusters,
+        'N_hate': int(row['N_H']),
+        'N_neutral': int(row['N_N'])
     })
 
     # Save filtered dataset
@@ -241,7 +257,11 @@ with open('result_1201/outlier_exclusion_summary.txt', 'w', encoding='utf-8') as
         f.write(f"  Mean Neutral RT: {result['Mean_Neutral']:.2f}ms (N={result['N_neutral']})\n")
         f.write(f"  Difference: {result['Difference']:.2f}ms\n")
         f.write(f"  t({result['N_hate']+result['N_neutral']-2}) = {result['t_stat']:.4f}, p = {result['p_value']:.4f}\n")
-        f.write(f"  Cohen's d = {result['cohens_d']:.4f}\n")
+        f.write(f"  Cohen's d = {result['cohens_d']:.4f} "
+                f"(participant bootstrap 95% CI [{result['d_ci_lower']:.4f}, {result['d_ci_upper']:.4f}])\n")
+        f.write(f"  Participant-level difference: {result['Paired_diff']:.2f}ms "
+                f"(95% CI [{result['Paired_diff_ci_lower']:.2f}, {result['Paired_diff_ci_upper']:.2f}], "
+                f"N={result['N_participants']})\n")
         f.write("\n")
 
     f.write("="*60 + "\n")
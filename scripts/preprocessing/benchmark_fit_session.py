@@ -0,0 +1,81 @@
+"""
+혼합모형 warm start 벤치마크: FitSession(warm_start=False) vs FitSession()
+- result_1201 Modifier 영역 (analyze_result_1201과 같은 전처리)에
+  상한 1000-3000ms (50ms 간격, 하한 200ms) 기준마다 RT ~ Emotion 재적합
+- cold / warm 세션의 반복 수 · 목적함수 평가 수 · 소요 시간 비교
+- 두 세션의 Emotion[T.N] 계수 / p값 차이 확인
+
+사용법 (저장소 루트에서):
+    python scripts/preprocessing/benchmark_fit_session.py [상한 간격 ms]
+"""
+
+import os
+import sys
+import time
+import warnings
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.data_cache import load_sheet, SPR_ANALYSIS_COLUMNS
+from common.spr_regions import explode_sentence_structure
+from common.fit_session import FitSession
+
+warnings.filterwarnings('ignore')
+
+EXCEL_PATH = 'result_1201/ExpLing_Project.xlsx'
+
+
+def load_modifier_rt(excel_path, k=2.5):
+    """연습 문장 / trial-level IQR / word-level (200-3000ms) 제거 후 Modifier 영역"""
+    spr = load_sheet(excel_path, 'SPR_Data', columns=SPR_ANALYSIS_COLUMNS)
+    spr = spr[~spr['Sentence_Text'].str.contains('연습', na=False)]
+
+    total_rts = spr['Total_Reading_Time_ms'].values
+    q1, q3 = np.percentile(total_rts, [25, 75])
+    spr = spr[(total_rts >= q1 - k * (q3 - q1)) & (total_rts <= q3 + k * (q3 - q1))]
+
+    parsed = explode_sentence_structure(spr)
+    parsed = parsed[(parsed['RT'] >= 200) & (parsed['RT'] <= 3000)]
+    return parsed[parsed['Region_Type'] == 'Modifier'].copy()
+
+
+def run_sweep(modifier_df, uppers, warm_start):
+    """상한 기준마다 RT ~ Emotion 적합 → (세션, 계수 배열, p값 배열, 소요 시간)"""
+    session = FitSession(warm_start=warm_start)
+    coefs, pvalues = [], []
+    start = time.perf_counter()
+    for upper in uppers:
+        subset = modifier_df[(modifier_df['RT'] >= 200) & (modifier_df['RT'] <= upper)]
+        result = session.fit("RT ~ Emotion", subset)
+        coefs.append(result.fe_params['Emotion[T.N]'])
+        pvalues.append(result.pvalues['Emotion[T.N]'])
+    return session, np.array(coefs), np.array(pvalues), time.perf_counter() - start
+
+
+def main():
+    step = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    uppers = np.arange(1000, 3001, step)
+
+    print("="*80)
+    print(f"혼합모형 warm start 벤치마크 (상한 {len(uppers)}개 기준)")
+    print("="*80)
+
+    modifier_df = load_modifier_rt(EXCEL_PATH)
+    print(f"\nModifier 영역: {len(modifier_df)} 행, "
+          f"참가자 {modifier_df['Participant_ID'].nunique()}명")
+
+    runs = {label: run_sweep(modifier_df, uppers, warm_start)
+            for label, warm_start in [('cold', False), ('warm', True)]}
+    for label, (session, _, _, elapsed) in runs.items():
+        totals = session.summary().iloc[0]
+        print(f"\n[{label}] {elapsed:.2f}초, 반복 {totals['iterations']}회, "
+              f"평가 {totals['evaluations']}회, 수렴 {totals['converged']}")
+
+    (_, cold_coefs, cold_p, _), (_, warm_coefs, warm_p, _) = runs['cold'], runs['warm']
+    print(f"\nEmotion[T.N] 최대 차이 (warm - cold): {np.abs(warm_coefs - cold_coefs).max():.4f} ms")
+    print(f"p값 최대 차이: {np.abs(warm_p - cold_p).max():.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+리스트 셀 파서 벤치마크: eval 경로 vs common.list_parser
+- result_1201 SPR_Data의 Regions / Region_RTs를 N행으로 복제 (RT는 난수로 교체)
+- 기존 방식: df['Region_RTs'].apply(eval) + 평면화
+- 새 방식: parse_number_column / parse_list_column (offset + 평면 배열)
+- 형식 오류 셀이 섞인 경우 행 번호 보고 확인
+
+사용법 (저장소 루트에서):
+    python scripts/preprocessing/benchmark_list_parser.py [행 수]
+"""
+
+import os
+import sys
+import time
+from itertools import chain
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.data_cache import load_sheet
+from common.list_parser import parse_number_column, parse_list_column
+
+EXCEL_PATH = 'result_1201/ExpLing_Project.xlsx'
+
+
+def make_benchmark_data(spr, n_rows, seed=0):
+    """SPR_Data를 n_rows행으로 복제하고 Region_RTs를 난수 정수 리스트로 교체"""
+    reps = n_rows // len(spr) + 1
+    df = pd.concat([spr] * reps, ignore_index=True).iloc[:n_rows].copy()
+    rng = np.random.default_rng(seed)
+    lengths = df['Region_RTs'].str.count(',').to_numpy() + 1
+    values = rng.integers(100, 4000, size=lengths.sum())
+    starts = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+    df['Region_RTs'] = ['[' + ','.join(map(str, values[s:s + n])) + ']'
+                        for s, n in zip(starts, lengths)]
+    return df
+
+
+def eval_path(column, numeric):
+    """기존 방식: 셀마다 eval 후 평면화"""
+    lists = column.apply(eval)
+    lengths = np.fromiter(map(len, lists), dtype=np.int64, count=len(lists))
+    flat = list(chain.from_iterable(lists))
+    values = np.asarray(flat, dtype=np.float64) if numeric else np.asarray(flat, dtype=object)
+    return np.concatenate([[0], np.cumsum(lengths)]), values
+
+
+def best_time(func, repeat=3):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+
+def main():
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+
+    print("="*80)
+    print(f"리스트 셀 파서 벤치마크 ({n_rows:,}행)")
+    print("="*80)
+
+    spr = load_sheet(EXCEL_PATH, 'SPR_Data', columns=['Regions', 'Region_RTs'])
+    df = make_benchmark_data(spr, n_rows)
+
+    for column, numeric in [('Region_RTs', True), ('Regions', False)]:
+        parser = parse_number_column if numeric else parse_list_column
+        t_eval, (eval_offsets, eval_values) = best_time(lambda: eval_path(df[column], numeric))
+        t_new, (offsets, values, bad_rows) = best_time(lambda: parser(df[column]))
+
+        same = np.array_equal(offsets, eval_offsets) and np.array_equal(values, eval_values)
+        print(f"\n[{column}] 값 {len(values):,}개")
+        print(f"  eval:        {t_eval:.3f}초")
+        print(f"  list_parser: {t_new:.3f}초 ({t_eval / t_new:.1f}배)")
+        print(f"  결과 일치: {same}, 형식 오류 행: {len(bad_rows)}")
+
+    # 형식 오류 셀이 섞인 경우: eval 경로는 중간에 멈춤
+    broken = df['Region_RTs'].copy()
+    bad_positions = [3, len(broken) // 2]
+    broken.iloc[bad_positions[0]] = '[650,433,'
+    broken.iloc[bad_positions[1]] = 'NaN'
+    print("\n[형식 오류 셀 포함]")
+    try:
+        eval_path(broken, numeric=True)
+        print("  eval: 오류 없음")
+    except Exception as e:
+        print(f"  eval: {type(e).__name__} 발생 (파싱 중단)")
+    t_new, (offsets, values, bad_rows) = best_time(lambda: parse_number_column(broken), repeat=1)
+    print(f"  list_parser: {t_new:.3f}초, 형식 오류 행 {bad_rows.tolist()} (기대값 {bad_positions})")
+
+
+if __name__ == "__main__":
+    main()
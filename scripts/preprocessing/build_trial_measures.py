@@ -0,0 +1,50 @@
+"""
+trial별 파생 측정치 테이블 생성 + spr_data_parsed CSV 내보내기
+- subject_RT / modifier_RT / spillover_RT / fact_RT + 유효 여부 플래그 (common.trial_measures)
+- 워크북이 바뀌지 않았으면 기존 테이블 재사용
+- apply_outlier_exclusion_1201.py가 읽는 result_1201/spr_data_parsed_1201.csv 생성
+
+사용법 (저장소 루트에서):
+    python scripts/preprocessing/build_trial_measures.py [워크북 경로] [CSV 경로]
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.trial_measures import (materialize_trial_measures, load_trial_measures,
+                                   load_provenance, export_legacy_csv)
+
+EXCEL_PATH = 'result_1201/ExpLing_Project.xlsx'
+CSV_PATH = 'result_1201/spr_data_parsed_1201.csv'
+
+
+def main():
+    excel_path = sys.argv[1] if len(sys.argv) > 1 else EXCEL_PATH
+    csv_path = sys.argv[2] if len(sys.argv) > 2 else CSV_PATH
+
+    print("="*80)
+    print(f"파생 측정치 테이블: {excel_path}")
+    print("="*80)
+
+    table_path, rebuilt = materialize_trial_measures(excel_path)
+    print(f"\n테이블: {table_path} ({'새로 생성' if rebuilt else '기존 테이블 사용 (워크북 변경 없음)'})")
+
+    measures = load_trial_measures(excel_path)
+    provenance = load_provenance(excel_path)
+    print(f"trial {len(measures)}개, 참가자 {measures['Participant_ID'].nunique()}명")
+    print(f"워크북 SHA-256: {provenance['sha256'][:16]}... (생성 시각 {provenance['built_at']})")
+
+    print("\n=== 파생 컬럼 ===")
+    for col, info in provenance['columns'].items():
+        if not col.startswith(('subject', 'modifier', 'spillover', 'fact', 'n_regions')):
+            continue
+        n_valid = measures[col].notna().sum() if col.endswith('_RT') else int(measures[col].astype(bool).sum())
+        print(f"  {col:<16} {n_valid:>5}  {info['formula']}")
+
+    export_legacy_csv(measures, csv_path)
+    print(f"\n저장: {csv_path}")
+
+
+if __name__ == "__main__":
+    main()
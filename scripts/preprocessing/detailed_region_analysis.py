@@ -6,52 +6,51 @@ import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
-from scipy import stats
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.region_store import RegionStore
+from common.rt_tensor import build_rt_tensor
+from common.cluster_permutation import ClusterPermutationTest
+
+# 군집 순열 검정 (region 전체 family-wise 보정)
+N_PERM = 10000
+SEED = 42
 
 # Set style
 sns.set_style("whitegrid")
 plt.rcParams['font.family'] = 'DejaVu Sans'
 
 def load_and_parse_spr():
-    """Load and parse SPR data"""
+    """Load SPR data into a RegionStore (long tables are materialized per analysis)"""
     df = pd.read_excel('result_1128/ExpLing_Project.xlsx', sheet_name='SPR_Data')
+    return RegionStore.from_spr(df)
 
-    # Parse regions
-    df['Regions_List'] = df['Regions'].apply(eval)
-    df['RT_List'] = df['Region_RTs'].apply(eval)
-
-    parsed_rows = []
-    for idx, row in df.iterrows():
-        regions = row['Regions_List']
-        rts = row['RT_List']
-
-        for i, (region_text, rt) in enumerate(zip(regions, rts)):
-            parsed_row = {
-                'Participant_ID': row['Participant_ID'],
-                'Item_ID': row['Item_ID'],
-                'Base': row['Base'],
-                'Emotion': row['Emotion'],
-                'Plausibility': row['Plausibility'],
-                'Is_Filler': row['Is_Filler'],
-                'Region_Index': i,
-                'Region_Text': region_text,
-                'RT': rt
-            }
-            parsed_rows.append(parsed_row)
-
-    return pd.DataFrame(parsed_rows)
+def print_clusters(label, test):
+    """Cluster-mass permutation result (family-wise corrected over regions)"""
+    null = 'exact' if test.exact else 'Monte Carlo'
+    print(f"\n{label}: clusters of adjacent regions with p<.05 (sign-flip {null}, "
+          f"{len(test.null)} permutations, {len(test.participants)} participants)")
+    clusters = test.table()
+    print(clusters.to_string(index=False) if len(clusters) else "  (no clusters)")
 
 def create_detailed_visualizations():
     """Create detailed region-by-region analysis"""
 
-    spr_parsed = load_and_parse_spr()
+    store = load_and_parse_spr()
+
+    # Experimental items only, with just the columns used below (no region text)
+    exp_trials = store.trials['Is_Filler'].to_numpy() == 0
+    exp_regions = store.to_frame(['Participant_ID', 'Trial_Index', 'Emotion', 'Plausibility'],
+                                 with_text=False, trials=exp_trials)
+
+    # Remove outliers
+    exp_data = exp_regions[(exp_regions['RT'] >= 200) & (exp_regions['RT'] <= 3000)]
 
-    # Filter experimental items only and remove outliers
-    exp_data = spr_parsed[
-        (spr_parsed['Is_Filler'] == 0) &
-        (spr_parsed['RT'] >= 200) &
-        (spr_parsed['RT'] <= 3000)
-    ].copy()
+    # 참가자 × trial × region 텐서 (실험 문장만, 필러는 to_frame에서 이미 제외)
+    tensor = build_rt_tensor(exp_regions, 'result_1128/.rt_tensor')
+    rt_range = (200, 3000)
 
     # Create figure with multiple panels
     fig = plt.figure(figsize=(20, 12))
@@ -126,32 +125,17 @@ def create_detailed_visualizations():
 
     # Panel 5: Difference scores (Hate - Neutral) by region
     ax5 = plt.subplot(2, 3, 5)
-    diff_data = []
-    for region in exp_data['Region_Index'].unique():
-        region_data = exp_data[exp_data['Region_Index'] == region]
-        hate_rt = region_data[region_data['Emotion'] == 'H'].groupby('Participant_ID')['RT'].mean()
-        neutral_rt = region_data[region_data['Emotion'] == 'N'].groupby('Participant_ID')['RT'].mean()
-
-        # Align participants
-        common_participants = hate_rt.index.intersection(neutral_rt.index)
-        if len(common_participants) > 0:
-            hate_aligned = hate_rt.loc[common_participants]
-            neutral_aligned = neutral_rt.loc[common_participants]
-            diff = hate_aligned.mean() - neutral_aligned.mean()
-            sem = (hate_aligned - neutral_aligned).sem()
-
-            # t-test
-            t_stat, p_val = stats.ttest_rel(hate_aligned, neutral_aligned)
-
-            diff_data.append({
-                'Region_Index': region,
-                'Difference': diff,
-                'SEM': sem,
-                'p_value': p_val,
-                'significant': p_val < 0.05
-            })
-
-    diff_df = pd.DataFrame(diff_data)
+    # 참가자 × region 평균 → 전체 region paired t + 인접 유의 region 군집 순열 검정
+    # (조건 마스크 6개를 텐서 한 번 읽기로)
+    masks = {(emotion, plaus): tensor.trial_mask(Emotion=emotion, Plausibility=plaus)
+             for emotion in ['H', 'N'] for plaus in ['P', 'I']}
+    masks.update({emotion: tensor.trial_mask(Emotion=emotion) for emotion in ['H', 'N']})
+    means = tensor.region_means(masks, rt_range)
+    emotion_test = ClusterPermutationTest(means['H'], means['N'], n_perm=N_PERM, seed=SEED)
+    diff_df = emotion_test.region_table()
+    diff_df = diff_df[diff_df['n'] > 0].rename(columns={'Region': 'Region_Index', 'p': 'p_value'})
+    diff_df = diff_df[['Region_Index', 'Difference', 'SEM', 't', 'p_value', 'cluster', 'p_cluster',
+                       'significant']]
 
     colors = ['green' if sig else 'gray' for sig in diff_df['significant']]
     bars = ax5.bar(diff_df['Region_Index'], diff_df['Difference'], yerr=diff_df['SEM'],
@@ -159,31 +143,24 @@ def create_detailed_visualizations():
     ax5.axhline(y=0, color='black', linestyle='-', linewidth=1)
     ax5.set_xlabel('Word Position (Region Index)', fontsize=12, fontweight='bold')
     ax5.set_ylabel('RT Difference (Hate - Neutral, ms)', fontsize=12, fontweight='bold')
-    ax5.set_title('Attention Capture by Region (Green = p<.05)', fontsize=14, fontweight='bold')
+    ax5.set_title('Attention Capture by Region (Green = cluster p<.05)', fontsize=14, fontweight='bold')
     ax5.grid(True, alpha=0.3, axis='y')
 
     # Panel 6: Plausibility effect by emotion and region
     ax6 = plt.subplot(2, 3, 6)
-    plaus_effect_data = []
-    for region in exp_data['Region_Index'].unique():
-        for emotion in ['H', 'N']:
-            region_data = exp_data[(exp_data['Region_Index'] == region) & (exp_data['Emotion'] == emotion)]
-            plaus_rt = region_data[region_data['Plausibility'] == 'P'].groupby('Participant_ID')['RT'].mean()
-            implaus_rt = region_data[region_data['Plausibility'] == 'I'].groupby('Participant_ID')['RT'].mean()
-
-            common_participants = plaus_rt.index.intersection(implaus_rt.index)
-            if len(common_participants) > 0:
-                plaus_aligned = plaus_rt.loc[common_participants]
-                implaus_aligned = implaus_rt.loc[common_participants]
-                effect = implaus_aligned.mean() - plaus_aligned.mean()
-
-                plaus_effect_data.append({
-                    'Region_Index': region,
-                    'Emotion': emotion,
-                    'Plausibility_Effect': effect
-                })
-
-    plaus_effect_df = pd.DataFrame(plaus_effect_data)
+    plaus_tests = {emotion: ClusterPermutationTest(means[(emotion, 'I')], means[(emotion, 'P')],
+                                                   n_perm=N_PERM, seed=SEED)
+                   for emotion in ['H', 'N']}
+    plaus_effect_df = pd.concat([
+        test.regions.loc[test.regions['n'] > 0, ['Region', 'Difference']]
+            .rename(columns={'Region': 'Region_Index', 'Difference': 'Plausibility_Effect'})
+            .assign(Emotion=emotion)
+        for emotion, test in plaus_tests.items()], ignore_index=True)
+
+    # H2 상호작용: 참가자별 (H: I - P) - (N: I - P)
+    interaction_test = ClusterPermutationTest(
+        (means[('H', 'I')] - means[('H', 'P')]) - (means[('N', 'I')] - means[('N', 'P')]),
+        n_perm=N_PERM, seed=SEED)
 
     for emotion, color, marker in [('H', 'red', 'o'), ('N', 'blue', 's')]:
         data = plaus_effect_df[plaus_effect_df['Emotion'] == emotion]
@@ -208,11 +185,15 @@ def create_detailed_visualizations():
 
     print("\nEmotion Effect (Hate - Neutral) by Region:")
     print(diff_df.to_string(index=False))
+    print_clusters("Emotion (Hate - Neutral)", emotion_test)
 
     print("\n\nPlausibility Effect (Implausible - Plausible) by Region and Emotion:")
     plaus_pivot = plaus_effect_df.pivot(index='Region_Index', columns='Emotion', values='Plausibility_Effect')
     plaus_pivot['Interaction'] = plaus_pivot['H'] - plaus_pivot['N']
     print(plaus_pivot.to_string())
+    for emotion, test in plaus_tests.items():
+        print_clusters(f"Plausibility (Implaus - Plaus), Emotion {emotion}", test)
+    print_clusters("Emotion × Plausibility (H - N plausibility effect)", interaction_test)
 
 if __name__ == "__main__":
     create_detailed_visualizations()
@@ -0,0 +1,68 @@
+"""
+server.js 참가자 JSON 파일 증분 적재
+- experiment/data/ 의 새 / 변경된 파일만 읽어 Parquet 파티션으로 추가
+- 이미 적재한 파일은 manifest (파일 이름 + mtime + SHA-256)로 건너뜀
+- data 폴더에서 삭제된 파일은 적재 결과에서도 삭제
+
+사용법 (저장소 루트에서):
+    python scripts/preprocessing/ingest_server_data.py [data 폴더] [저장 폴더]
+
+적재 결과 읽기:
+    from common.server_ingest import load_ingested
+    data = load_ingested('result_server/ingested')   # load_sheets와 같은 dict 형태
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.server_ingest import ingest, ingested_counts
+
+DATA_DIR = 'experiment/data'
+STORE_DIR = 'result_server/ingested'
+
+
+def main():
+    data_dir = sys.argv[1] if len(sys.argv) > 1 else DATA_DIR
+    store_dir = sys.argv[2] if len(sys.argv) > 2 else STORE_DIR
+
+    if not os.path.isdir(data_dir):
+        print(f"데이터 폴더가 없습니다: {data_dir}")
+        sys.exit(1)
+
+    print("="*80)
+    print(f"server.js 데이터 적재: {data_dir} → {store_dir}")
+    print("="*80)
+
+    start = time.time()
+    summary = ingest(data_dir, store_dir)
+    elapsed = time.time() - start
+
+    print(f"\n새 파일: {len(summary['new'])}개")
+    for filename in summary['new']:
+        print(f"  + {filename}")
+    print(f"변경된 파일: {len(summary['updated'])}개")
+    for filename in summary['updated']:
+        print(f"  ~ {filename}")
+    print(f"건너뜀 (이미 적재): {summary['skipped']}개")
+    print(f"삭제된 파일: {len(summary['removed'])}개")
+    for filename in summary['removed']:
+        print(f"  - {filename}")
+    if summary['failed']:
+        print(f"실패: {len(summary['failed'])}개 (다음 실행 때 재시도)")
+    print(f"소요 시간: {elapsed:.2f}초")
+
+    changed = summary['new'] + summary['updated']
+    if changed:
+        print("\n=== 이번 실행에서 적재한 파티션 ===")
+        for table, (n_rows, n_participants) in ingested_counts(store_dir, changed).items():
+            print(f"  {table}: {n_rows}행 (참가자 {n_participants}명)")
+
+    print("\n=== 적재된 테이블 (manifest 기준) ===")
+    for table, (n_rows, n_participants) in ingested_counts(store_dir).items():
+        print(f"  {table}: {n_rows}행 (참가자 {n_participants}명)")
+
+
+if __name__ == "__main__":
+    main()
@@ -12,6 +12,12 @@ from scipy import stats
 from statsmodels.formula.api import mixedlm
 import warnings
 import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.data_cache import open_workbook, SPR_ANALYSIS_COLUMNS
+from common.spr_regions import explode_sentence_structure
+
 warnings.filterwarnings('ignore')
 
 # 폰트 설정
@@ -32,12 +38,11 @@ def ensure_output_dir():
     print(f"출력 디렉토리: {OUTPUT_DIR}")
 
 def load_data():
-    """데이터 로드"""
+    """데이터 로드 (시트는 처음 접근할 때 읽음, 시트별 Parquet 캐시 사용)"""
     excel_path = f'{OUTPUT_DIR}/ExpLing_Project.xlsx'
-    xl = pd.ExcelFile(excel_path)
-    data = {}
-    for sheet in xl.sheet_names:
-        data[sheet] = pd.read_excel(excel_path, sheet_name=sheet)
+    data = open_workbook(excel_path,
+                         sheets=['SPR_Data', 'Rating_Data', 'Manipulation_Check', 'Recall_Data'],
+                         columns={'SPR_Data': SPR_ANALYSIS_COLUMNS})
     print(f"\n데이터 로드 완료: {list(data.keys())}")
     return data
 
@@ -68,45 +73,9 @@ def identify_outlier_trials(df, method='iqr', k=2.5):
     return df[~outliers].copy()
 
 def parse_sentence_structure(df):
-    """문장 구조 파싱: Subject - Modifier - Spillover - Fact(avg)"""
-    parsed_rows = []
-
-    for idx, row in df.iterrows():
-        if row['Is_Filler'] == 1:
-            continue
-
-        regions = eval(row['Regions'])
-        rts = eval(row['Region_RTs'])
-
-        base_info = {
-            'Participant_ID': row['Participant_ID'],
-            'List_ID': row['List_ID'],
-            'Trial_Index': row['Trial_Index'],
-            'Item_ID': row['Item_ID'],
-            'Base': row['Base'],
-            'Emotion': row['Emotion'],
-            'Plausibility': row['Plausibility'],
-            'Version': row['Version']
-        }
-
-        if len(regions) >= 4:
-            # Subject
-            parsed_rows.append({**base_info, 'Region_Type': 'Subject',
-                               'Region_Text': regions[0], 'RT': rts[0]})
-            # Modifier
-            parsed_rows.append({**base_info, 'Region_Type': 'Modifier',
-                               'Region_Text': regions[1], 'RT': rts[1]})
-            # Spillover
-            parsed_rows.append({**base_info, 'Region_Type': 'Spillover',
-                               'Region_Text': regions[2], 'RT': rts[2]})
-            # Fact (평균)
-            fact_rts = [rt for rt in rts[3:] if 200 <= rt <= 3000]
-            if len(fact_rts) > 0:
-                parsed_rows.append({**base_info, 'Region_Type': 'Fact',
-                                   'Region_Text': ' '.join(regions[3:]),
-                                   'RT': np.mean(fact_rts)})
-
-    return pd.DataFrame(parsed_rows)
+    """문장 구조 파싱: Subject - Modifier - Spillover - Fact(avg) (common.spr_regions 벡터화 엔진)"""
+    return explode_sentence_structure(df)
+
 
 def remove_word_outliers(df, lower=200, upper=3000):
     """Word-level outlier 제거"""
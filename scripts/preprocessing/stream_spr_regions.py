@@ -0,0 +1,86 @@
+"""
+SPR_Data → region long table Parquet 스트리밍 변환 (common.spr_stream)
+- 시트를 청크 단위로 읽고 (Parquet 캐시가 있으면 캐시에서) 청크마다 region 행으로 펼쳐 이어 씀
+- 메모리에는 청크 1개 분량만 → 참가자 수가 늘어도 최대 메모리가 거의 일정
+- 결과 파일의 행 수 (Parquet footer)를 스트리밍 중 센 region 행 수와 대조
+- Total_Reading_Time_ms만 한 번 더 스트리밍해 trial-level IQR 기준 계산 (common.quantile_sketch)
+
+사용법 (저장소 루트에서):
+    python scripts/preprocessing/stream_spr_regions.py [워크북 경로] [Parquet 경로] [청크 행 수] [IQR k]
+
+결과 읽기:
+    parsed = pd.read_parquet('result_1201/spr_regions.parquet')   # RegionStore.to_frame()과 같은 컬럼
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.region_store import RegionStore
+from common.spr_stream import iter_sheet_chunks, stream_regions, stream_quantiles, DEFAULT_CHUNK_ROWS
+from common.quantile_sketch import iqr_bounds
+
+EXCEL_PATH = 'result_1201/ExpLing_Project.xlsx'
+OUT_PATH = 'result_1201/spr_regions.parquet'
+RT_COL = 'Total_Reading_Time_ms'
+
+
+def explode_chunk(chunk):
+    """SPR 청크 → region long table (trial 컬럼 + Region_Index + Region_Text + RT)"""
+    return RegionStore.from_spr(chunk).to_frame()
+
+
+def stream_iqr_bounds(excel_path, k=2.5, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """
+    Trial-level IQR 기준 (Q1 - k·IQR, Q3 + k·IQR)을 스트리밍 1회로 계산
+    - RT 컬럼만 읽고 KLL sketch로 사분위수 추정 → 메모리 일정
+    - sketch가 압축되지 않았으면 (exact) np.percentile과 같은 값
+
+    Returns:
+    --------
+    tuple : (lower, upper, QuantileSketch)
+    """
+    chunks = iter_sheet_chunks(excel_path, 'SPR_Data', chunk_rows=chunk_rows, columns=[RT_COL])
+    sketch = stream_quantiles(chunks, RT_COL)
+    lower, upper = iqr_bounds(sketch, k=k)
+    return lower, upper, sketch
+
+
+def main():
+    excel_path = sys.argv[1] if len(sys.argv) > 1 else EXCEL_PATH
+    out_path = sys.argv[2] if len(sys.argv) > 2 else OUT_PATH
+    chunk_rows = int(sys.argv[3]) if len(sys.argv) > 3 else DEFAULT_CHUNK_ROWS
+    k = float(sys.argv[4]) if len(sys.argv) > 4 else 2.5
+
+    if not os.path.exists(excel_path):
+        print(f"워크북이 없습니다: {excel_path}")
+        sys.exit(1)
+
+    print("="*80)
+    print(f"SPR_Data 스트리밍 변환: {excel_path} → {out_path} (청크 {chunk_rows}행)")
+    print("="*80)
+
+    start = time.time()
+    chunks = iter_sheet_chunks(excel_path, 'SPR_Data', chunk_rows=chunk_rows)
+    summary = stream_regions(chunks, explode_chunk, out_path=out_path)
+    elapsed = time.time() - start
+
+    print(f"\n청크 {summary['n_chunks']}개, trial {summary['n_trials']}개 → region {summary['n_rows']}행")
+    print(f"소요 시간: {elapsed:.2f}초")
+
+    if summary['n_rows'] > 0:
+        import pyarrow.parquet as pq
+        written = pq.read_metadata(out_path).num_rows
+        status = '일치' if written == summary['n_rows'] else '불일치'
+        print(f"저장된 행 수 (Parquet footer): {written} ({status})")
+        print(f"\n저장: {out_path}")
+
+    lower, upper, sketch = stream_iqr_bounds(excel_path, k=k, chunk_rows=chunk_rows)
+    print(f"\n=== Trial-level IQR 기준 ({RT_COL}, 전체 trial) ===")
+    print(f"k={k}, n={sketch.n}: {lower:.0f} - {upper:.0f} ms "
+          f"(분위수 순위 오차 <= {sketch.error_bound:.2%})")
+
+
+if __name__ == "__main__":
+    main()
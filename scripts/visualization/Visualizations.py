@@ -12,6 +12,14 @@ from scipy import stats
 from statsmodels.formula.api import mixedlm
 import warnings
 import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.data_cache import open_workbook, SPR_ANALYSIS_COLUMNS
+from common.spr_regions import explode_sentence_structure
+from common.factors import cell_summary
+from common.participant_effects import h3_effects
+
 warnings.filterwarnings('ignore')
 
 # 폰트 설정
@@ -29,12 +37,11 @@ def ensure_output_dir():
     print(f"출력 디렉토리: {OUTPUT_DIR}")
 
 def load_data():
-    """데이터 로드"""
+    """데이터 로드 (시트는 처음 접근할 때 읽음, 시트별 Parquet 캐시 사용)"""
     excel_path = f'{OUTPUT_DIR}/ExpLing_Project.xlsx'
-    xl = pd.ExcelFile(excel_path)
-    data = {}
-    for sheet in xl.sheet_names:
-        data[sheet] = pd.read_excel(excel_path, sheet_name=sheet)
+    data = open_workbook(excel_path,
+                         sheets=['SPR_Data', 'Rating_Data', 'Manipulation_Check', 'Recall_Data'],
+                         columns={'SPR_Data': SPR_ANALYSIS_COLUMNS})
     print(f"\n데이터 로드 완료: {list(data.keys())}")
     return data
 
@@ -65,45 +72,9 @@ def identify_outlier_trials(df, method='iqr', k=2.5):
     return df[~outliers].copy()
 
 def parse_sentence_structure(df):
-    """문장 구조 파싱: Subject - Modifier - Spillover - Fact(avg)"""
-    parsed_rows = []
+    """문장 구조 파싱: Subject - Modifier - Spillover - Fact(avg) (common.spr_regions 벡터화 엔진)"""
+    return explode_sentence_structure(df)
 
-    for idx, row in df.iterrows():
-        if row['Is_Filler'] == 1:
-            continue
-
-        regions = eval(row['Regions'])
-        rts = eval(row['Region_RTs'])
-
-        base_info = {
-            'Participant_ID': row['Participant_ID'],
-            'List_ID': row['List_ID'],
-            'Trial_Index': row['Trial_Index'],
-            'Item_ID': row['Item_ID'],
-            'Base': row['Base'],
-            'Emotion': row['Emotion'],
-            'Plausibility': row['Plausibility'],
-            'Version': row['Version']
-        }
-
-        if len(regions) >= 4:
-            # Subject
-            parsed_rows.append({**base_info, 'Region_Type': 'Subject',
-                               'Region_Text': regions[0], 'RT': rts[0]})
-            # Modifier
-            parsed_rows.append({**base_info, 'Region_Type': 'Modifier',
-                               'Region_Text': regions[1], 'RT': rts[1]})
-            # Spillover
-            parsed_rows.append({**base_info, 'Region_Type': 'Spillover',
-                               'Region_Text': regions[2], 'RT': rts[2]})
-            # Fact (평균)
-            fact_rts = [rt for rt in rts[3:] if 200 <= rt <= 3000]
-            if len(fact_rts) > 0:
-                parsed_rows.append({**base_info, 'Region_Type': 'Fact',
-                                   'Region_Text': ' '.join(regions[3:]),
-                                   'RT': np.mean(fact_rts)})
-
-    return pd.DataFrame(parsed_rows)
 
 def remove_word_outliers(df, lower=200, upper=3000):
     """Word-level outlier 제거"""
@@ -241,8 +212,7 @@ def analyze_h2(parsed_df):
     critical_df = parsed_df[parsed_df['Region_Type'].isin(['Spillover', 'Fact'])].copy()
 
     # 조건별 평균
-    summary = critical_df.groupby(['Emotion', 'Plausibility'])['RT'].agg(
-        ['mean', 'std', 'count']).round(1)
+    summary = cell_summary(critical_df, 'RT', ['Emotion', 'Plausibility'], ['mean', 'std', 'count']).round(1)
     print("\n조건별 Critical Region RT:")
     print(summary)
 
@@ -311,8 +281,7 @@ def analyze_h3(rating_data):
     rating_clean = rating_data[rating_data['Rating'].notna()].copy()
 
     # 조건별 요약
-    summary = rating_clean.groupby(['Emotion', 'Plausibility'])['Rating'].agg(
-        ['mean', 'std', 'count']).round(3)
+    summary = cell_summary(rating_clean, 'Rating', ['Emotion', 'Plausibility'], ['mean', 'std', 'count']).round(3)
     print("\n조건별 Rating:")
     print(summary)
 
@@ -394,32 +363,8 @@ def analyze_h3_h4_integration(rating_data, recall_data):
     # H3: 참가자별 기억 왜곡
     rating_clean = rating_data[rating_data['Rating'].notna()].copy()
 
-    participant_h3 = []
-    for pid in rating_clean['Participant_ID'].unique():
-        p_data = rating_clean[rating_clean['Participant_ID'] == pid]
-
-        h_data = p_data[p_data['Emotion'] == 'H']
-        h_p = h_data[h_data['Plausibility'] == 'P']['Rating'].mean()
-        h_i = h_data[h_data['Plausibility'] == 'I']['Rating'].mean()
-        hate_plaus_effect = h_p - h_i
-
-        n_data = p_data[p_data['Emotion'] == 'N']
-        n_p = n_data[n_data['Plausibility'] == 'P']['Rating'].mean()
-        n_i = n_data[n_data['Plausibility'] == 'I']['Rating'].mean()
-        neutral_plaus_effect = n_p - n_i
-
-        distortion = hate_plaus_effect - neutral_plaus_effect
-        hate_bias = h_data['Rating'].mean() - n_data['Rating'].mean()
-
-        participant_h3.append({
-            'Participant_ID': pid,
-            'Hate_Plaus_Effect': hate_plaus_effect,
-            'Neutral_Plaus_Effect': neutral_plaus_effect,
-            'Distortion': distortion,
-            'Hate_Bias': hate_bias
-        })
-
-    h3_df = pd.DataFrame(participant_h3)
+    h3_df = h3_effects(rating_clean)[['Participant_ID', 'Hate_Plaus_Effect', 'Neutral_Plaus_Effect',
+                                      'Distortion', 'Hate_Bias']]
 
     # H4: 참가자별 회상 패턴
     background_facts = ['중앙아시아', '협곡', '산악', '반지하', '흙', '돌',
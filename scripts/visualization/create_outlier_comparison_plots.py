@@ -8,6 +8,11 @@ import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
 from pathlib import Path
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.trimming import trim_mask
 
 # Set style
 sns.set_style("whitegrid")
@@ -90,23 +95,9 @@ def apply_exclusion_criteria(df):
     df_standard['exclusion_strategy'] = 'Standard\n(100-3000ms)'
 
     # Strategy 3: Stricter exclusion (±2.5 SD per participant per condition)
-    df_strict_list = []
-    for (participant, emotion, plausibility, region), group in df.groupby(
-            ['participant', 'emotion', 'plausibility', 'region']):
-        mean_rt = group['RT'].mean()
-        sd_rt = group['RT'].std()
-
-        if pd.isna(sd_rt) or sd_rt == 0:
-            df_strict_list.append(group)
-            continue
-
-        lower_bound = mean_rt - 2.5 * sd_rt
-        upper_bound = mean_rt + 2.5 * sd_rt
-
-        filtered = group[(group['RT'] >= lower_bound) & (group['RT'] <= upper_bound)].copy()
-        df_strict_list.append(filtered)
-
-    df_strict = pd.concat(df_strict_list, ignore_index=True)
+    # (groupby-transform kernel; groups with SD 0 / single observation are kept whole)
+    keep = trim_mask(df, 'RT', by=['participant', 'emotion', 'plausibility', 'region'], rule='sd', k=2.5)
+    df_strict = df[keep].copy()
     df_strict['exclusion_strategy'] = 'Stricter\n(±2.5 SD)'
 
     # Combine all strategies
@@ -9,7 +9,11 @@ import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
 from pathlib import Path
-import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.trial_measures import load_trial_measures
 
 # Set style
 sns.set_style("whitegrid")
@@ -18,41 +22,25 @@ plt.rcParams['font.size'] = 11
 plt.rcParams['figure.dpi'] = 300
 
 def parse_spr_data(excel_path):
-    """Parse SPR data from Excel file and extract modifier RTs"""
+    """Load modifier RTs from the materialized per-trial measures table (built once per workbook)"""
 
     print(f"Loading data from: {excel_path}")
-    df = pd.read_excel(excel_path, sheet_name='SPR_Data')
+    df = load_trial_measures(excel_path)
 
     print(f"Loaded {len(df)} trials")
     print(f"Participants: {df['Participant_ID'].nunique()}")
 
-    # Parse region data to extract modifier RT
-    modifier_rts = []
-
-    for idx, row in df.iterrows():
-        # Skip fillers
-        if row['Is_Filler'] == 1:
-            continue
-
-        # Parse regions and RTs
-        try:
-            regions = json.loads(row['Regions']) if isinstance(row['Regions'], str) else row['Regions']
-            rts = json.loads(row['Region_RTs']) if isinstance(row['Region_RTs'], str) else row['Region_RTs']
-
-            # For experimental items, modifier should be at index 1 (after subject)
-            # Structure: ["탈렌족은", "미개한", "민족으로,", ...]
-            if len(regions) >= 2 and len(rts) >= 2:
-                modifier_rts.append({
-                    'participant': row['Participant_ID'],
-                    'item_id': row['Item_ID'],
-                    'base': row['Base'],
-                    'emotion': row['Emotion'],
-                    'plausibility': row['Plausibility'],
-                    'modifier_RT': rts[1]  # Index 1 is the modifier
-                })
-        except Exception as e:
-            print(f"Error parsing row {idx}: {e}")
-            continue
+    # Skip fillers; modifier_RT is Region_RTs[1] (after subject)
+    # Structure: ["탈렌족은", "미개한", "민족으로,", ...]
+    df = df[(df['Is_Filler'] != 1) & df['modifier_valid']]
+    modifier_rts = {
+        'participant': df['Participant_ID'].to_numpy(),
+        'item_id': df['Item_ID'].to_numpy(),
+        'base': df['Base'].to_numpy(),
+        'emotion': df['Emotion'].to_numpy(),
+        'plausibility': df['Plausibility'].to_numpy(),
+        'modifier_RT': df['modifier_RT'].to_numpy()
+    }
 
     df_modifier = pd.DataFrame(modifier_rts)
     print(f"\nExtracted {len(df_modifier)} modifier RTs")
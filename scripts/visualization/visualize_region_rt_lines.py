@@ -12,6 +12,14 @@ import matplotlib.pyplot as plt
 import seaborn as sns
 from scipy import stats
 import warnings
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.spr_regions import explode_sentence_structure
+from common.rt_tensor import build_rt_tensor
+from common.trimming import trim_mask
+
 warnings.filterwarnings('ignore')
 
 # Font settings
@@ -35,94 +43,19 @@ def remove_practice_trials(df):
     print(f"Practice trials removed: {before} → {after} ({before-after} removed)")
     return df_clean
 
-def identify_outlier_trials(df, method='iqr', k=2.5):
-    """Identify and remove trial-level outliers"""
-    total_rts = df['Total_Reading_Time_ms'].values
-
-    if method == 'iqr':
-        Q1 = np.percentile(total_rts, 25)
-        Q3 = np.percentile(total_rts, 75)
-        IQR = Q3 - Q1
-        lower_bound = Q1 - k * IQR
-        upper_bound = Q3 + k * IQR
-    else:  # sd method
-        mean_rt = np.mean(total_rts)
-        sd_rt = np.std(total_rts)
-        lower_bound = mean_rt - k * sd_rt
-        upper_bound = mean_rt + k * sd_rt
-
-    outliers = (total_rts < lower_bound) | (total_rts > upper_bound)
+def identify_outlier_trials(df, method='iqr', k=2.5, by=None):
+    """Identify and remove trial-level outliers (global bounds, or per group via `by`, e.g. 'Participant_ID')"""
+    # np.std in the original global SD rule -> ddof=0
+    keep = trim_mask(df, 'Total_Reading_Time_ms', by=by, rule=method, k=k, ddof=0)
+    outliers = ~keep
     print(f"Outlier trials removed: {outliers.sum()} / {len(df)} ({outliers.sum()/len(df)*100:.1f}%)")
 
-    return df[~outliers].copy()
+    return df[keep].copy()
 
 def parse_sentence_structure(df):
-    """Parse sentence structure: Subject - Modifier - Spillover - Fact"""
-    parsed_rows = []
-
-    for idx, row in df.iterrows():
-        if row['Is_Filler'] == 1:  # Skip fillers
-            continue
-
-        regions = eval(row['Regions'])
-        rts = eval(row['Region_RTs'])
-
-        base_info = {
-            'Participant_ID': row['Participant_ID'],
-            'List_ID': row['List_ID'],
-            'Trial_Index': row['Trial_Index'],
-            'Item_ID': row['Item_ID'],
-            'Base': row['Base'],
-            'Emotion': row['Emotion'],
-            'Plausibility': row['Plausibility'],
-            'Version': row['Version']
-        }
-
-        if len(regions) >= 4:
-            # Subject
-            parsed_rows.append({
-                **base_info,
-                'Region_Type': 'Subject',
-                'Region_Text': regions[0],
-                'RT': rts[0],
-                'Region_Position': 0
-            })
-
-            # Modifier
-            parsed_rows.append({
-                **base_info,
-                'Region_Type': 'Modifier',
-                'Region_Text': regions[1],
-                'RT': rts[1],
-                'Region_Position': 1
-            })
-
-            # Spillover
-            parsed_rows.append({
-                **base_info,
-                'Region_Type': 'Spillover',
-                'Region_Text': regions[2],
-                'RT': rts[2],
-                'Region_Position': 2
-            })
-
-            # Fact region (average)
-            fact_regions = regions[3:]
-            fact_rts = rts[3:]
-
-            # Word-level outlier removal (200-3000ms)
-            valid_rts = [rt for rt in fact_rts if 200 <= rt <= 3000]
-            if len(valid_rts) > 0:
-                avg_fact_rt = np.mean(valid_rts)
-                parsed_rows.append({
-                    **base_info,
-                    'Region_Type': 'Fact',
-                    'Region_Text': ' '.join(fact_regions),
-                    'RT': avg_fact_rt,
-                    'Region_Position': 3
-                })
-
-    return pd.DataFrame(parsed_rows)
+    """Parse sentence structure: Subject - Modifier - Spillover - Fact (vectorized, common.spr_regions)"""
+    return explode_sentence_structure(df, with_position=True)
+
 
 def remove_word_outliers(df, lower=200, upper=3000):
     """Remove word-level outliers"""
@@ -141,7 +74,13 @@ def create_line_plots(parsed_data, output_dir='result_1201'):
     region_labels = ['Subject', 'Modifier', 'Spillover', 'Fact']
 
     # Calculate means and SEM for each condition
-    # We'll compute both participant-level means and overall means
+    # Participant × trial × region tensor: aggregate by participant first, then mean and SEM
+    tensor = build_rt_tensor(parsed_data, f'{output_dir}/.rt_tensor', region_col='Region_Position')
+
+    def region_lines(**conditions):
+        summary = tensor.region_summary(tensor.trial_mask(**conditions),
+                                        regions=range(len(region_order)))
+        return summary['mean'].tolist(), summary['sem'].tolist()
 
     # =================================================================
     # Figure 1: Split by Emotion (Hate vs Neutral)
@@ -149,18 +88,8 @@ def create_line_plots(parsed_data, output_dir='result_1201'):
     fig, ax = plt.subplots(figsize=(12, 7))
 
     for emotion, color, marker in [('H', '#d62728', 'o'), ('N', '#1f77b4', 's')]:
-        emotion_data = parsed_data[parsed_data['Emotion'] == emotion]
-
         # Aggregate by participant first, then take mean and SEM
-        region_means = []
-        region_sems = []
-
-        for region in region_order:
-            region_data = emotion_data[emotion_data['Region_Type'] == region]
-            participant_means = region_data.groupby('Participant_ID')['RT'].mean()
-
-            region_means.append(participant_means.mean())
-            region_sems.append(participant_means.sem())
+        region_means, region_sems = region_lines(Emotion=emotion)
 
         # Plot line with error bars
         ax.errorbar(range(len(region_order)), region_means, yerr=region_sems,
@@ -187,17 +116,7 @@ def create_line_plots(parsed_data, output_dir='result_1201'):
     fig, ax = plt.subplots(figsize=(12, 7))
 
     for plaus, color, marker in [('P', '#2ca02c', 'o'), ('I', '#ff7f0e', '^')]:
-        plaus_data = parsed_data[parsed_data['Plausibility'] == plaus]
-
-        region_means = []
-        region_sems = []
-
-        for region in region_order:
-            region_data = plaus_data[plaus_data['Region_Type'] == region]
-            participant_means = region_data.groupby('Participant_ID')['RT'].mean()
-
-            region_means.append(participant_means.mean())
-            region_sems.append(participant_means.sem())
+        region_means, region_sems = region_lines(Plausibility=plaus)
 
         ax.errorbar(range(len(region_order)), region_means, yerr=region_sems,
                    marker=marker, markersize=12, linewidth=3, capsize=8,
@@ -230,18 +149,7 @@ def create_line_plots(parsed_data, output_dir='result_1201'):
     ]
 
     for emotion, plaus, label, color, marker in conditions:
-        cond_data = parsed_data[(parsed_data['Emotion'] == emotion) &
-                                (parsed_data['Plausibility'] == plaus)]
-
-        region_means = []
-        region_sems = []
-
-        for region in region_order:
-            region_data = cond_data[cond_data['Region_Type'] == region]
-            participant_means = region_data.groupby('Participant_ID')['RT'].mean()
-
-            region_means.append(participant_means.mean())
-            region_sems.append(participant_means.sem())
+        region_means, region_sems = region_lines(Emotion=emotion, Plausibility=plaus)
 
         ax.errorbar(range(len(region_order)), region_means, yerr=region_sems,
                    marker=marker, markersize=10, linewidth=2.5, capsize=6,
@@ -274,18 +182,7 @@ def create_line_plots(parsed_data, output_dir='result_1201'):
 
     for row, col, emotion, plaus, title, color in subplot_configs:
         ax = axes[row, col]
-        cond_data = parsed_data[(parsed_data['Emotion'] == emotion) &
-                                (parsed_data['Plausibility'] == plaus)]
-
-        region_means = []
-        region_sems = []
-
-        for region in region_order:
-            region_data = cond_data[cond_data['Region_Type'] == region]
-            participant_means = region_data.groupby('Participant_ID')['RT'].mean()
-
-            region_means.append(participant_means.mean())
-            region_sems.append(participant_means.sem())
+        region_means, region_sems = region_lines(Emotion=emotion, Plausibility=plaus)
 
         ax.errorbar(range(len(region_order)), region_means, yerr=region_sems,
                    marker='o', markersize=10, linewidth=3, capsize=8,